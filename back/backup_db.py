@@ -0,0 +1,116 @@
+# backup_db.py
+"""
+Backups of the SQLite database while the app keeps running (see db/backup.py).
+
+    python backup_db.py snapshot                    # timestamped copy into BACKUP_DIR, keeps BACKUP_KEEP
+    python backup_db.py snapshot --every 3600       # keep running, once an hour
+    python backup_db.py backup /mnt/nas/medcore.db  # one copy to a given path
+    python backup_db.py list
+    python backup_db.py verify backups/database-20250101T000000Z.db
+    python backup_db.py restore backups/database-20250101T000000Z.db
+
+Restore only with the app stopped. The database it replaces is saved next to
+it as database.db.before-restore-<time>.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from core.config import BACKUP_DIR, BACKUP_KEEP, BACKUP_PAGES_PER_STEP, BACKUP_STEP_SLEEP_MS
+from db.backup import backup, database_path, list_snapshots, restore, snapshot, verify
+from db.session import engine
+
+
+def _size(num_bytes: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if num_bytes < 1024 or unit == "GB":
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+
+def _progress(copied: int, total: int) -> None:
+    print(f"\r   {copied}/{total} pages ({copied * 100 // max(total, 1)}%)", end="", flush=True)
+
+
+def _report(path: Path, stats) -> None:
+    print(f"\r✅ Backed up to {path}: {_size(stats['bytes'])} in {stats['seconds']:.1f}s ({stats['steps']} steps)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Online backup, verify and restore of the SQLite database.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    copy_options = argparse.ArgumentParser(add_help=False)
+    copy_options.add_argument("--pages", type=int, default=BACKUP_PAGES_PER_STEP, help="pages per step")
+    copy_options.add_argument("--sleep-ms", type=float, default=BACKUP_STEP_SLEEP_MS, help="pause between steps")
+    copy_options.add_argument("--quiet", action="store_true", help="no progress output")
+
+    take = commands.add_parser("snapshot", parents=[copy_options], help="timestamped copy into the backup directory")
+    take.add_argument("--dir", type=Path, default=BACKUP_DIR)
+    take.add_argument("--keep", type=int, default=BACKUP_KEEP, help="snapshots to keep (0 = all)")
+    take.add_argument("--every", type=float, default=0, help="repeat every N seconds")
+
+    copy = commands.add_parser("backup", parents=[copy_options], help="copy to a given file")
+    copy.add_argument("destination", type=Path)
+
+    listing = commands.add_parser("list", help="snapshots in the backup directory")
+    listing.add_argument("--dir", type=Path, default=BACKUP_DIR)
+
+    check = commands.add_parser("verify", help="integrity check of a backup")
+    check.add_argument("path", type=Path)
+
+    put_back = commands.add_parser("restore", help="replace the database with a backup (app stopped)")
+    put_back.add_argument("path", type=Path)
+
+    args = parser.parse_args()
+    database = database_path(engine)
+
+    if args.command in ("snapshot", "backup"):
+        options = {"pages": args.pages, "sleep_ms": args.sleep_ms, "progress": None if args.quiet else _progress}
+        while True:
+            try:
+                if args.command == "snapshot":
+                    path, stats = snapshot(database, args.dir, args.keep, **options)
+                else:
+                    path, stats = args.destination, backup(database, args.destination, **options)
+                _report(path, stats)
+            except Exception as e:
+                print(f"\n❌ Backup failed: {e}")
+                if args.command == "backup" or args.every <= 0:
+                    sys.exit(1)
+            if args.command == "backup" or args.every <= 0:
+                break
+            time.sleep(args.every)
+
+    elif args.command == "list":
+        snapshots = list_snapshots(args.dir)
+        for taken, path in snapshots:
+            print(f"{taken:%Y-%m-%d %H:%M:%S}  {_size(path.stat().st_size):>10}  {path}")
+        if not snapshots:
+            print(f"No snapshots in {args.dir}")
+
+    elif args.command == "verify":
+        problems, counts = verify(args.path)
+        for table, count in counts.items():
+            print(f"   {table}: {count} rows")
+        if problems:
+            print(f"❌ {args.path} is damaged:")
+            for problem in problems[:20]:
+                print(f"   {problem}")
+            sys.exit(1)
+        print(f"✅ {args.path} is intact")
+
+    elif args.command == "restore":
+        try:
+            previous = restore(args.path, database, progress=_progress)
+        except Exception as e:
+            print(f"\n❌ Restore failed: {e}")
+            sys.exit(1)
+        print(f"\r✅ Restored {database} from {args.path}")
+        if previous is not None:
+            print(f"   The replaced database is in {previous}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Cold-start benchmark for the API.
+
+Every run starts a fresh interpreter (so nothing is cached in sys.modules) and
+measures three phases of bringing up a worker:
+
+    import    - `import main` (module imports + app/route construction)
+    startup   - running the lifespan startup (table creation, warm-up)
+    first     - serving the first request (GET /health)
+
+Usage (from the back/ directory):
+    python benchmarks/cold_start.py                 # 5 runs, summary table
+    python benchmarks/cold_start.py --runs 20
+    python benchmarks/cold_start.py --profile       # slowest imports of main
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACK_DIR = Path(__file__).resolve().parent.parent
+
+# Runs inside the child interpreter; prints one JSON line with the timings
+_CHILD_SCRIPT = r"""
+import json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(main.app)
+client.__enter__()
+t2 = time.perf_counter()
+response = client.get("/health")
+t3 = time.perf_counter()
+assert response.status_code == 200, response.text
+client.__exit__(None, None, None)
+print(json.dumps({"import": t1 - t0, "startup": t2 - t1, "first": t3 - t2}))
+"""
+
+
+def _child_env(db_dir: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{db_dir}/cold_start.db")
+    env.setdefault("SECRET_KEY", "cold-start-benchmark")
+    return env
+
+
+def run_once(env: dict) -> dict:
+    """Start one fresh interpreter and return its phase timings in seconds"""
+    result = subprocess.run(
+        [sys.executable, "-c", _CHILD_SCRIPT],
+        cwd=BACK_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    # Lifespan prints come first; the timings are always the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def profile_imports(env: dict, top: int) -> None:
+    """Print the modules with the largest cumulative import time under `import main`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACK_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # Format: "import time:   self_us | cumulative_us | <indent>module"
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name))
+
+    # Only report top-level packages so nested modules don't drown the table
+    seen = set()
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True):
+        package = name.strip().split(".")[0]
+        if package in seen:
+            continue
+        seen.add(package)
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {name.strip()}")
+        if len(seen) >= top:
+            break
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="number of fresh interpreters to start")
+    parser.add_argument("--profile", action="store_true", help="show the slowest imports instead of timing runs")
+    parser.add_argument("--top", type=int, default=15, help="rows to show with --profile")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as db_dir:
+        env = _child_env(db_dir)
+        if args.profile:
+            profile_imports(env, args.top)
+            return
+
+        runs = [run_once(env) for _ in range(args.runs)]
+
+    print(f"{'phase':<10} {'median ms':>10} {'min ms':>10} {'max ms':>10}")
+    for phase in ("import", "startup", "first"):
+        values = [run[phase] * 1000 for run in runs]
+        print(f"{phase:<10} {statistics.median(values):10.1f} {min(values):10.1f} {max(values):10.1f}")
+    totals = [sum(run.values()) * 1000 for run in runs]
+    print(f"{'total':<10} {statistics.median(totals):10.1f} {min(totals):10.1f} {max(totals):10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Insert/lookup benchmark for primary-key layouts on SQLite.
+
+    uuid4/text    - random UUID strings (the old BaseModel default)
+    uuid7/text    - time-ordered UUID strings (new default)
+    uuid7/binary  - time-ordered UUIDs stored as 16 bytes (ID_STORAGE=binary)
+
+Each layout gets a fresh database file with a product-like table (text primary
+key plus an indexed foreign-key column of the same type), rows are inserted in
+committed batches, then random ids are looked up.
+
+Usage (from the back/ directory):
+    python benchmarks/id_layouts.py
+    python benchmarks/id_layouts.py --rows 1000000 --batch 5000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("SECRET_KEY", "id-layout-benchmark")
+
+from models.base import uuid7
+
+LAYOUTS = {
+    "uuid4/text": (lambda: str(uuid4()), "TEXT"),
+    "uuid7/text": (lambda: str(uuid7()), "TEXT"),
+    "uuid7/binary": (lambda: uuid7().bytes, "BLOB"),
+}
+
+
+def run_layout(path: str, make_id, column_type: str, rows: int, batch: int, lookups: int) -> dict:
+    conn = sqlite3.connect(path)
+    conn.execute(
+        f"CREATE TABLE product (id {column_type} PRIMARY KEY NOT NULL, name TEXT NOT NULL, "
+        f"price REAL NOT NULL, company_id {column_type})"
+    )
+    conn.execute("CREATE INDEX ix_product_company_id ON product (company_id)")
+    companies = [make_id() for _ in range(1000)]
+
+    ids = []
+    start = time.perf_counter()
+    for offset in range(0, rows, batch):
+        chunk = [(make_id(), f"product {i}", 9.99, companies[i % len(companies)])
+                 for i in range(offset, min(offset + batch, rows))]
+        ids.extend(row[0] for row in chunk)
+        conn.executemany("INSERT INTO product VALUES (?, ?, ?, ?)", chunk)
+        conn.commit()
+    insert_seconds = time.perf_counter() - start
+
+    sample = random.sample(ids, min(lookups, len(ids)))
+    start = time.perf_counter()
+    for product_id in sample:
+        conn.execute("SELECT name, price FROM product WHERE id = ?", (product_id,)).fetchone()
+    lookup_seconds = time.perf_counter() - start
+
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    conn.close()
+    return {
+        "insert_rows_per_s": rows / insert_seconds,
+        "lookup_us": lookup_seconds / len(sample) * 1e6,
+        "size_mb": page_size * pages / 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{args.rows} rows, batches of {args.batch}")
+    print(f"{'layout':<14} {'inserts/s':>12} {'lookup us':>10} {'db MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (make_id, column_type) in LAYOUTS.items():
+            path = os.path.join(tmp, name.replace("/", "_") + ".db")
+            result = run_layout(path, make_id, column_type, args.rows, args.batch, args.lookups)
+            print(f"{name:<14} {result['insert_rows_per_s']:>12,.0f} {result['lookup_us']:>10.1f} {result['size_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Time and memory of a product list response: ORM instances vs read projections.
+
+    orm         - select(Product), validate into ProductDetail, dump, FastJSONResponse (the old path)
+    projection  - the schema's columns as __slots__ records, FastJSONResponse (db/projections.py)
+
+Rows come from a temporary SQLite file, through a new session per response
+as in a request. Memory is the peak traced allocation while one response is
+built.
+
+Usage (from the back/ directory):
+    python benchmarks/read_projections.py
+    python benchmarks/read_projections.py --sizes 100 1000 10000 --repeat 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("SECRET_KEY", "read-projections-benchmark")
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, create_engine, select
+
+import db.soft_delete  # noqa: F401  (the default filter runs on both paths, as in the app)
+from core.responses import FastJSONResponse, orjson
+from db.projections import product_rows
+from models.product import Product, ProductDetail
+
+
+def fill(engine, count: int) -> None:
+    SQLModel.metadata.create_all(engine)
+    rows = [
+        {
+            "id": f"00000000-0000-7000-8000-{i:012d}",
+            "name": f"Disposable syringe 5ml pack {i}",
+            "description": "Sterile, single use, latex free. Box of 100 units." * 2,
+            "price": 12.5 + i % 40,
+            "stock_quantity": i % 500,
+            "is_active": True,
+            "limit": 10,
+            "owner_id": str(i % 37),
+            "version": 1,
+            "created_at": datetime(2025, 1, 1),
+            "updated_at": datetime(2025, 1, 1),
+        }
+        for i in range(count)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(Product.__table__), rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Built once, like FastAPI does per route at startup
+    adapter = TypeAdapter(List[ProductDetail])
+
+    def orm(engine, size):
+        with Session(engine) as session:
+            products = session.exec(select(Product).order_by(Product.id.desc()).limit(size)).all()
+            content = adapter.dump_python(adapter.validate_python(products, from_attributes=True), mode="json")
+            return FastJSONResponse({"items": content, "next_cursor": None}).body
+
+    def projection(engine, size):
+        with Session(engine) as session:
+            rows = session.exec(product_rows.select().order_by(Product.id.desc()).limit(size))
+            return FastJSONResponse({"items": product_rows.records(rows), "next_cursor": None}).body
+
+    print(f"orjson installed: {orjson is not None}")
+    print(f"{'items':>6} {'orm ms':>10} {'proj ms':>10} {'speedup':>8} {'orm KiB':>10} {'proj KiB':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            engine = create_engine(f"sqlite:///{directory}/bench-{size}.db")
+            fill(engine, size)
+            assert orm(engine, size) == projection(engine, size), "the two paths must produce the same JSON"
+
+            timings, peaks = [], []
+            for fn in (orm, projection):
+                seconds = min(timeit.repeat(lambda: fn(engine, size), number=args.repeat, repeat=3)) / args.repeat
+                tracemalloc.start()
+                fn(engine, size)
+                peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+                tracemalloc.stop()
+                timings.append(seconds * 1000)
+            engine.dispose()
+            print(f"{size:>6} {timings[0]:>10.2f} {timings[1]:>10.2f} {timings[0] / timings[1]:>7.1f}x "
+                  f"{peaks[0]:>10.0f} {peaks[1]:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Per-response serialization cost for product lists.
+
+Compares the ways a list response can be turned into bytes:
+
+    jsonable_encoder   - untyped route returning ORM objects (the old path)
+    model+json         - response_model validation, stdlib JSONResponse
+    model+fast         - response_model validation, FastJSONResponse (the app default)
+
+Usage (from the back/ directory):
+    python benchmarks/serialization.py
+    python benchmarks/serialization.py --sizes 10 100 1000 --repeat 50
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("SECRET_KEY", "serialization-benchmark")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from core.responses import FastJSONResponse, orjson
+from models.product import Product, ProductRead
+
+
+def make_products(count: int) -> List[Product]:
+    return [
+        Product(
+            id=f"00000000-0000-0000-0000-{i:012d}",
+            name=f"Disposable syringe 5ml pack {i}",
+            description="Sterile, single use, latex free. Box of 100 units." * 2,
+            price=12.5 + i % 40,
+            stock_quantity=i % 500,
+            is_active=True,
+            owner_id=str(i % 37),
+            company_id=None,
+            created_at=datetime(2025, 1, 1),
+        )
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    # Built once, like FastAPI does per route at startup
+    adapter = TypeAdapter(List[ProductRead])
+
+    def untyped(products):
+        return JSONResponse(jsonable_encoder(products)).body
+
+    def model_json(products):
+        content = adapter.dump_python(adapter.validate_python(products, from_attributes=True), mode="json")
+        return JSONResponse(content).body
+
+    def model_fast(products):
+        content = adapter.dump_python(adapter.validate_python(products, from_attributes=True), mode="json")
+        return FastJSONResponse(content).body
+
+    print(f"orjson installed: {orjson is not None}")
+    print(f"{'items':>6} {'jsonable_encoder':>18} {'model+json':>12} {'model+fast':>12}   (ms per response)")
+    for size in args.sizes:
+        products = make_products(size)
+        row = []
+        for fn in (untyped, model_json, model_fast):
+            seconds = min(timeit.repeat(lambda: fn(products), number=args.repeat, repeat=3)) / args.repeat
+            row.append(seconds * 1000)
+        print(f"{size:>6} {row[0]:>18.3f} {row[1]:>12.3f} {row[2]:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# build_frontend.py
+"""
+Builds the frontend for production serving (see core/static.py).
+
+    python build_frontend.py                 # front/ -> build/front/
+    python build_frontend.py --out /srv/front
+
+Steps:
+  1. Every file under assets/ is copied under a content-hashed name
+     (assets/css/main.css -> assets/css/main.3f9c2b1a0d.css). Images are hashed
+     first, then CSS/JS after their image references are rewritten, so a
+     changed image also changes the hash of the stylesheet that uses it.
+  2. HTML pages keep their names; their /front/assets/... references are
+     rewritten to the hashed names.
+  3. Text files (HTML/CSS/JS/SVG/JSON) get .gz and, when the `brotli` package
+     is installed, .br siblings, written only when they are actually smaller.
+  4. manifest.json maps original asset paths to hashed ones.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Dict
+from urllib.parse import quote
+
+from core.config import FRONTEND_DIR, FRONTEND_BUILD_DIR
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+URL_PREFIX = "/front/"
+TEXT_SUFFIXES = {".html", ".css", ".js", ".svg", ".json", ".txt", ".xml"}
+# Files that reference other assets and therefore need rewriting before hashing
+REWRITE_SUFFIXES = {".html", ".css", ".js"}
+# Only write a compressed variant if it saves at least this fraction
+MIN_SAVING = 0.1
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def hashed_name(relpath: str, data: bytes) -> str:
+    stem, ext = os.path.splitext(relpath)
+    return f"{stem}.{content_hash(data)}{ext}"
+
+
+def rewrite_references(text: str, manifest: Dict[str, str]) -> str:
+    """Replace /front/<asset> references (raw or %-encoded) with their hashed names"""
+    # Longest paths first so assets/js/a.js can't clobber assets/js/a.js.map
+    for original in sorted(manifest, key=len, reverse=True):
+        hashed = manifest[original]
+        text = text.replace(URL_PREFIX + original, URL_PREFIX + hashed)
+        encoded = quote(original)
+        if encoded != original:
+            text = text.replace(URL_PREFIX + encoded, URL_PREFIX + quote(hashed))
+    return text
+
+
+def write_compressed(path: Path, data: bytes) -> int:
+    """Write .gz/.br siblings of `path` if they are worth it; return how many were written"""
+    written = 0
+    variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(data, quality=11)))
+    for suffix, compressed in variants:
+        if len(compressed) <= len(data) * (1 - MIN_SAVING):
+            path.with_name(path.name + suffix).write_bytes(compressed)
+            written += 1
+    return written
+
+
+def build(src: Path, out: Path) -> None:
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True)
+
+    files = sorted(p for p in src.rglob("*") if p.is_file())
+    assets = [p for p in files if p.relative_to(src).parts[0] == "assets"]
+    pages = [p for p in files if p not in assets]
+
+    manifest: Dict[str, str] = {}
+    # Binary assets first, then the text assets that may reference them
+    for path in sorted(assets, key=lambda p: p.suffix in REWRITE_SUFFIXES):
+        relpath = path.relative_to(src).as_posix()
+        data = path.read_bytes()
+        if path.suffix in REWRITE_SUFFIXES:
+            data = rewrite_references(data.decode("utf-8"), manifest).encode("utf-8")
+        manifest[relpath] = hashed_name(relpath, data)
+        target = out / manifest[relpath]
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+
+    for path in pages:
+        relpath = path.relative_to(src).as_posix()
+        data = path.read_bytes()
+        if path.suffix in REWRITE_SUFFIXES:
+            data = rewrite_references(data.decode("utf-8"), manifest).encode("utf-8")
+        target = out / relpath
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+
+    compressed = 0
+    original_bytes = 0
+    for path in out.rglob("*"):
+        if path.is_file() and path.suffix in TEXT_SUFFIXES:
+            data = path.read_bytes()
+            original_bytes += len(data)
+            compressed += write_compressed(path, data)
+
+    (out / "manifest.json").write_text(json.dumps(manifest, indent=2, sort_keys=True))
+
+    print(f"✅ Built {len(files)} files into {out}")
+    print(f"   {len(manifest)} hashed assets, {compressed} compressed variants of {original_bytes / 1024:.0f} KB of text")
+    if brotli is None:
+        print("   (install 'brotli' to also produce .br files)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the frontend with hashed, precompressed assets.")
+    parser.add_argument("--src", type=Path, default=FRONTEND_DIR)
+    parser.add_argument("--out", type=Path, default=FRONTEND_BUILD_DIR)
+    args = parser.parse_args()
+
+    if not args.src.is_dir():
+        sys.exit(f"Frontend source directory not found: {args.src}")
+    build(args.src.resolve(), args.out.resolve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# build_similarity.py
+"""
+Precomputes "related products" (see services/similarity.py).
+
+    python build_similarity.py                  # all active products
+    python build_similarity.py --incremental    # only products changed since the last run
+    python build_similarity.py -k 20
+
+Run the full build nightly and the incremental one every few minutes (cron or
+a scheduler); the API serves whatever was stored last. Needs numpy and scipy.
+"""
+import argparse
+
+from db.session import engine, create_db_and_tables
+from services.similarity import rebuild
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Precompute related products with TF-IDF similarity.")
+    parser.add_argument("-k", type=int, default=10, help="neighbours stored per product")
+    parser.add_argument("--incremental", action="store_true", help="only products changed since the last run")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    updated = rebuild(engine, k=args.k, incremental=args.incremental)
+    if not updated:
+        print("Nothing to update.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+# check_stock.py
+"""
+Evaluates low-stock alerts and emails the digests (see services/stock_alerts.py).
+
+    python check_stock.py                 # products changed since the last run
+    python check_stock.py --full          # every product (first run, or after a restore)
+    python check_stock.py --every 60      # keep running, once a minute
+    python check_stock.py --no-deliver    # record alerts without sending email
+
+Run it from cron or a scheduler, once for the whole deployment (not per worker).
+"""
+import argparse
+import time
+
+from db.session import engine, create_db_and_tables
+from services.stock_alerts import run
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Raise and deliver low-stock alerts.")
+    parser.add_argument("--full", action="store_true", help="evaluate every product, not only changed ones")
+    parser.add_argument("--every", type=float, default=0, help="repeat every N seconds")
+    parser.add_argument("--no-deliver", action="store_true", help="don't send the digest emails")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    run(engine, full=args.full, send=not args.no_deliver)
+    while args.every > 0:
+        time.sleep(args.every)
+        run(engine, send=not args.no_deliver)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+"""
+Single-flight request coalescing.
+
+When a hot read (a popular product page, the first catalog page) is requested
+by many clients at once, every request would otherwise run the same query.
+With SingleFlight.do(), the first caller for a key runs the query and the
+callers that arrive while it is in flight wait for it and share its result
+(or its exception). Nothing is kept once the flight lands: this deduplicates
+concurrent work, it is not a cache.
+
+The shared result goes to several requests, so `fn` must return plain data or
+detached schema objects (ProductRead, ...), never ORM objects bound to the
+leader's session, and callers must not mutate it.
+
+A client that has just written (the read-your-writes cookie, see
+core/consistency.py) could join a flight that started before its write landed
+and get the old data back; get_read_session marks its session with
+FRESH_READ, query_key() then returns None and do() runs the query alone.
+
+Usage Example:
+    product_reads = SingleFlight("products.detail")
+
+    def read_product(product_id: str, session: Session = Depends(get_read_session)):
+        return product_reads.do(query_key(session, product_id), lambda: load(session, product_id))
+"""
+
+
+# session.info key: this session's reads must not share a flight
+FRESH_READ = "fresh_read"
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        # calls = executed + coalesced
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.errors = 0
+        _registry[name] = self
+
+    def do(self, key: Optional[Hashable], fn: Callable[[], Any]) -> Any:
+        """Run fn() for `key`, or wait for the identical call already in flight and share its outcome"""
+        if key is None:
+            with self._lock:
+                self.calls += 1
+                self.executed += 1
+            return fn()
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            # Later callers start a fresh flight and see newer data
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "in_flight": len(self._flights),
+            }
+
+
+_registry: Dict[str, SingleFlight] = {}
+
+
+def query_key(session, *parts) -> Optional[tuple]:
+    """Flight key for a query: identical parts on the same database (primary vs replica); None to run alone"""
+    if session.info.get(FRESH_READ):
+        return None
+    # .engine: the bind may also be a Connection (sessions joined to an outer transaction)
+    return (str(session.get_bind().engine.url), *parts)
+
+
+def coalescing_stats() -> Dict[str, Dict[str, int]]:
+    """Counters for every SingleFlight, for the /metrics endpoint"""
+    return {name: flight.stats() for name, flight in _registry.items()}
@@ -0,0 +1,24 @@
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import Receive, Scope, Send
+
+"""
+Negotiated gzip for API responses. Only bodies of at least `minimum_size`
+bytes are compressed (tiny JSON isn't worth the CPU), and media that is already
+compressed is passed through untouched.
+"""
+
+# Already-compressed formats: gzip would burn CPU for no size benefit
+_SKIP_SUFFIXES = (
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".avif", ".ico",
+    ".woff", ".woff2", ".gz", ".br", ".zip", ".pdf", ".mp4",
+)
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that skips requests for already-compressed files"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].lower().endswith(_SKIP_SUFFIXES):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
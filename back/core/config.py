@@ -3,16 +3,259 @@
 # back/core/config.py
 import os
 import secrets
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+"""
+Application settings. Everything is read once, at import time, from the
+process environment with back/.env as a fallback, so every worker process
+started from the same deployment sees the same values.
+"""
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Real environment variables always win over values from the .env file
+load_dotenv(BASE_DIR / ".env", override=False)
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    """Read a boolean flag such as DB_ECHO=1 / DB_ECHO=false"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _load_secret_key() -> str:
+    """
+    Return SECRET_KEY from the environment/.env, or fall back to a key persisted
+    in SECRET_KEY_FILE. A per-process random key would make tokens issued by one
+    worker invalid on every other worker, so the fallback is shared on disk.
+    """
+    key = os.getenv("SECRET_KEY")
+    if key:
+        return key
+
+    key_file = Path(os.getenv("SECRET_KEY_FILE", BASE_DIR / ".secret_key"))
+    if key_file.exists():
+        return key_file.read_text().strip()
+
+    # Write to a temp file and hard-link it into place: the link fails if another
+    # worker created the key first, in which case we use theirs.
+    tmp_file = key_file.with_name(f"{key_file.name}.{os.getpid()}.tmp")
+    tmp_file.write_text(secrets.token_urlsafe(32))
+    os.chmod(tmp_file, 0o600)
+    try:
+        os.link(tmp_file, key_file)
+    except FileExistsError:
+        pass
+    finally:
+        tmp_file.unlink()
+    return key_file.read_text().strip()
+
 
 # -----------------------
 # SECURITY CONFIG
 # -----------------------
 
-# Use environment variable if available, otherwise generate a secure fallback
-SECRET_KEY = os.getenv("SECRET_KEY", secrets.token_urlsafe(32))
+SECRET_KEY = _load_secret_key()
 
 # JWT algorithm
 ALGORITHM = "HS256"
 
 # Token expiry duration (in minutes)
-ACCESS_TOKEN_EXPIRE_MINUTES = 60  # you can change this if needed
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+
+# -----------------------
+# DATABASE CONFIG
+# -----------------------
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///database.db")
+
+# Logging every statement is useful while debugging but costs time on every query
+DB_ECHO = _env_bool("DB_ECHO", False)
+
+# -----------------------
+# SERVER CONFIG
+# -----------------------
+
+# Worker processes started by serve.py (0 = size to the machine's CPU cores)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "0"))
+
+# Seconds to wait for in-flight requests to finish after SIGTERM before closing them
+GRACEFUL_SHUTDOWN_TIMEOUT = int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "30"))
+
+# -----------------------
+# RATE LIMITING
+# -----------------------
+
+RATE_LIMIT_ENABLED = _env_bool("RATE_LIMIT_ENABLED", True)
+
+# memory:// keeps buckets per worker; redis://... shares them between workers/hosts
+RATE_LIMIT_STORAGE_URL = os.getenv("RATE_LIMIT_STORAGE_URL", "memory://")
+
+# Limits are "<count>/<second|minute|hour|day>"
+LOGIN_RATE_LIMIT_IP = os.getenv("LOGIN_RATE_LIMIT_IP", "10/minute")
+LOGIN_RATE_LIMIT_ACCOUNT = os.getenv("LOGIN_RATE_LIMIT_ACCOUNT", "5/minute")
+LOGIN_RATE_LIMIT_ROUTE = os.getenv("LOGIN_RATE_LIMIT_ROUTE", "20/second")
+SIGNUP_RATE_LIMIT_IP = os.getenv("SIGNUP_RATE_LIMIT_IP", "5/minute")
+SIGNUP_RATE_LIMIT_ROUTE = os.getenv("SIGNUP_RATE_LIMIT_ROUTE", "10/second")
+
+# -----------------------
+# COMPRESSION & STATIC FILES
+# -----------------------
+
+# Responses smaller than this are sent uncompressed
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+# 1-9; 6 is most of the size win of 9 for a fraction of the CPU
+GZIP_COMPRESS_LEVEL = int(os.getenv("GZIP_COMPRESS_LEVEL", "6"))
+
+# Frontend served under /front: the output of build_frontend.py when it exists,
+# otherwise the raw sources
+FRONTEND_DIR = Path(os.getenv("FRONTEND_DIR", BASE_DIR.parent / "front"))
+FRONTEND_BUILD_DIR = Path(os.getenv("FRONTEND_BUILD_DIR", BASE_DIR / "build" / "front"))
+SERVE_FRONTEND = _env_bool("SERVE_FRONTEND", True)
+
+# Browser cache lifetime (seconds) for static files without a content hash in the name
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "3600"))
+
+# -----------------------
+# PRIMARY KEYS
+# -----------------------
+
+# How BaseModel ids are stored: "text" (36-char UUID strings) or "binary" (16 bytes).
+# Changing this on an existing database requires `python migrate_ids.py` first.
+ID_STORAGE = os.getenv("ID_STORAGE", "text").strip().lower()
+
+# -----------------------
+# BULK OPERATIONS
+# -----------------------
+
+# Upper bound on rows per bulk request, keeps a single transaction short
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "1000"))
+# POST /users/bulk-create: users inserted per transaction...
+PROVISION_CHUNK_SIZE = int(os.getenv("PROVISION_CHUNK_SIZE", "250"))
+# ...and threads hashing their passwords (bcrypt releases the GIL)
+PROVISION_HASH_WORKERS = int(os.getenv("PROVISION_HASH_WORKERS", str(os.cpu_count() or 4)))
+
+# -----------------------
+# SQLITE WRITES
+# -----------------------
+
+# WAL lets readers proceed while a write is in progress; "" leaves the file's mode alone
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "wal").strip().lower()
+# Seconds a connection waits for another writer's lock before "database is locked"
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "15"))
+
+# Funnel writes through one writer thread that group-commits queued requests (db/write_queue.py)
+WRITE_QUEUE_ENABLED = _env_bool("WRITE_QUEUE_ENABLED", False)
+# Most requests committed together in one transaction
+WRITE_QUEUE_MAX_BATCH = int(os.getenv("WRITE_QUEUE_MAX_BATCH", "64"))
+# How long the writer waits for more requests before committing a partial batch (0 = only what is queued)
+WRITE_QUEUE_MAX_WAIT_MS = float(os.getenv("WRITE_QUEUE_MAX_WAIT_MS", "0"))
+
+# -----------------------
+# READ REPLICAS
+# -----------------------
+
+# Comma-separated replica URLs that read-only routes use (get_read_session).
+# "local" is a stand-in for dev/tests: a copy of the SQLite primary refreshed
+# every REPLICA_REFRESH_SECONDS (0 = only when refreshed explicitly).
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_REFRESH_SECONDS = float(os.getenv("REPLICA_REFRESH_SECONDS", "5"))
+
+# After a write, the same client reads from the primary for this many seconds
+# (longer than the worst replication lag you expect)
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+
+# -----------------------
+# AUTOCOMPLETE
+# -----------------------
+
+# In-memory type-ahead index over product and company names (services/autocomplete.py)
+AUTOCOMPLETE_ENABLED = _env_bool("AUTOCOMPLETE_ENABLED", True)
+# Full rebuild interval; also how long other workers' writes take to show up (0 = never)
+AUTOCOMPLETE_REFRESH_SECONDS = float(os.getenv("AUTOCOMPLETE_REFRESH_SECONDS", "60"))
+
+# -----------------------
+# CHANGE FEED
+# -----------------------
+
+# memory:// delivers within one worker; redis://... to the subscribers of every worker/host
+CHANGE_FEED_BROKER_URL = os.getenv("CHANGE_FEED_BROKER_URL", "memory://")
+# Events buffered per subscriber; one that falls further behind is sent "reset" and disconnected
+CHANGE_FEED_QUEUE_SIZE = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", "256"))
+# Recent events kept for clients reconnecting with Last-Event-ID
+CHANGE_FEED_REPLAY_SIZE = int(os.getenv("CHANGE_FEED_REPLAY_SIZE", "1024"))
+# Comment line sent on idle streams so proxies don't close them
+CHANGE_FEED_HEARTBEAT_SECONDS = float(os.getenv("CHANGE_FEED_HEARTBEAT_SECONDS", "15"))
+# Products plus companies one subscription may watch
+CHANGE_FEED_MAX_FILTERS = int(os.getenv("CHANGE_FEED_MAX_FILTERS", "100"))
+
+# -----------------------
+# EMAIL
+# -----------------------
+
+# Without SMTP_HOST, outgoing mail is printed and kept in services.emails.outbox
+SMTP_HOST = os.getenv("SMTP_HOST", "")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME", "")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+SMTP_USE_TLS = _env_bool("SMTP_USE_TLS", True)
+EMAIL_FROM = os.getenv("EMAIL_FROM", "alerts@medcore.local")
+
+# -----------------------
+# STOCK ALERTS
+# -----------------------
+
+# Low-stock level for distributors who haven't set their own (check_stock.py)
+LOW_STOCK_DEFAULT_THRESHOLD = int(os.getenv("LOW_STOCK_DEFAULT_THRESHOLD", "10"))
+# Products listed in one digest email; the rest are summarised as a count
+LOW_STOCK_DIGEST_MAX_ITEMS = int(os.getenv("LOW_STOCK_DIGEST_MAX_ITEMS", "200"))
+
+# -----------------------
+# AUDIT LOG
+# -----------------------
+
+# Record inserts/updates/deletes of products, companies, users and thresholds (services/audit.py)
+AUDIT_ENABLED = _env_bool("AUDIT_ENABLED", True)
+# Buffered entries are written at least this often...
+AUDIT_FLUSH_SECONDS = float(os.getenv("AUDIT_FLUSH_SECONDS", "1"))
+# ...or as soon as this many are waiting
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+
+# -----------------------
+# SOFT DELETE
+# -----------------------
+
+# Deleted products and users stay (hidden) this long before purge_deleted.py archives them
+SOFT_DELETE_RETENTION_DAYS = float(os.getenv("SOFT_DELETE_RETENTION_DAYS", "30"))
+# Rows moved per purge transaction; keeps each write lock short
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "1000"))
+
+# -----------------------
+# BACKUPS
+# -----------------------
+
+# Where backup_db.py writes its snapshots, and how many it keeps there
+BACKUP_DIR = Path(os.getenv("BACKUP_DIR", BASE_DIR / "backups"))
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "7"))
+# Pages copied per step of the online backup (4 KiB each by default)...
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "1024"))
+# ...and the pause between steps, which leaves the disk to the app's own queries
+BACKUP_STEP_SLEEP_MS = float(os.getenv("BACKUP_STEP_SLEEP_MS", "10"))
+
+# -----------------------
+# PROFILING
+# -----------------------
+
+# Requests sent with "X-Profile: <PROFILE_TOKEN>" are profiled (empty = header off). Give it to admins only.
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+# Fraction of all requests profiled at random (0 = none). With both off the middleware isn't installed.
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# How often a profiled request's threads are sampled
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+# Where profiles are kept for download (GET /profiles/), newest PROFILE_KEEP only
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", BASE_DIR / "profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "200"))
@@ -0,0 +1,53 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import READ_YOUR_WRITES_SECONDS
+
+"""
+Read-your-writes for replica reads.
+
+Replicas lag the primary, so a client that has just created or edited
+something could read the old state back from a replica. After any successful
+mutating request, ReadYourWritesMiddleware sets a short-lived cookie holding
+the time until which that client should read from the primary;
+get_read_session (db/session.py) checks it with wrote_recently(). The cookie
+is the client's own state, so stickiness works whichever worker or host
+serves the next request.
+"""
+
+COOKIE_NAME = "db_primary_until"
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class ReadYourWritesMiddleware:
+    def __init__(self, app: ASGIApp, window: int = READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in _SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = int(time.time()) + self.window
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{COOKIE_NAME}={until}; Max-Age={self.window}; Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+def wrote_recently(request: Request) -> bool:
+    """Whether this client made a write recently enough that replicas may not have it yet"""
+    try:
+        return int(request.cookies.get(COOKIE_NAME, 0)) > time.time()
+    except ValueError:
+        return False
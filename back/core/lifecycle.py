@@ -0,0 +1,88 @@
+import asyncio
+import inspect
+import signal
+import threading
+from typing import Any, Callable, List
+
+"""
+Shutdown hook registry. Subsystems that buffer work in memory (background
+queues, batch writers, ...) register a hook here so the app lifespan can drain
+them after the server has stopped accepting requests and finished the ones in
+flight, and before the database engine is disposed.
+
+Those hooks run after the server's graceful drain, which waits for every open
+request. Long-lived responses (SSE streams) have to end before that, so they
+register an on_drain() hook instead: it runs on the event loop as soon as the
+server receives SIGINT/SIGTERM, before the drain starts.
+"""
+
+_shutdown_hooks: List[Callable[[], Any]] = []
+_drain_hooks: List[Callable[[], None]] = []
+
+
+def on_shutdown(hook: Callable[[], Any], last: bool = False) -> Callable[[], Any]:
+    """
+    Register a sync or async callable to run on shutdown (usable as a decorator).
+    `last` runs it after every other hook, for sinks the others still feed while
+    they drain (e.g. the audit writer, fed by the write queue's final batch).
+    """
+    if hook not in _shutdown_hooks:
+        if last:
+            _shutdown_hooks.insert(0, hook)
+        else:
+            _shutdown_hooks.append(hook)
+    return hook
+
+
+async def run_shutdown_hooks() -> None:
+    """Run registered hooks, most recently registered first; one failure doesn't stop the rest"""
+    for hook in reversed(_shutdown_hooks):
+        name = getattr(hook, "__qualname__", repr(hook))
+        try:
+            if inspect.iscoroutinefunction(hook):
+                await hook()
+            else:
+                # Hooks may block while flushing, keep the event loop free
+                await asyncio.to_thread(hook)
+        except Exception as e:
+            print(f"Shutdown hook {name} failed: {e}")
+
+
+# --- Shutdown signal ---
+
+def on_drain(hook: Callable[[], None]) -> Callable[[], None]:
+    """Register a sync callable run on the event loop once a shutdown signal arrives (usable as a decorator)"""
+    if hook not in _drain_hooks:
+        _drain_hooks.append(hook)
+    return hook
+
+
+def run_drain_hooks() -> None:
+    for hook in list(_drain_hooks):
+        try:
+            hook()
+        except Exception as e:
+            print(f"Drain hook {getattr(hook, '__qualname__', repr(hook))} failed: {e}")
+
+
+def install_signal_hooks() -> None:
+    """
+    Chain the server's SIGINT/SIGTERM handlers so drain hooks run when shutdown
+    begins; called from the app lifespan, after the server installed its own.
+    Only from the main thread (signal handlers can't be set from others, e.g.
+    under TestClient), and only in front of a Python-level handler.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(sig)
+        if not callable(previous) or getattr(previous, "_runs_drain_hooks", False):
+            continue
+
+        def handler(signum, frame, previous=previous):
+            loop.call_soon_threadsafe(run_drain_hooks)
+            previous(signum, frame)
+
+        handler._runs_drain_hooks = True
+        signal.signal(sig, handler)
@@ -0,0 +1,245 @@
+import hmac
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import (
+    BASE_DIR, PROFILE_TOKEN, PROFILE_SAMPLE_RATE, PROFILE_INTERVAL_MS, PROFILE_DIR, PROFILE_KEEP,
+)
+
+"""
+On-demand profiling of single requests in a running deployment.
+
+A request is profiled when it carries "X-Profile: <PROFILE_TOKEN>" or is
+picked at random (PROFILE_SAMPLE_RATE). While it runs, a sampler thread
+records the stacks of the threads working on it every PROFILE_INTERVAL_MS:
+the event loop thread that received it, and every thread that runs a query
+for it (sync routes and dependencies in the threadpool, the write queue's
+writer), found through engine events. The same events add up the time spent
+in the database.
+
+The result is saved as folded stacks ("frame;frame;frame count" lines), which
+flamegraph.pl, speedscope and inferno read as they are, with a JSON summary
+next to it. Admins list and download them through /profiles; the response of
+a profiled request names its profile in X-Profile-Id.
+
+Sampling is statistical: it costs one stack walk per interval while a
+profile runs, and nothing else. Requests that are not profiled pay for one
+header lookup. Other requests that the same threads serve meanwhile show up
+in the profile too, so profile on a quiet worker when precision matters.
+"""
+
+HEADER = b"x-profile"
+ID_HEADER = b"x-profile-id"
+# A stream (e.g. /products/changes) would otherwise be sampled until it closes
+MAX_SECONDS = 60
+
+_PROFILE_ID = re.compile(r"^\d{8}T\d{12}-[0-9a-f]{8}$")
+
+_active: ContextVar[Optional["Profile"]] = ContextVar("profile", default=None)
+_labels: Dict[object, str] = {}
+
+
+def _short(filename: str) -> str:
+    if filename.startswith(str(BASE_DIR)):
+        return filename[len(str(BASE_DIR)) + 1:]
+    marker = "site-packages/"
+    at = filename.rfind(marker)
+    return filename[at + len(marker):] if at >= 0 else Path(filename).name
+
+
+def _label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        label = _labels[code] = f"{code.co_name} ({_short(code.co_filename)}:{code.co_firstlineno})"
+    return label
+
+
+def _fold(thread_name: str, frame) -> str:
+    stack = []
+    while frame is not None:
+        stack.append(_label(frame.f_code))
+        frame = frame.f_back
+    stack.append(thread_name)
+    return ";".join(reversed(stack))
+
+
+class Profile:
+    def __init__(self, method: str, path: str, interval: float):
+        self.id = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{uuid4().hex[:8]}"
+        self.at = datetime.utcnow()
+        self.method = method
+        self.path = path
+        self.interval = interval
+        self.status: Optional[int] = None
+        self.seconds = 0.0
+        self.samples = 0
+        self.db_seconds = 0.0
+        self.queries = 0
+        self.stacks: Counter = Counter()
+        # ident -> name of the threads sampled for this request
+        self.threads: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._started = 0.0
+
+    def add_current_thread(self) -> None:
+        ident = threading.get_ident()
+        if ident not in self.threads:
+            self.threads[ident] = threading.current_thread().name
+
+    def start(self) -> None:
+        self.add_current_thread()
+        self._started = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._sampler.join()
+        self.seconds = time.perf_counter() - self._started
+
+    def _sample(self) -> None:
+        deadline = time.monotonic() + MAX_SECONDS
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            frames = sys._current_frames()
+            for ident, name in list(self.threads.items()):
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.stacks[_fold(name, frame)] += 1
+            self.samples += 1
+
+    def summary(self) -> Dict:
+        return {
+            "id": self.id,
+            "at": self.at.isoformat(),
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "seconds": round(self.seconds, 6),
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "db_seconds": round(self.db_seconds, 6),
+            "queries": self.queries,
+        }
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# --- Storage ---
+
+class ProfileStore:
+    def __init__(self, directory: Path, keep: int):
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def save(self, profile: Profile) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f"{profile.id}.folded").write_text(profile.folded())
+        (self.directory / f"{profile.id}.json").write_text(json.dumps(profile.summary()))
+        if self.keep > 0:
+            # Ids start with the time, so name order is age order
+            for old in sorted(self.directory.glob("*.json"))[:-self.keep]:
+                old.unlink(missing_ok=True)
+                old.with_suffix(".folded").unlink(missing_ok=True)
+
+    def list(self) -> List[Dict]:
+        """Summaries, newest first"""
+        if not self.directory.is_dir():
+            return []
+        summaries = []
+        for path in sorted(self.directory.glob("*.json"), reverse=True):
+            try:
+                summaries.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue  # Pruned or half-written meanwhile
+        return summaries
+
+    def folded_path(self, profile_id: str) -> Optional[Path]:
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = self.directory / f"{profile_id}.folded"
+        return path if path.is_file() else None
+
+
+profile_store = ProfileStore(PROFILE_DIR, PROFILE_KEEP)
+
+
+# --- Database time ---
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active.get()
+    if profile is not None:
+        # Whichever thread queries for a profiled request is working on it
+        profile.add_current_thread()
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active.get()
+    started = conn.info.get("profile_started")
+    if profile is not None and started:
+        profile.db_seconds += time.perf_counter() - started.pop()
+        profile.queries += 1
+
+
+def install(engine) -> None:
+    """Time the queries of profiled requests on `engine`"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --- Middleware ---
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp, token: str = PROFILE_TOKEN, sample_rate: float = PROFILE_SAMPLE_RATE,
+                 interval_ms: float = PROFILE_INTERVAL_MS, store: Optional[ProfileStore] = None):
+        self.app = app
+        self.token = token.encode()
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+        self.store = store or profile_store
+
+    def _wanted(self, scope: Scope) -> bool:
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == HEADER:
+                    return hmac.compare_digest(value, self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope["method"], scope["path"], self.interval)
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = [*message.get("headers", []), (ID_HEADER, profile.id.encode())]
+            await send(message)
+
+        token = _active.set(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.stop()
+            _active.reset(token)
+            # The response is out; writing the files doesn't hold up the event loop either
+            await run_in_threadpool(self.store.save, profile)
@@ -0,0 +1,170 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+
+from core.config import RATE_LIMIT_ENABLED, RATE_LIMIT_STORAGE_URL
+
+"""
+Token-bucket rate limiting.
+
+Each bucket holds up to `capacity` tokens and refills continuously at
+`capacity / period` tokens per second; a request spends one token or is
+rejected with 429 and a Retry-After header. Checks are plain dictionary (or
+Redis) operations, so an abusive client is refused before the request touches
+the database or spends a bcrypt verification.
+
+Buckets live in a store:
+    memory://           per-process store (default, and the local stand-in)
+    redis://host:6379/0 shared by every worker/host (needs the `redis` package)
+"""
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(rate: str) -> Tuple[float, float]:
+    """Parse "10/minute" into (capacity, refill rate in tokens per second)"""
+    try:
+        count, period = rate.split("/")
+        capacity = float(count)
+        seconds = _PERIODS[period.strip().lower().rstrip("s")]
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate limit {rate!r}, expected e.g. '10/minute'")
+    return capacity, capacity / seconds
+
+
+# --- Bucket stores ---
+
+class MemoryBucketStore:
+    """Buckets in a dict owned by this process; the oldest keys are evicted past max_keys"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: float, refill_rate: float) -> float:
+        """Take one token; return 0 if allowed, otherwise seconds until a token is available"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / refill_rate
+            # Re-inserting keeps the dict ordered by last use, so eviction drops idle keys
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                del self._buckets[next(iter(self._buckets))]
+        return wait
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+# Refill and spend atomically on the Redis server so concurrent workers can't both
+# take the last token. Keys expire once they would have refilled completely.
+_REDIS_CONSUME = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBucketStore:
+    """Buckets shared by every worker through Redis"""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_STORAGE_URL points at Redis but the 'redis' package is not installed")
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._consume = self._client.register_script(_REDIS_CONSUME)
+
+    def consume(self, key: str, capacity: float, refill_rate: float) -> float:
+        wait = self._consume(keys=[self.prefix + key], args=[capacity, refill_rate, time.time()])
+        return float(wait)
+
+    def reset(self) -> None:
+        for key in self._client.scan_iter(f"{self.prefix}*"):
+            self._client.delete(key)
+
+
+def create_store(url: str):
+    """Build the bucket store named by RATE_LIMIT_STORAGE_URL"""
+    if url.startswith("memory://"):
+        return MemoryBucketStore()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBucketStore(url)
+    raise ValueError(f"Unsupported RATE_LIMIT_STORAGE_URL {url!r}")
+
+
+# --- Limiter ---
+
+class RateLimiter:
+    def __init__(self, store, enabled: bool = True):
+        self.store = store
+        self.enabled = enabled
+        self._rates: Dict[str, Tuple[float, float]] = {}
+
+    def hit(self, key: str, rate: str) -> None:
+        """Spend one token from `key`'s bucket or raise 429 Too Many Requests"""
+        if not self.enabled:
+            return
+        parsed = self._rates.get(rate)
+        if parsed is None:
+            parsed = self._rates[rate] = parse_rate(rate)
+        capacity, refill_rate = parsed
+
+        wait = self.store.consume(key, capacity, refill_rate)
+        if wait > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please try again later.",
+                headers={"Retry-After": str(max(1, int(wait + 0.999)))},
+            )
+
+
+limiter = RateLimiter(create_store(RATE_LIMIT_STORAGE_URL), enabled=RATE_LIMIT_ENABLED)
+
+
+def client_ip(request: Request) -> str:
+    """Client address as seen by uvicorn (which already honours trusted proxy headers)"""
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(scope: str, per_ip: Optional[str] = None, per_route: Optional[str] = None):
+    """
+    Dependency factory enforcing a per-client-IP and/or a route-wide limit.
+    Put it in the route's `dependencies=[...]` so it runs before the handler.
+
+    Usage Example:
+    @router.post("/login", dependencies=[rate_limit("auth.login", per_ip="10/minute")])
+    """
+    def checker(request: Request):
+        # Per-IP first so one abusive client can't drain the route-wide bucket
+        if per_ip:
+            limiter.hit(f"{scope}:ip:{client_ip(request)}", per_ip)
+        if per_route:
+            limiter.hit(f"{scope}:route", per_route)
+
+    return Depends(checker)
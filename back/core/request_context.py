@@ -0,0 +1,49 @@
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+"""
+Per-request facts that code far from the route needs, such as who is acting
+(for the audit log, services/audit.py).
+
+RequestContextMiddleware gives each request a fresh dict in a context
+variable. Sync dependencies and routes run in worker threads with a copy of
+the request's context, and the write queue runs each write in a copy too;
+they all share the same dict, so set_actor() in get_current_user is visible to
+the route and to the writes it submits.
+"""
+
+_context: ContextVar[Optional[Dict[str, Any]]] = ContextVar("request_context", default=None)
+
+
+class RequestContextMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _context.set({"method": scope["method"], "path": scope["path"]})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _context.reset(token)
+
+
+def set_actor(user_id: Any) -> None:
+    context = _context.get()
+    if context is not None:
+        context["actor_id"] = str(user_id)
+
+
+def current_actor() -> Optional[str]:
+    context = _context.get()
+    return context.get("actor_id") if context else None
+
+
+def current_request() -> Optional[str]:
+    """"METHOD /path" of the request being served, if any"""
+    context = _context.get()
+    return f"{context['method']} {context['path']}" if context else None
@@ -0,0 +1,45 @@
+import json
+from dataclasses import fields, is_dataclass
+from datetime import date
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional speed-up, see requirements.txt
+    orjson = None
+
+"""
+JSON response class used app-wide (see main.py). Routes declare a
+response_model, so FastAPI validates/serializes the payload once into plain
+JSON types; this class then only has to turn that into bytes, which orjson
+does several times faster than the stdlib encoder.
+
+Routes can also return one directly with the records of db/projections.py
+(dataclasses holding datetimes), which orjson encodes natively.
+"""
+
+
+def _default(value: Any) -> Any:
+    """What orjson does natively, for the stdlib fallback"""
+    if is_dataclass(value):
+        return {field.name: getattr(value, field.name) for field in fields(value)}
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when installed, compact stdlib json otherwise"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+            default=_default,
+        ).encode("utf-8")
@@ -1,37 +1,67 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlmodel import Session, select
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
 from models.user import User 
-from db.session import get_session
+from db.session import get_read_session
 from core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from core.request_context import set_actor
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+# passlib and python-jose are comparatively slow to import, so they are loaded on
+# first use instead of when the app module is imported. This keeps worker startup
+# fast; the launcher can still warm them up explicitly via preload_security().
+_pwd_context: Optional["CryptContext"] = None
 
 # HTTP Bearer security scheme
 security = HTTPBearer()
 
+
+def get_pwd_context() -> "CryptContext":
+    """Return the shared password hashing context, creating it on first use"""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
+
+
+def __getattr__(name: str):
+    # Keeps `from core.security import pwd_context` working for existing callers
+    if name == "pwd_context":
+        return get_pwd_context()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def preload_security() -> None:
+    """Import the JWT library and load the bcrypt backend ahead of the first request"""
+    import jose.jwt  # noqa: F401
+    # Loads the bcrypt backend without paying for an actual hash
+    get_pwd_context().handler("bcrypt").get_backend()
+
+
 # --- Password Utilities ---
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 # --- JWT Token Generation ---
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
+    from jose import jwt
+
     to_encode = data.copy()
     
     if expires_delta:
@@ -48,9 +78,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_read_session)
 ) -> User:
     """Get the current authenticated user from JWT token (used as a dependency)"""
+    from jose import JWTError, jwt
     
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -74,4 +105,5 @@ def get_current_user(
     if user is None:
         raise credentials_exception
     
+    set_actor(user.id)
     return user
\ No newline at end of file
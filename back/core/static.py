@@ -0,0 +1,92 @@
+import mimetypes
+import re
+import stat
+from typing import List
+
+import anyio
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from core.config import STATIC_MAX_AGE
+
+"""
+Static file serving for the frontend.
+
+build_frontend.py writes content-hashed copies of the assets (main.3f9c2b1a0d.css)
+next to .br/.gz variants. A hashed name changes whenever the file does, so those
+are cached by browsers for a year without revalidation; HTML pages keep their
+names and are always revalidated (cheap 304s through the ETag) so a deploy is
+picked up on the next navigation.
+"""
+
+# Not every Python version knows the modern image formats
+mimetypes.add_type("image/avif", ".avif")
+mimetypes.add_type("image/webp", ".webp")
+
+_HASHED_NAME = re.compile(r"\.[0-9a-f]{10}\.[A-Za-z0-9]+$")
+
+# Served pre-compressed variants, in order of preference
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def accepted_encodings(scope: Scope) -> List[str]:
+    """Content codings from Accept-Encoding that the client didn't refuse with q=0"""
+    for name, value in scope.get("headers", []):
+        if name == b"accept-encoding":
+            codings = []
+            for part in value.decode("latin-1").split(","):
+                coding, _, params = part.strip().partition(";")
+                if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                    continue
+                codings.append(coding.strip().lower())
+            return codings
+    return []
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves file.br / file.gz when the client accepts them, with cache headers"""
+
+    def cache_control(self, path: str, media_type: str) -> str:
+        if _HASHED_NAME.search(path):
+            return IMMUTABLE_CACHE_CONTROL
+        if media_type.startswith("text/html"):
+            return "no-cache"
+        return f"public, max-age={STATIC_MAX_AGE}"
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = None
+        if scope["method"] in ("GET", "HEAD"):
+            response = await self._precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        if response.status_code in (200, 304):
+            response.headers["cache-control"] = self.cache_control(path, response.headers.get("content-type", ""))
+            # On the identity body too, or a shared cache may hand it to a client that asked for br/gzip (or the reverse)
+            response.headers["vary"] = "Accept-Encoding"
+        return response
+
+    async def _precompressed_response(self, path: str, scope: Scope):
+        accepted = accepted_encodings(scope)
+        if not accepted:
+            return None
+
+        for encoding, suffix in _ENCODINGS:
+            if encoding not in accepted:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+                continue
+
+            response = self.file_response(full_path, stat_result, scope)
+            media_type, _ = mimetypes.guess_type(path)
+            media_type = media_type or "application/octet-stream"
+            if media_type.startswith("text/"):
+                media_type += "; charset=utf-8"
+            response.headers["content-type"] = media_type
+            response.headers["content-encoding"] = encoding
+            return response
+        return None
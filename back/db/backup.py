@@ -0,0 +1,188 @@
+import os
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.config import BACKUP_PAGES_PER_STEP, BACKUP_STEP_SLEEP_MS
+
+"""
+Online backups of the SQLite database (run by backup_db.py).
+
+Copying database.db while the app runs either catches it mid-write or, when
+done under a lock, stalls every request. This uses SQLite's backup API
+instead, BACKUP_PAGES_PER_STEP pages at a time with a pause of
+BACKUP_STEP_SLEEP_MS between steps, so the app's queries keep the disk.
+
+In WAL mode (the default, see SQLITE_JOURNAL_MODE) the copy runs inside one
+read transaction: it is the database as of the moment the backup started,
+and writers carry on meanwhile. In the other journal modes a read
+transaction would hold writers off for the whole copy, so each step locks
+on its own and SQLite restarts the copy when a write lands in between.
+
+A copy is written next to its destination, checked, synced and only then
+renamed into place, so a destination file is always a complete database.
+"""
+
+SNAPSHOT_PREFIX = "database-"
+SNAPSHOT_FORMAT = "%Y%m%dT%H%M%SZ"
+
+Progress = Callable[[int, int], None]  # (pages copied, total pages)
+
+
+def database_path(engine) -> Path:
+    database = engine.url.database
+    if engine.dialect.name != "sqlite" or not database or database == ":memory:":
+        raise ValueError("Backups need an SQLite database stored in a file")
+    return Path(database).resolve()
+
+
+def _fsync(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _copy(source: sqlite3.Connection, target: sqlite3.Connection, pages: int, sleep_ms: float,
+          progress: Optional[Progress]) -> int:
+    """Run the backup in steps; returns how many steps it took"""
+    steps = 0
+
+    def on_step(status, remaining, total):
+        nonlocal steps
+        steps += 1
+        if progress is not None:
+            progress(total - remaining, total)
+        if remaining and sleep_ms > 0:
+            # Between steps the source is unlocked: the app gets the disk back
+            time.sleep(sleep_ms / 1000)
+
+    source.backup(target, pages=pages, progress=on_step)
+    return steps
+
+
+def backup(database: Path, destination: Path, pages: int = BACKUP_PAGES_PER_STEP,
+           sleep_ms: float = BACKUP_STEP_SLEEP_MS, progress: Optional[Progress] = None) -> Dict[str, float]:
+    """Copy a live database to `destination` without blocking its writers"""
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    partial = destination.with_name(destination.name + ".partial")
+    partial.unlink(missing_ok=True)
+
+    started = time.perf_counter()
+    source = sqlite3.connect(f"file:{database}?mode=ro", uri=True, isolation_level=None)
+    target = sqlite3.connect(partial, isolation_level=None)
+    try:
+        wal = source.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        if wal:
+            # Pin the snapshot: later commits go to the WAL and are not seen by this copy
+            source.execute("BEGIN")
+            source.execute("SELECT count(*) FROM sqlite_master").fetchone()
+        steps = _copy(source, target, pages, sleep_ms, progress)
+        if wal:
+            source.execute("COMMIT")
+        # A self-contained file: no -wal/-shm companions to carry around
+        target.execute("PRAGMA journal_mode=DELETE")
+        problems = _check(target, quick=True)
+    finally:
+        target.close()
+        source.close()
+
+    if problems:
+        partial.unlink(missing_ok=True)
+        raise RuntimeError(f"Backup failed its check: {'; '.join(problems[:5])}")
+    _fsync(partial)
+    os.replace(partial, destination)
+    if os.name == "posix":
+        _fsync(destination.parent)
+    return {
+        "seconds": time.perf_counter() - started,
+        "bytes": destination.stat().st_size,
+        "steps": steps,
+    }
+
+
+# --- Snapshots ---
+
+def snapshot_name(at: Optional[datetime] = None) -> str:
+    return f"{SNAPSHOT_PREFIX}{(at or datetime.utcnow()).strftime(SNAPSHOT_FORMAT)}.db"
+
+
+def list_snapshots(directory: Path) -> List[Tuple[datetime, Path]]:
+    """Snapshots in `directory`, oldest first"""
+    found = []
+    for path in Path(directory).glob(f"{SNAPSHOT_PREFIX}*.db"):
+        try:
+            taken = datetime.strptime(path.stem[len(SNAPSHOT_PREFIX):], SNAPSHOT_FORMAT)
+        except ValueError:
+            continue
+        found.append((taken, path))
+    return sorted(found)
+
+
+def snapshot(database: Path, directory: Path, keep: int, **options) -> Tuple[Path, Dict[str, float]]:
+    """Point-in-time copy into `directory`, keeping the newest `keep` snapshots"""
+    destination = Path(directory) / snapshot_name()
+    stats = backup(database, destination, **options)
+    if keep > 0:
+        for _, old in list_snapshots(directory)[:-keep]:
+            old.unlink(missing_ok=True)
+    return destination, stats
+
+
+# --- Verify and restore ---
+
+def _check(connection: sqlite3.Connection, quick: bool = False) -> List[str]:
+    pragma = "quick_check" if quick else "integrity_check"
+    problems = [row[0] for row in connection.execute(f"PRAGMA {pragma}")]
+    return [] if problems == ["ok"] else problems
+
+
+def verify(path: Path) -> Tuple[List[str], Dict[str, int]]:
+    """Full integrity check of a backup; returns (problems, rows per table)"""
+    path = Path(path)
+    if not path.is_file():
+        return [f"{path} does not exist"], {}
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        try:
+            problems = _check(connection)
+        except sqlite3.DatabaseError as e:
+            # Not a database at all (truncated, wrong file...)
+            return [str(e)], {}
+        tables = [row[0] for row in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )]
+        counts = {table: connection.execute(f'SELECT count(*) FROM "{table}"').fetchone()[0] for table in tables}
+    finally:
+        connection.close()
+    return problems, counts
+
+
+def restore(backup_path: Path, database: Path, progress: Optional[Progress] = None) -> Optional[Path]:
+    """
+    Replace `database` with a verified backup; returns where the replaced
+    database was saved (None if there was none). Stop the app first: this
+    takes the write lock for the whole copy.
+    """
+    problems, _ = verify(backup_path)
+    if problems:
+        raise RuntimeError(f"Refusing to restore {backup_path}: {'; '.join(problems[:5])}")
+    database = Path(database)
+    previous = None
+    if database.exists():
+        previous = database.with_name(f"{database.name}.before-restore-{datetime.utcnow().strftime(SNAPSHOT_FORMAT)}")
+        backup(database, previous, pages=-1, sleep_ms=0)
+
+    source = sqlite3.connect(f"file:{backup_path}?mode=ro", uri=True)
+    # Through SQLite rather than a file copy, so a -wal file of the old database can't be replayed over it
+    target = sqlite3.connect(database, isolation_level=None)
+    try:
+        _copy(source, target, pages=-1, sleep_ms=0, progress=progress)
+    finally:
+        target.close()
+        source.close()
+    return previous
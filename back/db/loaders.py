@@ -0,0 +1,67 @@
+from typing import Any, Callable, Dict, Iterable
+
+from fastapi import Depends
+from sqlmodel import Session, select
+
+from db.session import get_read_session
+from models.user import User
+from models.company import Company
+
+"""
+Dataloader-style batching for related rows.
+
+A page of products that shows each owner and company would otherwise load
+them one row at a time (N+1 queries). A BatchLoader takes every key the
+response needs, fetches the ones it hasn't seen yet with a single IN query
+per chunk, and remembers them, so a key is loaded at most once per request
+however many rows refer to it.
+
+Loaders hold rows from one session, so they live for one request: get them
+with `loaders: RequestLoaders = Depends(get_loaders)`.
+"""
+
+# Stay well below SQLite's limit on bound parameters per statement
+_IN_CHUNK = 500
+
+
+class BatchLoader:
+    def __init__(self, session: Session, model, column, to_db: Callable[[str], Any] = str):
+        self.session = session
+        self.model = model
+        self.column = column
+        # Keys arrive as strings (owner_id is text); convert to the column's type
+        self.to_db = to_db
+        self._cache: Dict[str, Any] = {}
+
+    def load_many(self, keys: Iterable[Any]) -> Dict[str, Any]:
+        """key -> row for every key that exists; one query per chunk of keys not loaded before"""
+        wanted = {str(key) for key in keys if key is not None}
+        missing = []
+        for key in wanted - self._cache.keys():
+            try:
+                missing.append(self.to_db(key))
+            except ValueError:
+                # Can't exist (e.g. a non-numeric user id)
+                self._cache[key] = None
+        for start in range(0, len(missing), _IN_CHUNK):
+            chunk = missing[start:start + _IN_CHUNK]
+            for row in self.session.exec(select(self.model).where(self.column.in_(chunk))):
+                self._cache[str(getattr(row, self.column.key))] = row
+        for key in wanted:
+            self._cache.setdefault(key, None)
+        return {key: self._cache[key] for key in wanted if self._cache[key] is not None}
+
+    def load(self, key: Any) -> Any:
+        return self.load_many([key]).get(str(key))
+
+
+class RequestLoaders:
+    """The loaders available to one request, sharing its read session"""
+
+    def __init__(self, session: Session):
+        self.users = BatchLoader(session, User, User.id, to_db=int)
+        self.companies = BatchLoader(session, Company, Company.id)
+
+
+def get_loaders(session: Session = Depends(get_read_session)) -> RequestLoaders:
+    return RequestLoaders(session)
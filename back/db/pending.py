@@ -0,0 +1,68 @@
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import event
+from sqlmodel import Session
+
+"""
+Work that should only happen once a transaction has committed: publishing
+change events, appending audit entries, ...
+
+Code running inside a write adds items with add(session, kind, item); when the
+session commits, each kind's handler gets that transaction's items in one
+call. Items remember the savepoint they were added in, so when a savepoint
+rolls back (a failed request inside a write-queue batch) only its items are
+dropped, and a full rollback drops everything.
+
+Usage Example:
+    on_commit("change_feed", broker.publish)
+    add(session, "change_feed", event)
+"""
+
+_INFO_KEY = "pending_after_commit"
+_handlers: Dict[str, Callable[[List[Any]], None]] = {}
+
+
+def on_commit(kind: str, handler: Callable[[List[Any]], None]) -> None:
+    """Set the handler receiving the committed items of `kind` (it should be quick and not raise)"""
+    _handlers[kind] = handler
+
+
+def add(session: Session, kind: str, item: Any) -> None:
+    session.info.setdefault(_INFO_KEY, []).append((session.get_nested_transaction(), kind, item))
+
+
+def _inside(transaction, ancestor) -> bool:
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    pending = session.info.pop(_INFO_KEY, None)
+    if not pending:
+        return
+    grouped: Dict[str, List[Any]] = {}
+    for _, kind, item in pending:
+        grouped.setdefault(kind, []).append(item)
+    for kind, items in grouped.items():
+        handler = _handlers.get(kind)
+        if handler is None:
+            continue
+        try:
+            handler(items)
+        except Exception as e:
+            print(f"After-commit handler {kind} failed: {e}")
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _after_rollback(session, previous_transaction):
+    pending = session.info.get(_INFO_KEY)
+    if not pending:
+        return
+    if previous_transaction.nested:
+        pending[:] = [entry for entry in pending if not _inside(entry[0], previous_transaction)]
+    else:
+        session.info.pop(_INFO_KEY, None)
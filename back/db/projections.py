@@ -0,0 +1,51 @@
+from dataclasses import make_dataclass
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from sqlmodel import SQLModel, select
+
+from models.company import Company, CompanyRead
+from models.product import Product, ProductDetail
+from models.user import User, UserRead
+
+"""
+Read projections for list endpoints.
+
+Listing with select(User) builds a full ORM instance per row (identity map
+entry, attribute state, change tracking) only for the route to validate it
+into UserRead and dump that again. A Projection selects just the columns of
+the response schema and puts each row in a small __slots__ record, which
+FastJSONResponse (orjson) serializes as it is: no ORM instances and no
+second pass through pydantic. benchmarks/read_projections.py compares the two.
+
+The columns are selected through the model's attributes, so the statement is
+still ORM-enabled and the soft-delete filter (db/soft_delete.py) applies,
+while the rows come back as plain tuples. Column types still convert values
+(JSON lists, booleans, ids), so the output matches the schema's.
+
+Routes return the records in a FastJSONResponse, which skips response_model
+validation; the schema still documents the endpoint. Records may be shared
+between coalesced requests (core/coalesce.py): never modify one.
+"""
+
+
+class Projection:
+    def __init__(self, name: str, model, schema: Type[SQLModel], constants: Optional[Dict[str, Any]] = None):
+        """Columns of `model` for the fields of `schema`; fields in `constants` get that value in every record"""
+        self.constants = constants or {}
+        self.fields = [field for field in schema.model_fields if field not in self.constants]
+        self.columns = [getattr(model, field) for field in self.fields]
+        self.record = make_dataclass(name, [*self.fields, *self.constants], slots=True)
+        self._extra = tuple(self.constants.values())
+
+    def select(self):
+        return select(*self.columns)
+
+    def records(self, rows: Iterable[tuple]) -> List[Any]:
+        record, extra = self.record, self._extra
+        return [record(*row, *extra) for row in rows]
+
+
+user_rows = Projection("UserRow", User, UserRead)
+company_rows = Projection("CompanyRow", Company, CompanyRead)
+# Listing without ?expand: the related rows are always null
+product_rows = Projection("ProductRow", Product, ProductDetail, constants={"owner": None, "company": None})
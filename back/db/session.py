@@ -1,23 +1,186 @@
 from sqlmodel import create_engine, Session
+from sqlalchemy import inspect, event, DateTime
+from sqlalchemy.pool import StaticPool
+from fastapi import Request
+from datetime import datetime
+from typing import Optional
+import itertools
+import threading
 
-# Create a connection string for an SQLite database
-sqlite_file_name = "database.db"
-sqlite_url = f"sqlite:///{sqlite_file_name}"
+from core.config import (
+    DATABASE_URL, DB_ECHO, SQLITE_JOURNAL_MODE, SQLITE_BUSY_TIMEOUT,
+    DATABASE_REPLICA_URLS, REPLICA_REFRESH_SECONDS,
+)
+from core.coalesce import FRESH_READ
+from core.consistency import wrote_recently
+# Registers the default filter that hides soft-deleted products and users
+import db.soft_delete  # noqa: F401,E402
 
 # Setup the engine (connect_args is needed for SQLite to handle concurrent requests safely)
-engine = create_engine(sqlite_url, echo=True, connect_args={"check_same_thread": False})
+connect_args = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT} if DATABASE_URL.startswith("sqlite") else {}
+engine = create_engine(DATABASE_URL, echo=DB_ECHO, connect_args=connect_args)
+
+if engine.dialect.name == "sqlite" and SQLITE_JOURNAL_MODE:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        if SQLITE_JOURNAL_MODE == "wal":
+            # In WAL mode NORMAL is still crash-safe and skips an fsync per commit
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
 
 def create_db_and_tables():
     """Initializes the database and creates all tables defined in models.py"""
     # Import all models before calling this, which is handled in main.py
     from models import SQLModel
     SQLModel.metadata.create_all(engine)
+    add_missing_columns(SQLModel.metadata)
+
+def _ddl_default(column):
+    """SQL literal default for a column added to a table that already has rows"""
+    default = column.default
+    if default is None:
+        return None
+    if default.is_scalar:
+        value = default.arg
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        if isinstance(value, (int, float)):
+            return repr(value)
+        if isinstance(value, str):
+            return "'" + value.replace("'", "''") + "'"
+        return None
+    if isinstance(column.type, DateTime):
+        # e.g. updated_at = Field(default_factory=datetime.utcnow). SQLite only
+        # accepts constant defaults here, so existing rows get the migration time.
+        return "'" + datetime.utcnow().isoformat(" ") + "'"
+    return None
+
+def add_missing_columns(metadata):
+    """
+    create_all() only creates missing tables. This adds columns and indexes
+    introduced in the models since an existing database was created, so
+    deployments don't have to drop database.db to pick up new fields.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column.type.compile(engine.dialect)}'
+                default = _ddl_default(column)
+                if default is not None:
+                    ddl += f" DEFAULT {default}"
+                    if not column.nullable:
+                        ddl += " NOT NULL"
+                conn.exec_driver_sql(ddl)
+                print(f"Added column {table.name}.{column.name}")
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+# --- Read replicas ---
+
+class LocalReplica:
+    """
+    Stand-in replica for dev and tests: a copy of the SQLite primary made with
+    the online backup API, next to it (database.db.replica) or in memory. It
+    only changes when refreshed, so it lags behind the primary like a real one.
+    """
+
+    def __init__(self, primary):
+        self.primary = primary
+        database = primary.url.database
+        if database and database != ":memory:":
+            self.engine = create_engine(f"sqlite:///{database}.replica", echo=DB_ECHO, connect_args=connect_args)
+        else:
+            self.engine = create_engine("sqlite://", echo=DB_ECHO, connect_args=connect_args, poolclass=StaticPool)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self):
+        """Copy the primary's current state over the replica"""
+        with self._lock:
+            source = self.primary.raw_connection()
+            target = self.engine.raw_connection()
+            try:
+                source.driver_connection.backup(target.driver_connection)
+            finally:
+                target.close()
+                source.close()
+
+    def start(self, interval: float):
+        self.refresh()
+        if interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, args=(interval,), name="local-replica", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Local replica refresh failed: {e}")
+
+
+local_replica: Optional[LocalReplica] = None
+
+def _create_replica_engine(url: str):
+    global local_replica
+    if url == "local":
+        local_replica = LocalReplica(engine)
+        return local_replica.engine
+    replica_args = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT} if url.startswith("sqlite") else {}
+    return create_engine(url, echo=DB_ECHO, connect_args=replica_args)
+
+read_engines = [_create_replica_engine(url) for url in DATABASE_REPLICA_URLS]
+_read_engine_cycle = itertools.cycle(read_engines) if read_engines else None
+
+def start_replicas():
+    """Take the first local replica snapshot (after the schema exists) and keep refreshing it"""
+    if local_replica is not None:
+        from core.lifecycle import on_shutdown
+        local_replica.start(REPLICA_REFRESH_SECONDS)
+        on_shutdown(local_replica.stop)
+
+def dispose_engine():
+    """Close every pooled connection so no SQLite file handle or lock outlives the worker"""
+    engine.dispose()
+    for read_engine in read_engines:
+        read_engine.dispose()
 
 def get_session():
     """Dependency function to yield a new database session"""
     with Session(engine) as session:
         yield session
 
+def get_read_session(request: Request):
+    """
+    Dependency for read-only routes: a session on a replica (round robin), or
+    on the primary when there are no replicas or this client wrote recently.
+    Never write through it.
+    """
+    fresh = wrote_recently(request)
+    if _read_engine_cycle is None or fresh:
+        bind = engine
+    else:
+        bind = next(_read_engine_cycle)
+    with Session(bind) as session:
+        if fresh:
+            # A flight already in progress may predate this client's write: don't join one
+            session.info[FRESH_READ] = True
+        yield session
+
 # from sqlmodel import SQLModel, create_engine, Session
 # #from supabase import create_client, Client
 # from core import config  
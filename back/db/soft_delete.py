@@ -0,0 +1,41 @@
+from sqlalchemy import event
+from sqlalchemy.orm import with_loader_criteria
+from sqlmodel import Session
+
+from models.product import Product
+from models.user import User
+
+"""
+Soft delete.
+
+Products and users are deleted by setting deleted_at, which is instant and
+leaves order history intact; purge_deleted.py archives and removes them later.
+
+Every ORM statement through a Session (select, Session.get, ORM update and
+delete) gets `deleted_at IS NULL` added for these models, so routes and
+services keep working as if deleted rows were gone, and the partial indexes
+over live rows (models/base.py: live_index) apply. Statements that need the
+deleted rows too opt out:
+
+    session.exec(select(User).where(...).execution_options(include_deleted=True))
+
+Core statements run on a connection (bulk writes, raw SQL) are not filtered
+and must add the condition themselves.
+"""
+
+SOFT_DELETE_MODELS = (Product, User)
+INCLUDE_DELETED = "include_deleted"
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _exclude_deleted(execute_state):
+    if execute_state.is_column_load or execute_state.is_relationship_load:
+        return
+    if execute_state.execution_options.get(INCLUDE_DELETED, False):
+        return
+    if not (execute_state.is_select or execute_state.is_update or execute_state.is_delete):
+        return
+    execute_state.statement = execute_state.statement.options(*[
+        with_loader_criteria(model, model.deleted_at.is_(None), include_aliases=True)
+        for model in SOFT_DELETE_MODELS
+    ])
@@ -0,0 +1,192 @@
+import asyncio
+import contextvars
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+
+from core.config import WRITE_QUEUE_ENABLED, WRITE_QUEUE_MAX_BATCH, WRITE_QUEUE_MAX_WAIT_MS
+from core.lifecycle import on_shutdown
+from db.session import engine
+
+"""
+Single-writer group commit.
+
+SQLite allows one writer at a time. When every request opens its own write
+transaction, concurrent requests queue on the file lock, each paying for its
+own commit (fsync), and under load some give up with "database is locked".
+
+With WRITE_QUEUE_ENABLED the routers hand their writes to one writer thread
+instead. The writer takes everything that is queued (up to
+WRITE_QUEUE_MAX_BATCH), runs each request's write function inside its own
+SAVEPOINT and commits the whole batch once. A write that raises (e.g. an
+HTTPException for a 404) only rolls back its savepoint; the others still
+commit. Each caller waits on a future that resolves after the commit, with its
+write function's return value or exception.
+
+Write functions receive the writer's session and must not use the request's
+session or lazy-load through objects from it. They should return plain data or
+fully loaded objects (the writer's session doesn't expire them on commit).
+
+The writer keeps one connection of its own for its whole life, so it never
+waits behind request sessions for a pooled connection; main.py starts it with
+the app. Each worker process has its own writer; SQLITE_BUSY_TIMEOUT covers the
+contention between them.
+
+Usage Example:
+    def write(session):
+        product = Product(...)
+        session.add(product)
+        session.flush()
+        return ProductRead.model_validate(product)
+
+    product = run_write(session, write)
+"""
+
+WriteFn = Callable[[Session], Any]
+
+_STOP = object()
+
+
+class WriteQueue:
+    def __init__(self, engine, max_batch: int = 64, max_wait: float = 0.0):
+        self.engine = engine
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stopped = False
+        # Counters for monitoring: batches committed and writes they contained
+        self.batches = 0
+        self.writes = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None and not self._stopped:
+                # Check the connection out here, while the pool still has one to spare
+                connection = self.engine.connect()
+                self._thread = threading.Thread(target=self._run, args=(connection,), name="write-queue", daemon=True)
+                self._thread.start()
+
+    def submit(self, fn: WriteFn) -> Future:
+        """Queue `fn(session)`; the future resolves once its batch has committed"""
+        if self._stopped:
+            raise RuntimeError("Write queue is shut down")
+        if self._thread is None:
+            self.start()
+        future: Future = Future()
+        # Run it with the caller's context variables (e.g. the acting user for the audit log)
+        self._queue.put((fn, future, contextvars.copy_context()))
+        return future
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Commit everything already queued, then stop the writer thread"""
+        with self._lock:
+            self._stopped = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    # --- Writer thread ---
+
+    def _run(self, connection) -> None:
+        try:
+            while True:
+                job = self._queue.get()
+                if job is _STOP:
+                    return
+                batch, stop = self._collect(job)
+                self._commit(connection, batch)
+                if stop:
+                    return
+        finally:
+            connection.close()
+
+    def _collect(self, first) -> Tuple[List, bool]:
+        """Gather more queued jobs to commit with `first`; stops early at the stop marker"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    def _commit(self, connection, batch: List) -> None:
+        done = []
+        with Session(bind=connection, expire_on_commit=False) as session:
+            try:
+                if self.engine.dialect.name == "sqlite":
+                    # Take the write lock up front. The driver would otherwise start a
+                    # deferred transaction, and the first RELEASE SAVEPOINT would commit it.
+                    session.execute(text("BEGIN IMMEDIATE"))
+
+                for fn, future, context in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with session.begin_nested():
+                            result = context.run(fn, session)
+                            # Flush here, not at commit: a failing flush then only
+                            # fails this write, and flush hooks see its context
+                            context.run(session.flush)
+                    except BaseException as e:
+                        future.set_exception(e)
+                    else:
+                        done.append((future, result))
+
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                print(f"Write queue batch of {len(batch)} failed: {e}")
+                for future, _ in done:
+                    future.set_exception(e)
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+        self.batches += 1
+        self.writes += len(done)
+        for future, result in done:
+            future.set_result(result)
+
+
+write_queue = WriteQueue(engine, max_batch=WRITE_QUEUE_MAX_BATCH, max_wait=WRITE_QUEUE_MAX_WAIT_MS / 1000)
+on_shutdown(write_queue.stop)
+
+
+def run_write(session: Session, fn: WriteFn) -> Any:
+    """
+    Run a write function and commit it, through the write queue when it is
+    enabled or directly on the request's session otherwise. For sync routes.
+    """
+    if WRITE_QUEUE_ENABLED:
+        return write_queue.submit(fn).result()
+    try:
+        result = fn(session)
+        session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+    return result
+
+
+async def run_write_async(session: Session, fn: WriteFn) -> Any:
+    """run_write for async routes: waits for the writer without blocking the event loop"""
+    if WRITE_QUEUE_ENABLED:
+        return await asyncio.wrap_future(write_queue.submit(fn))
+    # Inline on the request's session, in the threadpool: the write and its commit block
+    return await run_in_threadpool(run_write, session, fn)
@@ -1,11 +1,47 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from typing import Any, Dict
 
-from db.session import create_db_and_tables
+from db.session import engine, create_db_and_tables, dispose_engine, start_replicas, read_engines
+from db.write_queue import write_queue
+from core.coalesce import coalescing_stats
+from core.lifecycle import install_signal_hooks, run_shutdown_hooks
+from core.security import preload_security
+from core.responses import FastJSONResponse
+from core.compression import SelectiveGZipMiddleware
+from core.consistency import ReadYourWritesMiddleware
+from core.request_context import RequestContextMiddleware
+from core.profiling import ProfilingMiddleware, install as install_profiling
+from core.static import PrecompressedStaticFiles
+from core.config import (
+    GZIP_MINIMUM_SIZE,
+    GZIP_COMPRESS_LEVEL,
+    SERVE_FRONTEND,
+    WRITE_QUEUE_ENABLED,
+    AUDIT_ENABLED,
+    AUTOCOMPLETE_ENABLED,
+    AUTOCOMPLETE_REFRESH_SECONDS,
+    FRONTEND_DIR,
+    FRONTEND_BUILD_DIR,
+    PROFILE_TOKEN,
+    PROFILE_SAMPLE_RATE,
+)
+# Routers are imported eagerly on purpose: the route table is needed before the
+# first request anyway, and their heavy dependencies (numpy/scipy for similarity,
+# redis for the change feed and rate limiter) are imported inside the functions
+# that use them. All of routers/ costs ~50 ms of a ~0.75 s import, the rest being
+# fastapi and sqlalchemy (`python benchmarks/cold_start.py --profile`).
 from routers.auth import router as auth_router
 from routers.product import router as product_router
 from routers.user import router as user_router
+from routers.company import router as company_router
+from routers.search import router as search_router
+from routers.alerts import router as alerts_router
+from routers.audit import router as audit_router
+from routers.profiles import router as profiles_router
+from services import audit, autocomplete, change_feed
+from services.geo import backfill_coordinates, create_spatial_index
 
 
 @asynccontextmanager
@@ -15,9 +51,29 @@ async def lifespan(app: FastAPI):
     print("Creating database tables...")
     create_db_and_tables()
     print("Database tables created successfully!")
+    # Before the replicas are copied, so they carry the coordinates and R-tree too
+    backfill_coordinates(engine)
+    create_spatial_index(engine)
+    start_replicas()
+    # Load passlib/jose now so the first login doesn't pay for their imports
+    preload_security()
+    if AUDIT_ENABLED:
+        # Its shutdown hook runs last, after the write queue's final batch
+        audit.start(engine)
+    if WRITE_QUEUE_ENABLED:
+        write_queue.start()
+    if AUTOCOMPLETE_ENABLED:
+        autocomplete.start(engine, AUTOCOMPLETE_REFRESH_SECONDS)
+    change_feed.start()
+    # SSE streams end on SIGINT/SIGTERM, before the server waits for open requests
+    install_signal_hooks()
     yield
-    # Shutdown: Add cleanup code here if needed
+    # Shutdown: the server has already stopped accepting connections and drained
+    # in-flight requests; flush background queues, then release the database
     print("Shutting down...")
+    await run_shutdown_hooks()
+    dispose_engine()
+    print("Shutdown complete.")
 
 
 # Initialize FastAPI app
@@ -25,7 +81,8 @@ app = FastAPI(
     title="MedSite API",
     description="API for MedSite platform",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 # Configure CORS
@@ -37,13 +94,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses for clients that accept gzip
+app.add_middleware(
+    SelectiveGZipMiddleware,
+    minimum_size=GZIP_MINIMUM_SIZE,
+    compresslevel=GZIP_COMPRESS_LEVEL,
+)
+
+# With replicas, clients that just wrote read their own writes from the primary
+if read_engines:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# Who is acting, for the audit log
+app.add_middleware(RequestContextMiddleware)
+
+# Opt-in profiling of single requests; outermost, so it sees the whole request
+if PROFILE_TOKEN or PROFILE_SAMPLE_RATE > 0:
+    for profiled_engine in (engine, *read_engines):
+        install_profiling(profiled_engine)
+    app.add_middleware(ProfilingMiddleware)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(product_router)
 app.include_router(user_router)
+app.include_router(company_router)
+app.include_router(search_router)
+app.include_router(alerts_router)
+app.include_router(audit_router)
+app.include_router(profiles_router)
+
+# Serve the frontend (prefer the hashed/precompressed build from build_frontend.py)
+if SERVE_FRONTEND:
+    frontend_dir = FRONTEND_BUILD_DIR if FRONTEND_BUILD_DIR.is_dir() else FRONTEND_DIR
+    if frontend_dir.is_dir():
+        app.mount("/front", PrecompressedStaticFiles(directory=frontend_dir, html=True), name="front")
 
 
-@app.get("/")
+@app.get("/", response_model=Dict[str, str])
 async def root():
     """Root endpoint"""
     return {
@@ -54,7 +142,18 @@ async def root():
     }
 
 
-@app.get("/health")
+@app.get("/health", response_model=Dict[str, str])
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+@app.get("/metrics", response_model=Dict[str, Any])
+async def metrics():
+    """In-process counters of this worker (coalesced reads, group commits, change feed, audit buffer)"""
+    return {
+        "coalescing": coalescing_stats(),
+        "write_queue": {"batches": write_queue.batches, "writes": write_queue.writes},
+        "change_feed": change_feed.broker.stats(),
+        "audit": audit.writer.stats(),
+    }
\ No newline at end of file
@@ -0,0 +1,213 @@
+# migrate_ids.py
+"""
+Migrates BaseModel primary keys (and the foreign keys pointing at them) in an
+existing SQLite database to the layout selected by ID_STORAGE.
+
+    python migrate_ids.py                       # convert storage to ID_STORAGE
+    ID_STORAGE=binary python migrate_ids.py     # text UUIDs -> 16-byte blobs
+    python migrate_ids.py --rekey               # also replace random uuid4 ids
+                                                # with v7 ids built from created_at
+
+Each table is renamed, recreated from the current models and copied over in
+chunks inside a single transaction, so a failure leaves the database as it was.
+--rekey changes ids that clients may have stored (bookmarked product URLs), so
+only use it when that is acceptable. Ids held outside foreign keys (the
+neighbour lists of build_similarity.py, audit log entries, archived rows) are
+rewritten too; the audit log's append-only triggers are lifted for that within
+the same transaction. Back up database.db before running.
+"""
+import argparse
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import String, Table, inspect
+
+from core.config import ID_STORAGE
+from db.session import engine
+from models import SQLModel, ArchivedRow, AuditLog, ProductNeighbours
+from sqlmodel.sql.sqltypes import AutoString
+from models.base import CompactUUID, uuid7_from_datetime
+
+
+# Ids stored outside foreign keys: (table, column, JSON?); JSON values are searched for ids at any depth
+LOOSE_ID_COLUMNS = [
+    (ProductNeighbours.__tablename__, "neighbour_ids", True),
+    (AuditLog.__tablename__, "entity_id", False),
+    (AuditLog.__tablename__, "changes", True),
+    (ArchivedRow.__tablename__, "data", True),
+]
+
+
+def _is_uuid_id(column) -> bool:
+    """True for a BaseModel `id` column, in either storage layout (User keeps an int id)"""
+    return column.primary_key and column.name == "id" and (
+        isinstance(column.type, (CompactUUID, AutoString, String))
+    )
+
+
+def id_columns(table: Table) -> List[str]:
+    """Columns of `table` that hold BaseModel ids: its own id and FKs to other ids"""
+    columns = []
+    for column in table.columns:
+        if _is_uuid_id(column) or any(_is_uuid_id(fk.column) for fk in column.foreign_keys):
+            columns.append(column.name)
+    return columns
+
+
+def _to_str(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return str(UUID(bytes=bytes(value)))
+    return str(value)
+
+
+def _to_storage(value: Optional[str]):
+    if value is None:
+        return None
+    return UUID(value).bytes if ID_STORAGE == "binary" else value
+
+
+def _parse_created_at(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def _needs_conversion(conn, table: Table) -> bool:
+    """Whether the stored id values differ from the ID_STORAGE layout (empty tables are rebuilt too)"""
+    stored = conn.exec_driver_sql(f'SELECT typeof(id) FROM "{table.name}" LIMIT 1').scalar()
+    return stored != ("blob" if ID_STORAGE == "binary" else "text")
+
+
+def _remap(value, id_map: Dict[str, str]):
+    if isinstance(value, str):
+        return id_map.get(value, value)
+    if isinstance(value, list):
+        return [_remap(item, id_map) for item in value]
+    if isinstance(value, dict):
+        return {key: _remap(item, id_map) for key, item in value.items()}
+    return value
+
+
+def remap_loose_ids(conn, existing, id_map: Dict[str, str], chunk_size: int) -> None:
+    """Rewrite the ids of LOOSE_ID_COLUMNS in place through `id_map`"""
+    for table, column, is_json in LOOSE_ID_COLUMNS:
+        if table not in existing:
+            continue
+        # The audit log refuses UPDATE; its triggers come back before the transaction commits
+        triggers = conn.exec_driver_sql(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (table,)
+        ).all()
+        for name, _ in triggers:
+            conn.exec_driver_sql(f'DROP TRIGGER "{name}"')
+
+        updated = 0
+        last_rowid = 0
+        while True:
+            rows = conn.exec_driver_sql(
+                f'SELECT rowid, "{column}" FROM "{table}" WHERE rowid > ? AND "{column}" IS NOT NULL ORDER BY rowid LIMIT ?',
+                (last_rowid, chunk_size),
+            ).all()
+            if not rows:
+                break
+            last_rowid = rows[-1][0]
+            batch = []
+            for rowid, value in rows:
+                old = json.loads(value) if is_json else value
+                new = _remap(old, id_map)
+                if new != old:
+                    batch.append((json.dumps(new) if is_json else new, rowid))
+            if batch:
+                conn.exec_driver_sql(f'UPDATE "{table}" SET "{column}" = ? WHERE rowid = ?', batch)
+                updated += len(batch)
+
+        for _, sql in triggers:
+            conn.exec_driver_sql(sql)
+        print(f"✅ {table}.{column}: {updated} rows re-keyed")
+
+
+def migrate(rekey: bool, chunk_size: int) -> None:
+    existing = set(inspect(engine).get_table_names())
+    tables = [t for t in SQLModel.metadata.sorted_tables if t.name in existing and id_columns(t)]
+    if not rekey:
+        with engine.connect() as conn:
+            if not any(_needs_conversion(conn, t) for t in tables if "id" in id_columns(t)):
+                tables = []
+    if not tables:
+        print("Nothing to migrate.")
+        return
+
+    with engine.begin() as conn:
+        # Old id -> new id, shared across tables so foreign keys follow their targets
+        id_map: Dict[str, str] = {}
+        if rekey:
+            for table in tables:
+                if "id" not in id_columns(table) or "created_at" not in table.columns:
+                    continue
+                rows = conn.exec_driver_sql(f'SELECT id, created_at FROM "{table.name}" ORDER BY created_at')
+                for old_id, created_at in rows:
+                    id_map[_to_str(old_id)] = uuid7_from_datetime(_parse_created_at(created_at))
+
+        for table in tables:
+            conn.exec_driver_sql(f'ALTER TABLE "{table.name}" RENAME TO "{table.name}__old"')
+            # Renamed tables keep their index names; free them for the new tables
+            indexes = conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                (f"{table.name}__old",),
+            ).scalars().all()
+            for index in indexes:
+                conn.exec_driver_sql(f'DROP INDEX "{index}"')
+
+        SQLModel.metadata.create_all(conn, tables=tables)
+
+        for table in tables:
+            old_name = f"{table.name}__old"
+            old_columns = [row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info("{old_name}")')]
+            columns = [c for c in old_columns if c in table.columns]
+            converted = set(id_columns(table))
+            positions = [i for i, c in enumerate(columns) if c in converted]
+
+            column_list = ", ".join(f'"{c}"' for c in columns)
+            placeholders = ", ".join("?" for _ in columns)
+            insert_sql = f'INSERT INTO "{table.name}" ({column_list}) VALUES ({placeholders})'
+
+            copied = 0
+            last_rowid = 0
+            while True:
+                rows = conn.exec_driver_sql(
+                    f'SELECT rowid, {column_list} FROM "{old_name}" WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                    (last_rowid, chunk_size),
+                ).all()
+                if not rows:
+                    break
+                last_rowid = rows[-1][0]
+                batch = []
+                for row in rows:
+                    values = list(row[1:])
+                    for i in positions:
+                        value = _to_str(values[i])
+                        values[i] = _to_storage(id_map.get(value, value))
+                    batch.append(tuple(values))
+                conn.exec_driver_sql(insert_sql, batch)
+                copied += len(batch)
+
+            print(f"✅ {table.name}: {copied} rows migrated ({', '.join(sorted(converted))})")
+
+        for table in reversed(tables):
+            conn.exec_driver_sql(f'DROP TABLE "{table.name}__old"')
+
+        if rekey:
+            remap_loose_ids(conn, existing, id_map, chunk_size)
+
+    print(f"🎉 Done. Ids are stored as {ID_STORAGE}{' and re-keyed to UUIDv7' if rekey else ''}.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert BaseModel id storage / re-key ids to UUIDv7.")
+    parser.add_argument("--rekey", action="store_true", help="replace existing ids with time-ordered v7 ids")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+    migrate(args.rekey, args.chunk_size)
@@ -1,8 +1,19 @@
 from sqlmodel import SQLModel
 from .base import BaseModel
-from .user import User, UserCreate, UserRead, UserUpdate, UserLogin, UserPasswordReset, UserProfile
-from .product import Product, ProductCreate, ProductRead, ProductUpdate
-from .company import Company
+from .common import MessageResponse, Suggestion
+from .user import (
+    User, UserCreate, UserRead, UserUpdate, UserLogin, UserPasswordReset, UserProfile, UserPublic, UserResponse, AuthResponse,
+    UserBulkCreate, UserBulkResult, UserBulkResponse,
+)
+from .product import (
+    Product, ProductCreate, ProductRead, ProductDetail, ProductPage, ProductUpdate, ProductPatch, ProductResponse,
+    ProductNeighbours, ProductBulkItem, ProductBulkUpdate, ProductBulkDelete, BulkItemResult, BulkResponse,
+)
+from .company import Company, CompanyRead, CompanyCreate, CompanyResponse, NearbyCompany
+from .alert import StockThreshold, StockAlert, JobCheckpoint, StockThresholdUpdate, StockThresholdRead, StockAlertRead
+from .audit import AuditLog, AuditRead
+from .archive import ArchivedRow
+from .profile import ProfileRead
 
 # Uncomment when ready to use
 # from .subscription import Subscription
@@ -16,6 +27,8 @@ from .company import Company
 __all__ = [
     "SQLModel",
     "BaseModel",
+    "MessageResponse",
+    "Suggestion",
     "User",
     "UserCreate",
     "UserRead",
@@ -23,9 +36,39 @@ __all__ = [
     "UserLogin",
     "UserPasswordReset",
     "UserProfile",
+    "UserPublic",
+    "UserResponse",
+    "AuthResponse",
+    "UserBulkCreate",
+    "UserBulkResult",
+    "UserBulkResponse",
     "Product",
     "ProductCreate",
     "ProductRead",
+    "ProductDetail",
+    "ProductPage",
     "ProductUpdate",
+    "ProductPatch",
+    "ProductResponse",
+    "ProductNeighbours",
+    "ProductBulkItem",
+    "ProductBulkUpdate",
+    "ProductBulkDelete",
+    "BulkItemResult",
+    "BulkResponse",
     "Company",
+    "CompanyRead",
+    "NearbyCompany",
+    "CompanyCreate",
+    "CompanyResponse",
+    "StockThreshold",
+    "StockAlert",
+    "JobCheckpoint",
+    "StockThresholdUpdate",
+    "StockThresholdRead",
+    "StockAlertRead",
+    "AuditLog",
+    "AuditRead",
+    "ArchivedRow",
+    "ProfileRead",
 ]
\ No newline at end of file
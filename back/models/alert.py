@@ -0,0 +1,49 @@
+from typing import Optional
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+from .base import IdType
+
+
+class StockThreshold(SQLModel, table=True):
+    """A distributor's low-stock level; distributors without a row use LOW_STOCK_DEFAULT_THRESHOLD."""
+    owner_id: str = Field(primary_key=True, foreign_key="user.id")
+    threshold: int = Field(nullable=False, ge=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+
+class StockAlert(SQLModel, table=True):
+    """
+    A product that is at or below its owner's threshold. The row exists while
+    the product stays low, so it is alerted once; restocking removes it.
+    """
+    product_id: str = Field(primary_key=True, foreign_key="product.id", ondelete="CASCADE", sa_type=IdType)
+    owner_id: str = Field(index=True, nullable=False)
+    stock_quantity: int = Field(nullable=False)
+    threshold: int = Field(nullable=False)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    # Set once the alert went out in a digest
+    delivered_at: Optional[datetime] = Field(default=None, index=True)
+
+
+class JobCheckpoint(SQLModel, table=True):
+    """How far a periodic job has got, e.g. the updated_at up to which products were evaluated."""
+    name: str = Field(primary_key=True)
+    position: datetime = Field(nullable=False)
+
+
+class StockThresholdUpdate(SQLModel):
+    threshold: int = Field(ge=0)
+
+
+class StockThresholdRead(SQLModel):
+    threshold: int
+    is_default: bool = False
+
+
+class StockAlertRead(SQLModel):
+    product_id: str
+    product_name: str
+    stock_quantity: int
+    threshold: int
+    created_at: datetime
+    delivered_at: Optional[datetime] = None
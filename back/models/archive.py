@@ -0,0 +1,14 @@
+from typing import Any, Dict
+from datetime import datetime
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import JSON
+
+
+class ArchivedRow(SQLModel, table=True):
+    """A soft-deleted row moved out of its table by purge_deleted.py, kept as JSON."""
+    id: int = Field(default=None, primary_key=True)
+    table_name: str = Field(nullable=False, index=True)
+    row_id: str = Field(nullable=False, index=True)
+    data: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
+    deleted_at: datetime = Field(nullable=False)
+    archived_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
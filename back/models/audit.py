@@ -0,0 +1,31 @@
+from typing import Any, Dict, Optional
+from datetime import datetime
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import JSON
+
+
+class AuditLog(SQLModel, table=True):
+    """
+    Append-only record of one change to an audited row (services/audit.py).
+    `changes` maps each column to {"old": ..., "new": ...}; "old" is left out
+    where the write didn't read the previous value (bulk statements).
+    """
+    id: Optional[int] = Field(default=None, primary_key=True)
+    at: datetime = Field(nullable=False, index=True)
+    actor_id: Optional[str] = Field(default=None, index=True)
+    action: str = Field(nullable=False)  # insert | update | delete
+    entity: str = Field(nullable=False)  # table name
+    entity_id: str = Field(nullable=False, index=True)
+    changes: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
+    request: Optional[str] = None  # "PATCH /products/..."
+
+
+class AuditRead(SQLModel):
+    id: int
+    at: datetime
+    actor_id: Optional[str] = None
+    action: str
+    entity: str
+    entity_id: str
+    changes: Dict[str, Any]
+    request: Optional[str] = None
@@ -1,8 +1,121 @@
 from sqlmodel import Field, SQLModel
-from datetime import datetime
-from uuid import uuid4
+from sqlmodel.sql.sqltypes import AutoString
+from sqlalchemy import Index, text
+from sqlalchemy.types import TypeDecorator, LargeBinary
+from datetime import datetime, timezone
+from uuid import UUID
+import os
+import threading
+import time
+
+from core.config import ID_STORAGE
+
+# --- Time-ordered IDs ---
+
+_uuid7_lock = threading.Lock()
+_uuid7_last_ms = 0
+_uuid7_counter = 0
+
+
+def uuid7() -> UUID:
+    """
+    UUID version 7 (RFC 9562): 48-bit Unix milliseconds, then random bits.
+    IDs sort by creation time, so new rows are appended to the end of the
+    primary-key index instead of landing on a random page. Within one
+    millisecond the 12-bit rand_a field is used as a counter so IDs generated
+    by this process stay strictly increasing.
+    """
+    global _uuid7_last_ms, _uuid7_counter
+    with _uuid7_lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _uuid7_last_ms:
+            _uuid7_last_ms = ms
+            # Random start leaves room to count up within the millisecond
+            _uuid7_counter = int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            _uuid7_counter += 1
+            if _uuid7_counter > 0xFFF:
+                # Counter exhausted: borrow the next millisecond
+                _uuid7_last_ms += 1
+                _uuid7_counter = 0
+            ms = _uuid7_last_ms
+        counter = _uuid7_counter
+
+    return _build_uuid7(ms, counter)
+
+
+def _build_uuid7(ms: int, rand_a: int) -> UUID:
+    rand_b = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    value = (ms & ((1 << 48) - 1)) << 80
+    value |= 0x7 << 76              # version
+    value |= (rand_a & 0xFFF) << 64
+    value |= 0b10 << 62             # RFC 4122 variant
+    value |= rand_b
+    return UUID(int=value)
+
+
+def new_id() -> str:
+    """Default primary key for BaseModel tables"""
+    return str(uuid7())
+
+
+def uuid7_from_datetime(moment: datetime) -> str:
+    """A v7 ID whose timestamp is `moment`; used when re-keying existing rows"""
+    if moment.tzinfo is None:
+        # created_at columns hold naive UTC (datetime.utcnow)
+        moment = moment.replace(tzinfo=timezone.utc)
+    ms = int(moment.timestamp() * 1000)
+    return str(_build_uuid7(ms, int.from_bytes(os.urandom(2), "big")))
+
+
+class CompactUUID(TypeDecorator):
+    """
+    Stores a UUID string as 16 raw bytes instead of 36 characters of text.
+    Python code keeps seeing the usual "xxxxxxxx-xxxx-..." strings.
+    """
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return UUID(str(value)).bytes
+        except ValueError:
+            # Not a UUID (e.g. a bad id in a URL): bind something that matches no row
+            return str(value).encode()
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return str(UUID(bytes=bytes(value)))
+
+
+# Column type for BaseModel ids and every foreign key pointing at them.
+# ID_STORAGE=binary switches to the compact layout (run migrate_ids.py first).
+IdType = CompactUUID if ID_STORAGE == "binary" else AutoString
+
 
 class BaseModel(SQLModel):
     # id: str = Field(default_factory=uuid4, primary_key=True)
-    id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True)
+    id: str = Field(default_factory=new_id, primary_key=True, sa_type=IdType)
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# --- Soft delete ---
+
+def live_index(name: str, *columns: str) -> Index:
+    """
+    Partial index over the rows that aren't soft-deleted. Queries get the
+    matching `deleted_at IS NULL` from the default filter (db/soft_delete.py),
+    so they can use it, and deleted rows don't bloat it.
+    """
+    where = text("deleted_at IS NULL")
+    return Index(name, *columns, sqlite_where=where, postgresql_where=where)
+
+
+def deleted_index(name: str) -> Index:
+    """Partial index over just the soft-deleted rows, for the purge job"""
+    where = text("deleted_at IS NOT NULL")
+    return Index(name, "deleted_at", sqlite_where=where, postgresql_where=where)
+
@@ -0,0 +1,13 @@
+from sqlmodel import SQLModel
+
+
+class MessageResponse(SQLModel):
+    """Schema for endpoints that only report what happened."""
+    message: str
+
+
+class Suggestion(SQLModel):
+    """One type-ahead suggestion: a product or company name and its weight."""
+    text: str
+    kind: str  # product | company
+    weight: int
@@ -1,5 +1,6 @@
-from sqlmodel import Field
+from sqlmodel import Field, SQLModel
 from typing import Optional, List
+from datetime import datetime
 from .base import BaseModel 
 
 class Company(BaseModel, table=True):
@@ -7,4 +8,36 @@ class Company(BaseModel, table=True):
     name: str = Field(index=True, unique=True, nullable=False)
     description: Optional[str] = None
     location: Optional[str] = None
-    industry: Optional[str] = None
\ No newline at end of file
+    industry: Optional[str] = None
+    # Geocoded from location unless given; indexed in company_rtree (services/geo.py)
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+
+class CompanyRead(SQLModel):
+    id: str
+    name: str
+    description: Optional[str] = None
+    location: Optional[str] = None
+    industry: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    created_at: datetime
+
+
+class CompanyCreate(SQLModel):
+    name: str
+    description: Optional[str] = None
+    location: Optional[str] = None
+    industry: Optional[str] = None
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180)
+
+
+class NearbyCompany(CompanyRead):
+    distance_km: float
+
+
+class CompanyResponse(SQLModel):
+    message: str
+    company: CompanyRead
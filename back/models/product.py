@@ -1,21 +1,45 @@
 from typing import Optional, List
-from .base import BaseModel 
-from sqlmodel import SQLModel, Field
+from datetime import datetime
+from .base import BaseModel, IdType, live_index, deleted_index
+from .user import UserPublic
+from .company import CompanyRead
+from pydantic import field_validator
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import JSON
 
 class Product(BaseModel, table=True):
+    __table_args__ = (
+        # Catalog pages (newest first), per owner and per company, over live rows only
+        live_index("ix_product_live_id", "id"),
+        live_index("ix_product_live_owner", "owner_id", "id"),
+        live_index("ix_product_live_company", "company_id", "id"),
+        deleted_index("ix_product_deleted_at"),
+    )
+
     name: str = Field(index=True, nullable=False)
     description: Optional[str] = None
     price: float = Field(nullable=False)
     stock_quantity: int = Field(default=0, nullable=False)
     is_active: bool = Field(default=True)
-    company_id: Optional[str] = Field(default=None, foreign_key="company.id")
+    company_id: Optional[str] = Field(default=None, foreign_key="company.id", sa_type=IdType)
     limit: int = Field(default=10, nullable=False)
-    owner_id: str = Field(foreign_key="user.id", nullable=False)
+    owner_id: str = Field(foreign_key="user.id", nullable=False, index=True)
+    # Bumped on every update; PATCH requests must send the version they read
+    version: int = Field(default=1, nullable=False)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False, index=True)
+    # Set by DELETE; hidden from queries, archived by purge_deleted.py later
+    deleted_at: Optional[datetime] = None
  
  
  
     # added fee if more need to be posted
 
+class ProductNeighbours(SQLModel, table=True):
+    """Precomputed most similar products (build_similarity.py), most similar first."""
+    product_id: str = Field(primary_key=True, foreign_key="product.id", ondelete="CASCADE", sa_type=IdType)
+    neighbour_ids: List[str] = Field(default_factory=list, sa_column=Column(JSON))
+    computed_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
 class ProductCreate(SQLModel):
     name: str
     description: Optional[str] = None
@@ -33,6 +57,23 @@ class ProductRead(SQLModel):
     is_active: bool
     company_id: Optional[str] = None
     limit: int = 10  # Default limit for pagination
+    owner_id: str
+    created_at: datetime
+    version: int = 1
+
+class ProductDetail(ProductRead):
+    """A product with the related rows requested through `?expand=owner,company`."""
+    owner: Optional[UserPublic] = None
+    company: Optional[CompanyRead] = None
+
+class ProductResponse(SQLModel):
+    message: str
+    product: ProductRead
+
+class ProductPage(SQLModel):
+    """A page of the catalog, newest first; pass `next_cursor` as `after` for the next page."""
+    items: List[ProductDetail]
+    next_cursor: Optional[str] = None
 
 class ProductUpdate(SQLModel):
     name: Optional[str] = None
@@ -43,4 +84,40 @@ class ProductUpdate(SQLModel):
     company_id: Optional[str] = None
     limit: Optional[int] = None  # Allow updating the limit for pagination
 
+# Optional in partial updates, but the columns are NOT NULL: leave them out rather than send null
+NOT_NULL_FIELDS = ("name", "price", "stock_quantity", "is_active", "limit")
+
+class ProductPatch(ProductUpdate):
+    """Partial update: only the fields sent are changed, guarded by the version the client read."""
+    version: int
+
+    @field_validator(*NOT_NULL_FIELDS)
+    @classmethod
+    def not_null(cls, value):
+        if value is None:
+            raise ValueError("cannot be null")
+        return value
+
+class ProductBulkItem(ProductUpdate):
+    """One row of a bulk update; `version` is optional (omit it for last-writer-wins)."""
+    id: str
+    version: Optional[int] = None
+
+class ProductBulkUpdate(SQLModel):
+    items: List[ProductBulkItem]
+
+class ProductBulkDelete(SQLModel):
+    ids: List[str]
+
+class BulkItemResult(SQLModel):
+    id: str
+    status: str  # updated | deleted | not_found | forbidden | conflict | duplicate | invalid
+    version: Optional[int] = None
+
+class BulkResponse(SQLModel):
+    message: str
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
 #-------------------------------------------------------------------------------
\ No newline at end of file
@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import SQLModel
+
+
+class ProfileRead(SQLModel):
+    """Summary of a profiled request (core/profiling.py); the stacks are downloaded separately."""
+    id: str
+    at: datetime
+    method: str
+    path: str
+    status: Optional[int] = None
+    seconds: float
+    samples: int
+    interval_ms: float
+    db_seconds: float
+    queries: int
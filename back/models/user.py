@@ -2,7 +2,8 @@ from typing import List, Optional
 from sqlmodel import SQLModel, Field, Column
 from sqlalchemy import JSON
 from enum import Enum
-from .base import BaseModel
+from datetime import datetime
+from .base import BaseModel, deleted_index
 
 
 class UserRole(str, Enum):
@@ -13,6 +14,7 @@ class UserRole(str, Enum):
 
 class User(BaseModel, table=True):
     """Database model for a User."""
+    __table_args__ = (deleted_index("ix_user_deleted_at"),)
     
     # 🐛 FIX 1: Set ID as Optional[int] and Primary Key
     # Assuming BaseModel doesn't handle the primary key 'id' field
@@ -32,6 +34,9 @@ class User(BaseModel, table=True):
     # Multiple Roles list (for robust RBAC using JSON storage)
     roles: List[str] = Field(default_factory=list, sa_column=Column(JSON))
 
+    # Set by DELETE /users/{id}; hidden from queries, archived by purge_deleted.py later
+    deleted_at: Optional[datetime] = None
+
 
 # --- Schemas for CRUD operations ---
 
@@ -56,6 +61,13 @@ class UserRead(SQLModel):
     roles: List[str]
 
 
+class UserPublic(SQLModel):
+    """Public profile of a user, e.g. the distributor shown next to a product (no email)."""
+    id: int
+    username: str
+    full_name: Optional[str] = None
+
+
 class UserUpdate(SQLModel): 
     """Schema for updating user details (requires admin or user self-update)."""
     # NOTE: You may want to restrict role/roles updates to ADMIN only in your router logic.
@@ -65,6 +77,47 @@ class UserUpdate(SQLModel):
     roles: Optional[List[str]] = None
 
 
+class UserResponse(SQLModel):
+    """Schema for the user object returned by the auth endpoints."""
+    id: int
+    username: str
+    email: str
+    full_name: Optional[str] = None
+    role: UserRole
+    roles: List[str]
+    is_active: bool
+    subscription_active: bool
+    is_premium: bool
+
+
+class AuthResponse(SQLModel):
+    """Schema for signup/login responses: the user plus a fresh access token."""
+    message: str
+    user: UserResponse
+    access_token: str
+    token_type: str = "bearer"
+
+
+class UserBulkCreate(SQLModel):
+    """Accounts to provision at once (admins only), e.g. a hospital's staff."""
+    items: List[UserCreate]
+
+
+class UserBulkResult(SQLModel):
+    """Outcome for one requested account, in request order."""
+    index: int
+    email: str
+    status: str  # created | duplicate | email_taken | username_taken | conflict
+    id: Optional[int] = None
+
+
+class UserBulkResponse(SQLModel):
+    message: str
+    succeeded: int
+    failed: int
+    results: List[UserBulkResult]
+
+
 class UserLogin(SQLModel):
     """Schema for user login."""
     email: str
@@ -0,0 +1,36 @@
+# purge_deleted.py
+"""
+Archives soft-deleted products and users (see services/purge.py).
+
+    python purge_deleted.py                       # rows deleted more than SOFT_DELETE_RETENTION_DAYS ago
+    python purge_deleted.py --retention-days 7
+    python purge_deleted.py --every 3600          # keep running, once an hour
+
+Run it from cron or a scheduler, once for the whole deployment. Until it runs,
+products of a deleted user stay listed.
+"""
+import argparse
+import time
+
+from core.config import SOFT_DELETE_RETENTION_DAYS, PURGE_BATCH_SIZE
+from db.session import engine, create_db_and_tables
+from services.purge import purge
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archive and remove old soft-deleted rows.")
+    parser.add_argument("--retention-days", type=float, default=SOFT_DELETE_RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=PURGE_BATCH_SIZE, help="rows per transaction")
+    parser.add_argument("--every", type=float, default=0, help="repeat every N seconds")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    while True:
+        purge(engine, retention_days=args.retention_days, batch_size=args.batch_size)
+        if args.every <= 0:
+            break
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
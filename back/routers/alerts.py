@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, Query
+from datetime import datetime
+from typing import List
+from sqlmodel import Session, select
+
+from models.alert import StockAlert, StockThreshold, StockThresholdRead, StockThresholdUpdate, StockAlertRead
+from models.product import Product
+from models.user import User
+from db.session import get_session, get_read_session
+from db.write_queue import run_write
+from core.config import LOW_STOCK_DEFAULT_THRESHOLD
+from core.dependencies import require_single_role
+
+"""
+Low-stock settings and the current alerts of the signed-in distributor.
+Alerts are raised and emailed by check_stock.py, not by these endpoints.
+"""
+
+router = APIRouter(prefix="/alerts", tags=["alerts"])
+
+
+@router.get("/threshold", response_model=StockThresholdRead)
+def read_threshold(user: User = require_single_role("distributor"), session: Session = Depends(get_read_session)):
+    row = session.get(StockThreshold, str(user.id))
+    if row is None:
+        return StockThresholdRead(threshold=LOW_STOCK_DEFAULT_THRESHOLD, is_default=True)
+    return StockThresholdRead(threshold=row.threshold)
+
+
+@router.put("/threshold", response_model=StockThresholdRead)
+def update_threshold(
+    data: StockThresholdUpdate,
+    user: User = require_single_role("distributor"),
+    session: Session = Depends(get_session),
+):
+    """Products at or below this stock level are alerted; the next check re-evaluates the whole catalog"""
+    owner_id = str(user.id)
+
+    def write(session: Session):
+        row = session.get(StockThreshold, owner_id) or StockThreshold(owner_id=owner_id, threshold=data.threshold)
+        row.threshold = data.threshold
+        row.updated_at = datetime.utcnow()
+        session.add(row)
+        session.flush()
+        return StockThresholdRead(threshold=row.threshold)
+
+    return run_write(session, write)
+
+
+@router.get("/", response_model=List[StockAlertRead])
+def list_alerts(
+    limit: int = Query(100, ge=1, le=1000),
+    user: User = require_single_role("distributor"),
+    session: Session = Depends(get_read_session),
+):
+    """Products currently low, with their current stock, lowest first"""
+    rows = session.exec(
+        select(StockAlert, Product.name, Product.stock_quantity)
+        .join(Product, Product.id == StockAlert.product_id)
+        .where(StockAlert.owner_id == str(user.id))
+        .order_by(Product.stock_quantity, Product.name)
+        .limit(limit)
+    ).all()
+    return [
+        StockAlertRead(
+            product_id=alert.product_id,
+            product_name=name,
+            stock_quantity=stock,
+            threshold=alert.threshold,
+            created_at=alert.created_at,
+            delivered_at=alert.delivered_at,
+        )
+        for alert, name, stock in rows
+    ]
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+from sqlmodel import Session, select
+
+from models.audit import AuditLog, AuditRead
+from models.user import User
+from db.session import get_read_session
+from core.dependencies import require_single_role
+
+"""
+Read access to the audit log (admins only). Entries are written by
+services/audit.py and can't be changed or removed through the API.
+"""
+
+router = APIRouter(prefix="/audit", tags=["audit"])
+
+
+@router.get("/", response_model=List[AuditRead])
+def list_audit_entries(
+    entity: Optional[str] = None,
+    entity_id: Optional[str] = None,
+    actor_id: Optional[str] = None,
+    before: Optional[int] = Query(None, description="Id of the last entry received, for the next page"),
+    limit: int = Query(100, ge=1, le=1000),
+    user: User = require_single_role("admin"),
+    session: Session = Depends(get_read_session),
+):
+    """Newest first"""
+    statement = select(AuditLog)
+    if entity_id is not None:
+        statement = statement.where(AuditLog.entity_id == entity_id)
+    if entity is not None:
+        statement = statement.where(AuditLog.entity == entity)
+    if actor_id is not None:
+        statement = statement.where(AuditLog.actor_id == actor_id)
+    if before is not None:
+        statement = statement.where(AuditLog.id < before)
+    return session.exec(statement.order_by(AuditLog.id.desc()).limit(limit)).all()
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
-from typing import Dict, Any
 
 # Core security and utility functions are imported from the security layer
 from core.security import (
@@ -9,10 +8,20 @@ from core.security import (
     create_access_token, 
     get_current_user
 ) 
+from core.rate_limit import rate_limit, limiter
+from core.config import (
+    LOGIN_RATE_LIMIT_IP,
+    LOGIN_RATE_LIMIT_ACCOUNT,
+    LOGIN_RATE_LIMIT_ROUTE,
+    SIGNUP_RATE_LIMIT_IP,
+    SIGNUP_RATE_LIMIT_ROUTE,
+)
 
 # Data models
-from models.user import User, UserCreate, UserLogin
+from models.user import User, UserCreate, UserLogin, UserResponse, AuthResponse
+from models.common import MessageResponse
 from db.session import get_session
+from db.write_queue import run_write_async
 
 """
 This module defines the authentication endpoints for user signup, login, 
@@ -22,21 +31,11 @@ for password hashing and JWT management.
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-def _get_user_response_data(user: User) -> Dict[str, Any]:
-    """Helper function to format user data for response bodies."""
-    return {
-        "id": user.id,
-        "username": user.username,
-        "email": user.email,
-        "full_name": user.full_name,
-        "role": user.role,
-        "roles": user.roles,
-        "is_active": user.is_active,
-        "subscription_active": user.subscription_active,
-        "is_premium": user.is_premium,
-    }
-
-@router.post("/signup")
+@router.post(
+    "/signup",
+    response_model=AuthResponse,
+    dependencies=[rate_limit("auth.signup", per_ip=SIGNUP_RATE_LIMIT_IP, per_route=SIGNUP_RATE_LIMIT_ROUTE)],
+)
 async def signup(data: UserCreate, session: Session = Depends(get_session)):
     """
     Registers a new user after checking for unique email and username.
@@ -44,8 +43,9 @@ async def signup(data: UserCreate, session: Session = Depends(get_session)):
     """
     
     # Check for existing email
+    # Deleted accounts keep their email and username until they are purged
     existing_user_email = session.exec(
-        select(User).where(User.email == data.email)
+        select(User).where(User.email == data.email).execution_options(include_deleted=True)
     ).first()
     if existing_user_email:
         raise HTTPException(
@@ -55,7 +55,7 @@ async def signup(data: UserCreate, session: Session = Depends(get_session)):
     
     # Check for existing username
     existing_username = session.exec(
-        select(User).where(User.username == data.username)
+        select(User).where(User.username == data.username).execution_options(include_deleted=True)
     ).first()
     if existing_username:
         raise HTTPException(
@@ -77,28 +77,39 @@ async def signup(data: UserCreate, session: Session = Depends(get_session)):
         roles=[data.role.value] 
     )
     
-    session.add(new_user)
-    session.commit()
-    session.refresh(new_user)
+    def write(session: Session):
+        session.add(new_user)
+        session.flush()
+        return new_user
+
+    new_user = await run_write_async(session, write)
     
     # Generate token
     access_token = create_access_token(data={"sub": new_user.email})
     
     return {
         "message": "User created successfully",
-        "user": _get_user_response_data(new_user),
+        "user": new_user,
         "access_token": access_token,
         "token_type": "bearer"
     }
 
 
-@router.post("/login")
+@router.post(
+    "/login",
+    response_model=AuthResponse,
+    dependencies=[rate_limit("auth.login", per_ip=LOGIN_RATE_LIMIT_IP, per_route=LOGIN_RATE_LIMIT_ROUTE)],
+)
 async def login(data: UserLogin, session: Session = Depends(get_session)):
     """
     Authenticates user credentials. 
     Returns the user data and a JWT token on success.
     """
     
+    # Per-account throttle (spread-out credential stuffing against one email);
+    # checked before the lookup and the bcrypt verification
+    limiter.hit(f"auth.login:account:{data.email.strip().lower()}", LOGIN_RATE_LIMIT_ACCOUNT)
+
     # Find user by email
     user = session.exec(select(User).where(User.email == data.email)).first()
     
@@ -120,21 +131,21 @@ async def login(data: UserLogin, session: Session = Depends(get_session)):
     
     return {
         "message": "Login successful",
-        "user": _get_user_response_data(user),
+        "user": user,
         "access_token": access_token,
         "token_type": "bearer"
     }
 
 
-@router.get("/me")
+@router.get("/me", response_model=UserResponse)
 async def read_current_user(user: User = Depends(get_current_user)):
     """
     Retrieves the current authenticated user's profile using the JWT.
     """
-    return _get_user_response_data(user)
+    return user
 
 
-@router.post("/logout")
+@router.post("/logout", response_model=MessageResponse)
 async def logout():
     """
     Handles client-side token removal. 
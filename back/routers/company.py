@@ -0,0 +1,103 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Optional
+from sqlmodel import Session, select
+
+from models.company import Company, CompanyRead, CompanyCreate, CompanyResponse, NearbyCompany
+from models.user import User
+from db.session import get_session, get_read_session
+from db.write_queue import run_write
+from db.projections import company_rows
+from core.coalesce import SingleFlight, query_key
+from core.responses import FastJSONResponse
+from core.dependencies import require_any_role
+from services.autocomplete import track_company_names
+from services.geo import geocode, nearest_companies
+
+"""
+Company endpoints. Company pages are looked up by every product page that
+shows a supplier, so concurrent identical lookups are coalesced. /nearest finds
+suppliers around a point through the spatial index in services/geo.py.
+"""
+
+router = APIRouter(prefix="/companies", tags=["companies"])
+
+_listing_reads = SingleFlight("companies.list")
+_detail_reads = SingleFlight("companies.detail")
+
+
+@router.get("/", response_model=List[CompanyRead])
+def list_companies(
+    after: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    session: Session = Depends(get_read_session),
+):
+    """Companies by name; pass the last name received as `after` for the next page"""
+    companies = _listing_reads.do(query_key(session, after, limit), lambda: _load_companies(session, after, limit))
+    return FastJSONResponse(companies)
+
+
+def _load_companies(session: Session, after: Optional[str], limit: int) -> List:
+    statement = company_rows.select()
+    if after is not None:
+        statement = statement.where(Company.name > after)
+    return company_rows.records(session.exec(statement.order_by(Company.name).limit(limit)))
+
+
+@router.post("/create", response_model=CompanyResponse)
+def create_company(
+    data: CompanyCreate,
+    user: User = require_any_role(["distributor", "admin"]),
+    session: Session = Depends(get_session),
+):
+    def write(session: Session):
+        if session.exec(select(Company.id).where(Company.name == data.name)).first():
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Company name already registered")
+        # Geocoded from its location on flush unless coordinates are given (services/geo.py)
+        company = Company(**data.model_dump())
+        session.add(company)
+        session.flush()
+        track_company_names(session, company.name)
+        return CompanyRead.model_validate(company)
+
+    company = run_write(session, write)
+    return {"message": "Company created successfully", "company": company}
+
+
+@router.get("/nearest", response_model=List[NearbyCompany])
+def nearest(
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    near: Optional[str] = Query(None, description="A place name, instead of lat/lng"),
+    product: Optional[str] = Query(None, description="Only companies with this product (exact name) in stock"),
+    radius_km: float = Query(500, gt=0, le=20000),
+    limit: int = Query(10, ge=1, le=50),
+    session: Session = Depends(get_read_session),
+):
+    """Closest companies first, each with its distance"""
+    if lat is None or lng is None:
+        point = geocode(near)
+        if point is None:
+            raise HTTPException(status_code=400, detail="Give lat and lng, or a known place as near")
+        lat, lng = point
+    found = nearest_companies(session, lat, lng, limit, radius_km, product)
+    companies = {
+        company.id: company
+        for company in session.exec(select(Company).where(Company.id.in_([company_id for company_id, _ in found])))
+    }
+    return [
+        NearbyCompany(**CompanyRead.model_validate(companies[company_id]).model_dump(), distance_km=round(distance, 2))
+        for company_id, distance in found
+        if company_id in companies
+    ]
+
+
+@router.get("/{company_id}", response_model=CompanyRead)
+def read_company(company_id: str, session: Session = Depends(get_read_session)):
+    return _detail_reads.do(query_key(session, company_id), lambda: _load_company(session, company_id))
+
+
+def _load_company(session: Session, company_id: str) -> CompanyRead:
+    company = session.get(Company, company_id)
+    if not company:
+        raise HTTPException(status_code=404, detail="Company not found")
+    return CompanyRead.model_validate(company)
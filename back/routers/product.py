@@ -1,56 +1,470 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from models.product import Product, ProductCreate
-from models.user import User
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from models.product import (
+    Product, ProductCreate, ProductPatch, ProductRead, ProductDetail, ProductResponse, ProductPage,
+    ProductBulkUpdate, ProductBulkDelete, BulkItemResult, BulkResponse, NOT_NULL_FIELDS,
+)
+from models.common import MessageResponse
+from models.user import User, UserPublic
+from models.company import CompanyRead
+from sqlmodel import Session, select, update
+from sqlalchemy import bindparam
 
-from db.session import get_session
+from db.session import get_session, get_read_session
+from db.write_queue import run_write
+from db.loaders import RequestLoaders, get_loaders
+from db.projections import product_rows
 from core.dependencies import require_single_role
 from core.security import get_current_user
+from core.config import BULK_MAX_ITEMS, CHANGE_FEED_HEARTBEAT_SECONDS, CHANGE_FEED_MAX_FILTERS
+from core.coalesce import SingleFlight, query_key
+from core.responses import FastJSONResponse
+from services import autocomplete
+from services.autocomplete import track_product_names
+from services.audit import record_statement
+from services.change_feed import CREATED, UPDATED, DELETED, broker, sse_stream, track_product_change
+from services.similarity import related_products
 
 router = APIRouter(prefix="/products", tags=["products"])
 
-@router.post("/create")
+# Concurrent identical catalog reads share one query
+_listing_reads = SingleFlight("products.list")
+_detail_reads = SingleFlight("products.detail")
+
+
+def _is_owner(product: Product, user: User) -> bool:
+    # owner_id is a text column holding the integer user id
+    return user.role == "distributor" and str(product.owner_id) == str(user.id)
+
+
+# Stay well below SQLite's limit on bound parameters per statement
+_IN_CHUNK = 500
+
+
+def _chunks(items: List, size: int = _IN_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _load_ownership(session: Session, ids: List[str]) -> Dict[str, Tuple[str, int, str, Optional[str]]]:
+    """id -> (owner_id, version, name, company_id) for every existing product in `ids`, one IN query per chunk"""
+    found = {}
+    for chunk in _chunks(ids):
+        rows = session.exec(
+            select(Product.id, Product.owner_id, Product.version, Product.name, Product.company_id)
+            .where(Product.id.in_(chunk))
+        )
+        for product_id, owner_id, version, name, company_id in rows:
+            found[product_id] = (str(owner_id), version, name, company_id)
+    return found
+
+
+def _check_bulk_request(user: User, count: int) -> None:
+    if user.role != "distributor":
+        raise HTTPException(status_code=403, detail="Only distributors can modify products.")
+    if count > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_ITEMS} items per request.")
+
+
+def _bulk_response(action: str, results: List[BulkItemResult]) -> Dict:
+    succeeded = sum(1 for r in results if r.status == action)
+    return {
+        "message": f"{succeeded} product(s) {action}",
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
+
+_EXPANDABLE = ("company", "owner")
+
+
+def _parse_expand(expand: Optional[str]) -> Tuple[str, ...]:
+    """`?expand=owner,company` -> ("company", "owner")"""
+    if not expand:
+        return ()
+    fields = {field.strip() for field in expand.split(",") if field.strip()}
+    unknown = fields.difference(_EXPANDABLE)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot expand {', '.join(sorted(unknown))}; expandable: {', '.join(_EXPANDABLE)}.",
+        )
+    return tuple(sorted(fields))
+
+
+def _with_relations(products: List[Product], expand: Tuple[str, ...], loaders: RequestLoaders) -> List[ProductDetail]:
+    """Serialize products, attaching owners/companies loaded with one query per relation"""
+    owners = loaders.users.load_many(p.owner_id for p in products) if "owner" in expand else {}
+    companies = loaders.companies.load_many(p.company_id for p in products) if "company" in expand else {}
+    details = []
+    for product in products:
+        related = {}
+        if product.owner_id in owners:
+            related["owner"] = UserPublic.model_validate(owners[product.owner_id])
+        if product.company_id in companies:
+            related["company"] = CompanyRead.model_validate(companies[product.company_id])
+        details.append(ProductDetail.model_validate(product, update=related))
+    return details
+
+
+@router.get("/", response_model=ProductPage)
+def list_products(
+    after: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    owner_id: Optional[str] = None,
+    company_id: Optional[str] = None,
+    expand: Optional[str] = Query(None, description="Comma-separated relations to include: owner, company"),
+    session: Session = Depends(get_read_session),
+    loaders: RequestLoaders = Depends(get_loaders),
+):
+    """
+    Active products, newest first. Ids are time-ordered, so paging continues
+    from the last id seen (`after`) instead of an OFFSET that rescans skipped rows.
+    """
+    fields = _parse_expand(expand)
+    key = query_key(session, after, limit, owner_id, company_id, fields)
+    page = _listing_reads.do(key, lambda: _load_page(session, loaders, after, limit, owner_id, company_id, fields))
+    # Without expand the items are projected rows (db/projections.py), ready to serialize as they are
+    return page if fields else FastJSONResponse(page)
+
+
+def _load_page(session: Session, loaders: RequestLoaders, after: Optional[str], limit: int,
+               owner_id: Optional[str], company_id: Optional[str], expand: Tuple[str, ...]) -> Dict:
+    # Related rows need the Product instances; a plain page only needs its columns
+    statement = select(Product) if expand else product_rows.select()
+    statement = statement.where(Product.is_active == True)  # noqa: E712
+    if owner_id is not None:
+        statement = statement.where(Product.owner_id == owner_id)
+    if company_id is not None:
+        statement = statement.where(Product.company_id == company_id)
+    if after is not None:
+        statement = statement.where(Product.id < after)
+    # One extra row tells whether there is a next page
+    products = session.exec(statement.order_by(Product.id.desc()).limit(limit + 1)).all()
+
+    next_cursor = products[limit - 1].id if len(products) > limit else None
+    items = _with_relations(products[:limit], expand, loaders) if expand else product_rows.records(products[:limit])
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/changes")
+async def product_changes(
+    product_id: List[str] = Query([]),
+    company_id: List[str] = Query([]),
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Server-Sent Events stream of product changes (created, updated, deleted),
+    for the given products and/or companies, or for everything if neither is
+    given. Browsers' EventSource reconnects with Last-Event-ID by itself; a
+    "reset" event means changes were missed and the client should re-read.
+    """
+    if len(product_id) + len(company_id) > CHANGE_FEED_MAX_FILTERS:
+        raise HTTPException(status_code=400, detail=f"Watch at most {CHANGE_FEED_MAX_FILTERS} products and companies")
+    subscription = broker.subscribe(product_id, company_id, last_event_id)
+    return StreamingResponse(
+        sse_stream(subscription, CHANGE_FEED_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        # Keep proxies from caching or buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{product_id}", response_model=ProductDetail)
+def read_product(
+    product_id: str,
+    expand: Optional[str] = Query(None, description="Comma-separated relations to include: owner, company"),
+    session: Session = Depends(get_read_session),
+    loaders: RequestLoaders = Depends(get_loaders),
+):
+    fields = _parse_expand(expand)
+    key = query_key(session, product_id, fields)
+    return _detail_reads.do(key, lambda: _load_product(session, loaders, product_id, fields))
+
+
+def _load_product(session: Session, loaders: RequestLoaders, product_id: str, expand: Tuple[str, ...]) -> ProductDetail:
+    product = session.get(Product, product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return _with_relations([product], expand, loaders)[0]
+
+
+@router.get("/{product_id}/related", response_model=List[ProductRead])
+def read_related_products(
+    product_id: str,
+    limit: int = Query(6, ge=1, le=20),
+    session: Session = Depends(get_read_session),
+):
+    """Most similar products, precomputed by build_similarity.py (empty until it has run)"""
+    related = related_products(session, product_id, limit)
+    if related is None:
+        if not session.get(Product, product_id):
+            raise HTTPException(status_code=404, detail="Product not found")
+        return []
+    return related
+
+
+@router.post("/create", response_model=ProductResponse)
 def create_product(data: ProductCreate, user: User = require_single_role("distributor"), session: Session = Depends(get_session)):
     if user.role != "distributor":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only distributors can post products.")
 
-    product = Product(**data.model_dump(), owner_id=user.id)
-    session.add(product)
-    session.commit()
-    session.refresh(product)
+    owner_id = str(user.id)
+
+    def write(session: Session):
+        product = Product(**data.model_dump(), owner_id=owner_id)
+        session.add(product)
+        session.flush()
+        track_product_names(session, product.name)
+        created = ProductRead.model_validate(product)
+        track_product_change(session, CREATED, created.id, created.company_id, created.model_dump(mode="json"))
+        return created
 
+    product = run_write(session, write)
     return {"message": "Product created successfully", "product": product}
 
 
-@router.put("/{product_id}")
+@router.post("/bulk-update", response_model=BulkResponse)
+def bulk_update_products(data: ProductBulkUpdate, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+    """
+    Update many products in one transaction (e.g. a nightly price/stock sync).
+    Ownership and versions are checked for the whole batch with one query,
+    then rows changing the same set of columns are written together with one
+    executemany UPDATE. Returns a result per item, in request order.
+    """
+    _check_bulk_request(user, len(data.items))
+    owner_id = str(user.id)
+    return run_write(session, lambda session: _bulk_update(session, data, owner_id))
+
+
+def _bulk_update(session: Session, data: ProductBulkUpdate, owner_id: str) -> Dict:
+    existing = _load_ownership(session, list({item.id for item in data.items}))
+
+    results: List[BulkItemResult] = []
+    seen = set()
+    # id -> (company_id, changes) for the change feed
+    changed: Dict[str, Tuple[Optional[str], Dict]] = {}
+    # (changed columns, guarded by version?) -> rows to write with one statement
+    groups: Dict[Tuple[Tuple[str, ...], bool], List[Dict]] = {}
+    for item in data.items:
+        if item.id in seen:
+            results.append(BulkItemResult(id=item.id, status="duplicate"))
+            continue
+        seen.add(item.id)
+
+        changes = item.model_dump(exclude_unset=True, exclude={"id", "version"})
+        if any(changes.get(field, "") is None for field in NOT_NULL_FIELDS):
+            # Would fail the whole executemany on a NOT NULL column
+            results.append(BulkItemResult(id=item.id, status="invalid"))
+            continue
+        if item.id not in existing:
+            results.append(BulkItemResult(id=item.id, status="not_found"))
+            continue
+        row_owner, row_version, row_name, row_company = existing[item.id]
+        if row_owner != owner_id:
+            results.append(BulkItemResult(id=item.id, status="forbidden"))
+            continue
+        if item.version is not None and item.version != row_version:
+            results.append(BulkItemResult(id=item.id, status="conflict", version=row_version))
+            continue
+
+        if "name" in changes or "is_active" in changes:
+            track_product_names(session, row_name, changes.get("name"))
+        params = {f"b_{key}": value for key, value in changes.items()}
+        params["b_id"] = item.id
+        guarded = item.version is not None
+        if guarded:
+            params["b_version"] = item.version
+        groups.setdefault((tuple(sorted(changes)), guarded), []).append(params)
+        changed[item.id] = (changes.get("company_id", row_company), changes)
+        results.append(BulkItemResult(id=item.id, status="updated", version=row_version + 1))
+
+    table = Product.__table__
+    now = datetime.utcnow()
+    for (columns, guarded), rows in groups.items():
+        statement = (
+            table.update()
+            # A Core statement: the soft-delete filter must be added by hand
+            .where(table.c.id == bindparam("b_id"), table.c.deleted_at.is_(None))
+            .values({column: bindparam(f"b_{column}") for column in columns})
+            .values(version=table.c.version + 1, updated_at=now)
+        )
+        if guarded:
+            statement = statement.where(table.c.version == bindparam("b_version"))
+        result = session.connection().execute(statement, rows)
+        if guarded and result.rowcount != len(rows):
+            # A concurrent writer got in between the ownership read and this
+            # write; find out which rows were skipped
+            _mark_conflicts(session, rows, results)
+
+    # Only rows that were really written (conflicts are known by now)
+    for result in results:
+        if result.status == "updated":
+            company_id, changes = changed[result.id]
+            track_product_change(session, UPDATED, result.id, company_id, {**changes, "id": result.id, "version": result.version})
+            record_statement(session, "update", "product", result.id, {**changes, "version": result.version})
+    return _bulk_response("updated", results)
+
+
+def _mark_conflicts(session: Session, rows: List[Dict], results: List[BulkItemResult]) -> None:
+    expected = {row["b_id"]: row["b_version"] + 1 for row in rows}
+    current = _load_ownership(session, list(expected))
+    for result in results:
+        if result.id in expected and result.status == "updated":
+            version = current.get(result.id, (None, None, None, None))[1]
+            if version != expected[result.id]:
+                result.status = "conflict"
+                result.version = version
+
+
+@router.post("/bulk-delete", response_model=BulkResponse)
+def bulk_delete_products(data: ProductBulkDelete, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+    """Delete many products in one transaction; per-item results in request order"""
+    _check_bulk_request(user, len(data.ids))
+    owner_id = str(user.id)
+    return run_write(session, lambda session: _bulk_delete(session, data, owner_id))
+
+
+def _bulk_delete(session: Session, data: ProductBulkDelete, owner_id: str) -> Dict:
+    existing = _load_ownership(session, list(set(data.ids)))
+
+    results: List[BulkItemResult] = []
+    to_delete: List[str] = []
+    seen = set()
+    for product_id in data.ids:
+        if product_id in seen:
+            results.append(BulkItemResult(id=product_id, status="duplicate"))
+            continue
+        seen.add(product_id)
+
+        if product_id not in existing:
+            results.append(BulkItemResult(id=product_id, status="not_found"))
+        elif existing[product_id][0] != owner_id:
+            results.append(BulkItemResult(id=product_id, status="forbidden"))
+        else:
+            to_delete.append(product_id)
+            track_product_names(session, existing[product_id][2])
+            track_product_change(session, DELETED, product_id, existing[product_id][3], {"id": product_id})
+            record_statement(session, "delete", "product", product_id)
+            results.append(BulkItemResult(id=product_id, status="deleted"))
+
+    # Soft delete (db/soft_delete.py); purge_deleted.py removes the rows later
+    now = datetime.utcnow()
+    for chunk in _chunks(to_delete):
+        session.exec(
+            update(Product)
+            .where(Product.id.in_(chunk), Product.owner_id == owner_id)
+            .values(deleted_at=now, updated_at=now, version=Product.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+    return _bulk_response("deleted", results)
+
+
+@router.put("/{product_id}", response_model=ProductResponse)
 def update_product(product_id: str, data: ProductCreate, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
 
-    product = session.get(Product, product_id)
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
+    def write(session: Session):
+        product = session.get(Product, product_id)
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
 
-    if user.role != "distributor" or product.owner_id != user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to edit this product")
+        if not _is_owner(product, user):
+            raise HTTPException(status_code=403, detail="Not authorized to edit this product")
+
+        track_product_names(session, product.name, data.name)
+        for key, value in data.model_dump().items():
+            setattr(product, key, value)
+        product.version += 1
+        product.updated_at = datetime.utcnow()
+
+        session.add(product)
+        session.flush()
+        updated = ProductRead.model_validate(product)
+        track_product_change(session, UPDATED, updated.id, updated.company_id, updated.model_dump(mode="json"))
+        return updated
 
-    for key, value in data.model_dump().items():
-        setattr(product, key, value)
+    product = run_write(session, write)
+    return {"message": "Product updated successfully", "product": product}
+
+
+@router.patch("/{product_id}", response_model=ProductResponse)
+def patch_product(product_id: str, data: ProductPatch, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+    """
+    Partial update with optimistic concurrency. Only the fields sent are
+    written, in a single UPDATE ... RETURNING that also checks ownership and
+    that the row is still at the `version` the client read. If someone else
+    updated it first, nothing is written and 409 is returned with the current
+    version so the client can re-read and retry.
+    """
+    if user.role != "distributor":
+        raise HTTPException(status_code=403, detail="Not authorized to edit this product")
 
-    session.add(product)
-    session.commit()
-    session.refresh(product)
+    owner_id = str(user.id)
+    product = run_write(session, lambda session: _patch(session, product_id, data, owner_id))
     return {"message": "Product updated successfully", "product": product}
 
 
-@router.delete("/{product_id}")
+def _patch(session: Session, product_id: str, data: ProductPatch, owner_id: str) -> ProductRead:
+    changes = data.model_dump(exclude_unset=True, exclude={"version"})
+    old_name = None
+    if "name" in changes and autocomplete.is_running():
+        # The index needs the name being replaced, and SQLite's RETURNING only has the new
+        # values (a subquery in it sees the updated row too): a rename costs one PK lookup
+        old_name = session.exec(select(Product.name).where(Product.id == product_id)).first()
+    statement = (
+        update(Product)
+        .where(
+            Product.id == product_id,
+            Product.owner_id == owner_id,
+            Product.version == data.version,
+        )
+        .values(**changes, version=Product.version + 1, updated_at=datetime.utcnow())
+        .returning(Product)
+        .execution_options(synchronize_session=False)
+    )
+    product = session.exec(statement).scalars().first()
+
+    if product is None:
+        # Nothing matched (so nothing was written): work out why, only on the failure path
+        current = session.get(Product, product_id)
+        if not current:
+            raise HTTPException(status_code=404, detail="Product not found")
+        if str(current.owner_id) != owner_id:
+            raise HTTPException(status_code=403, detail="Not authorized to edit this product")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Product was modified by someone else (current version {current.version}). Reload and retry.",
+        )
+
+    if "name" in changes or "is_active" in changes:
+        track_product_names(session, old_name, product.name)
+    # Serialize from the RETURNING row now; after commit it would be expired and re-selected
+    patched = ProductRead.model_validate(product)
+    track_product_change(session, UPDATED, patched.id, patched.company_id, patched.model_dump(mode="json"))
+    record_statement(session, "update", "product", patched.id, {**changes, "version": patched.version})
+    return patched
+
+
+@router.delete("/{product_id}", response_model=MessageResponse)
 def delete_product( product_id: str, user: User = Depends(get_current_user), session: Session = Depends(get_session)):
 
-    product = session.get(Product, product_id)
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
+    def write(session: Session):
+        product = session.get(Product, product_id)
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+
+        if not _is_owner(product, user):
+            raise HTTPException(status_code=403, detail="Not authorized to delete this product")
 
-    if user.role != "distributor" or product.owner_id != user.id:
-        raise HTTPException(status_code=403, detail="Not authorized to delete this product")
+        track_product_names(session, product.name)
+        track_product_change(session, DELETED, product.id, product.company_id, {"id": product.id})
+        # Soft delete: instant, keeps the row for order history; purge_deleted.py archives it later
+        product.deleted_at = product.updated_at = datetime.utcnow()
+        product.version += 1
+        session.add(product)
+        session.flush()
 
-    session.delete(product)
-    session.commit()
+    run_write(session, write)
     return {"message": "Product deleted successfully"}
\ No newline at end of file
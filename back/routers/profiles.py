@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from typing import List
+
+from models.profile import ProfileRead
+from models.user import User
+from core.dependencies import require_single_role
+from core.profiling import profile_store
+
+"""
+Download of request profiles (admins only). Profiles are taken by
+core/profiling.py; each worker process writes to the same PROFILE_DIR.
+"""
+
+router = APIRouter(prefix="/profiles", tags=["profiling"])
+
+
+@router.get("/", response_model=List[ProfileRead])
+def list_profiles(user: User = require_single_role("admin")):
+    """Newest first"""
+    return profile_store.list()
+
+
+@router.get("/{profile_id}")
+def download_profile(profile_id: str, user: User = require_single_role("admin")):
+    """Folded stacks, for flamegraph.pl, speedscope or inferno"""
+    path = profile_store.folded_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.folded")
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Query
+from typing import List, Optional
+
+from models.common import Suggestion
+from services import autocomplete
+
+"""
+Search helpers for the frontend's search box. Type-ahead is answered from the
+in-memory index in services/autocomplete.py and never touches the database.
+"""
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("/autocomplete", response_model=List[Suggestion])
+async def autocomplete_names(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=autocomplete.TOP_K),
+    kind: Optional[str] = Query(None, pattern="^(product|company)$"),
+):
+    """Product and company names with a word starting with `q`, most common first"""
+    return [
+        Suggestion(text=text, kind=entry_kind, weight=weight)
+        for entry_kind, text, weight in autocomplete.index.search(q, limit, kind)
+    ]
@@ -1,14 +1,35 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, update
+from typing import Dict, List, Set, Tuple
 
-from models.user import User, UserRead, UserUpdate
-from core.dependencies import require_any_role
-from core.security import get_current_user
+from core.config import BULK_MAX_ITEMS, PROVISION_CHUNK_SIZE, PROVISION_HASH_WORKERS
+from core.responses import FastJSONResponse
+from db.projections import user_rows
+from models.common import MessageResponse
+from models.product import Product
+from models.user import User, UserCreate, UserRead, UserUpdate, UserBulkCreate, UserBulkResult, UserBulkResponse
+from core.dependencies import require_any_role, require_single_role
+from core.security import get_current_user, get_password_hash
 from db.session import get_session
+from db.write_queue import run_write, run_write_async
+from services.audit import record_statement
+from services.autocomplete import track_product_names
+from services.change_feed import DELETED, track_product_change
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+# Stay well below SQLite's limit on bound parameters per statement
+_IN_CHUNK = 500
+
+
+def _chunks(items: List, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
 
 @router.get("/me", response_model=UserRead)
 async def read_user_me(current_user: User = Depends(get_current_user)):
@@ -22,28 +43,189 @@ async def update_user(
     session: Session = Depends(get_session),
     authorized_user: User = require_any_role(["distributor"])  # FIXED
 ):
-    user_to_update = session.get(User, user_id)
+    update_data = user_data.model_dump(exclude_unset=True)  # FIX for SQLModel/Pydantic v1
 
-    if not user_to_update:
-        raise HTTPException(status_code=404, detail="User not found")
+    def write(session: Session):
+        user_to_update = session.get(User, user_id)
+
+        if not user_to_update:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        for key, value in update_data.items():
+            setattr(user_to_update, key, value)
+
+        session.add(user_to_update)
+        session.flush()
+        return UserRead.model_validate(user_to_update)
+
+    return await run_write_async(session, write)
+
+@router.delete("/{user_id}", response_model=MessageResponse)
+async def delete_user(
+    user_id: str,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Soft delete: the account disappears (and can't sign in) at once, and so do
+    its products. Everything is archived later by purge_deleted.py.
+    """
+    if str(current_user.id) != user_id and current_user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this user")
+
+    def write(session: Session):
+        user = session.get(User, user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        now = datetime.utcnow()
+        user.deleted_at = now
+        user.is_active = False
+        session.add(user)
+        session.flush()
+
+        # Its products in one statement, as purge_deleted.py's cascade does
+        hidden = session.exec(
+            update(Product)
+            .where(Product.owner_id == str(user.id), Product.deleted_at.is_(None))
+            .values(deleted_at=now, updated_at=now, version=Product.version + 1)
+            .returning(Product.id, Product.company_id, Product.name)
+            .execution_options(synchronize_session=False)
+        ).all()
+        for product_id, company_id, name in hidden:
+            track_product_names(session, name)
+            track_product_change(session, DELETED, product_id, company_id, {"id": product_id})
+            record_statement(session, "delete", "product", product_id)
+
+    await run_write_async(session, write)
+    return {"message": "User deleted successfully"}
+
+
+@router.post("/bulk-create", response_model=UserBulkResponse)
+def bulk_create_users(
+    data: UserBulkCreate,
+    admin: User = require_single_role("admin"),
+    session: Session = Depends(get_session),
+):
+    """
+    Provision many accounts at once (e.g. a hospital's staff). Emails and
+    usernames are checked for the whole batch with one query, passwords are
+    hashed in parallel, and accounts are inserted PROVISION_CHUNK_SIZE per
+    transaction. Returns a result per item, in request order; rejected items
+    don't stop the others.
+    """
+    if len(data.items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_ITEMS} items per request.")
+
+    items = data.items
+    results = [UserBulkResult(index=i, email=item.email, status="created") for i, item in enumerate(items)]
+    _check_unique(session, items, results, list(range(len(items))))
+
+    accepted = [i for i, result in enumerate(results) if result.status == "created"]
+    hashes = _hash_passwords([items[i].password for i in accepted])
+    rows = {i: _new_user(items[i], hashed) for i, hashed in zip(accepted, hashes)}
+    for chunk in _chunks(accepted, PROVISION_CHUNK_SIZE):
+        _insert_users(session, chunk, rows, items, results)
+
+    succeeded = sum(1 for result in results if result.status == "created")
+    return {
+        "message": f"{succeeded} user(s) created",
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
+
+
+def _taken(session: Session, items: List[UserCreate]) -> Tuple[Set[str], Set[str]]:
+    """Emails and usernames of `items` already in use, one query per chunk"""
+    emails, usernames = set(), set()
+    for chunk in _chunks(items, _IN_CHUNK):
+        rows = session.exec(
+            select(User.email, User.username)
+            .where(or_(User.email.in_([item.email for item in chunk]),
+                       User.username.in_([item.username for item in chunk])))
+            # Deleted accounts keep their email and username until they are purged, as at signup
+            .execution_options(include_deleted=True)
+        )
+        for email, username in rows:
+            emails.add(email)
+            usernames.add(username)
+    return emails, usernames
+
+
+def _check_unique(session: Session, items: List[UserCreate], results: List[UserBulkResult], indexes: List[int]) -> None:
+    taken_emails, taken_usernames = _taken(session, [items[i] for i in indexes])
+    seen_emails, seen_usernames = set(), set()
+    for i in indexes:
+        item = items[i]
+        if item.email in seen_emails or item.username in seen_usernames:
+            results[i].status = "duplicate"
+        elif item.email in taken_emails:
+            results[i].status = "email_taken"
+        elif item.username in taken_usernames:
+            results[i].status = "username_taken"
+        seen_emails.add(item.email)
+        seen_usernames.add(item.username)
+
+
+def _hash_passwords(passwords: List[str]) -> List[str]:
+    if len(passwords) < 2 or PROVISION_HASH_WORKERS <= 1:
+        return [get_password_hash(password) for password in passwords]
+    # bcrypt releases the GIL while hashing, so threads hash on every core
+    workers = min(PROVISION_HASH_WORKERS, len(passwords))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash") as pool:
+        return list(pool.map(get_password_hash, passwords))
+
+
+def _new_user(item: UserCreate, hashed_password: str) -> Dict:
+    return {
+        "username": item.username,
+        "email": item.email,
+        "full_name": item.full_name,
+        "role": item.role,
+        "is_active": True,
+        "hashed_password": hashed_password,
+        "roles": [item.role.value],
+    }
 
-    update_data = user_data.model_dump(exclude_unset=True)  # FIX for SQLModel/Pydantic v1
 
-    for key, value in update_data.items():
-        setattr(user_to_update, key, value)
+def _insert_users(session: Session, indexes: List[int], rows: Dict[int, Dict], items: List[UserCreate],
+                  results: List[UserBulkResult], retry: bool = True) -> None:
+    def write(session: Session):
+        table = User.__table__
+        # One multi-row INSERT (a flush of User objects inserts them one at a time to learn their ids).
+        # SQLite doesn't promise RETURNING in row order, so ids are matched back by email.
+        returned = session.connection().execute(
+            insert(table).returning(table.c.email, table.c.id), [rows[i] for i in indexes],
+        ).all()
+        ids = dict(returned)
+        for i in indexes:
+            record_statement(session, "insert", "user", ids[rows[i]["email"]], rows[i])
+        return [ids[rows[i]["email"]] for i in indexes]
 
-    session.add(user_to_update)
-    session.commit()
-    session.refresh(user_to_update)
+    try:
+        ids = run_write(session, write)
+    except IntegrityError:
+        # Someone signed up with one of these since the check: check this chunk again and retry the rest once
+        if retry:
+            _check_unique(session, items, results, indexes)
+            remaining = [i for i in indexes if results[i].status == "created"]
+            if remaining:
+                _insert_users(session, remaining, rows, items, results, retry=False)
+        else:
+            for i in indexes:
+                results[i].status = "conflict"
+        return
+    for i, user_id in zip(indexes, ids):
+        results[i].id = user_id
 
-    return user_to_update
 
 @router.get("/", response_model=List[UserRead])
 async def read_all_users(
     session: Session = Depends(get_session),
     authorized_user: User = require_any_role(["distributor"])
 ):
-    return session.exec(select(User)).all()
+    # Plain rows serialized as they are (db/projections.py), not User instances re-validated into UserRead
+    return FastJSONResponse(user_rows.records(session.exec(user_rows.select())))
 
 
 # """this module handles user profile updates and retrieval using Supabase."""
@@ -56,7 +238,7 @@ async def read_all_users(
 # #     else:
 # #         user.is_premium = False
 # from fastapi import APIRouter, Depends, HTTPException, status
-# from sqlmodel import Session, select
+# from sqlmodel import Session, select, update
 # from typing import List
 
 # # Assuming the import path for the models and dependencies
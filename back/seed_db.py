@@ -1,17 +1,50 @@
 # seed_db.py
+"""
+Seeds the database.
+
+    python seed_db.py
+        Creates the three fixed accounts below (admin, distributor, customer).
+
+    python seed_db.py --users 100000 --companies 2000 --products 1000000
+        Also generates synthetic users, companies and products for performance
+        testing. Every generated account shares one password (--password, hashed
+        once); pass --unique-passwords to give each account "<password>-<id>",
+        hashed in parallel across --workers processes.
+
+Generated data roughly follows what the real catalog looks like: ~8% of users are
+distributors, product counts per distributor are heavy-tailed (a few large
+suppliers, many small ones), prices are log-normal around a per-category base
+price, ~10% of products are out of stock and creation times are spread over the
+last year. Rows are generated --chunk-size at a time and each chunk is
+bulk-inserted (executemany, one transaction) before the next is built, so memory
+stays flat at any volume.
+"""
+import argparse
+import math
 import os
+import random
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import accumulate, islice
+from typing import Any, Dict, Iterable, Iterator, List
+
 from sqlmodel import Session, select, SQLModel
-from typing import List, Dict, Any
+from sqlalchemy import func, insert
 
 # Ensure project root is in the path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # --- IMPORTANT IMPORTS ---
 # Ensure these imports match your actual file structure
-from models.user import User, UserRole 
-from db.session import engine 
-from core.security import get_password_hash 
+from models.user import User, UserRole
+from models.company import Company
+from models.product import Product
+from services.geo import geocode
+from models.base import uuid7_from_datetime
+from db.session import engine
+from core.security import get_password_hash
 
 # --- Seed Data Definitions (Using short, safe passwords) ---
 SEED_USERS: List[Dict[str, Any]] = [
@@ -22,7 +55,7 @@ SEED_USERS: List[Dict[str, Any]] = [
         "password": "adminpass1", # SHORTENED PASSWORD
         "full_name": "System Admin",
         "is_premium": True,
-        "role": UserRole.ADMIN, 
+        "role": UserRole.ADMIN,
         "roles": [UserRole.ADMIN.value, UserRole.DISTRIBUTOR.value, UserRole.CUSTOMER.value],
     },
     {
@@ -47,34 +80,54 @@ SEED_USERS: List[Dict[str, Any]] = [
     },
 ]
 
+# --- Synthetic data vocabulary ---
+
+# (product family, typical unit price)
+PRODUCT_FAMILIES = [
+    ("Disposable Face Mask", 0.4), ("N95 Respirator", 1.8), ("Nitrile Gloves", 9.0),
+    ("Syringe", 0.3), ("Syringe Pump", 1400.0), ("Digital Thermometer", 12.0),
+    ("Infrared Thermometer", 35.0), ("Blood Pressure Monitor", 45.0), ("Glucometer", 25.0),
+    ("Glucose Test Strips", 18.0), ("Oxygen Cylinder", 220.0), ("Oxygen Concentrator", 650.0),
+    ("Pulse Oximeter", 22.0), ("First Aid Kit", 30.0), ("Surgical Gown", 6.0),
+    ("IV Cannula", 0.9), ("Stethoscope", 60.0), ("Nebulizer", 55.0),
+    ("Portable Ultrasound", 4200.0), ("Wheelchair", 180.0), ("Hospital Bed", 900.0),
+    ("Gauze Swabs", 4.5), ("Alcohol Prep Pads", 3.0), ("Urine Test Strips", 11.0),
+]
+VARIANTS = ["Standard", "Pro", "Pediatric", "Adult", "XL", "Compact", "Box of 50", "Box of 100", "Sterile", "Reusable"]
+BRANDS = ["Medix", "CareLine", "Vitalis", "Omnia", "NovaMed", "Sanitas", "Clinix", "Apex", "BioPure", "Helix"]
+COMPANY_WORDS = ["Medical", "Health", "Pharma", "Supply", "Care", "Surgical", "Life", "Bio", "Clinical", "Diagnostics"]
+INDUSTRIES = ["Medical Devices", "Pharmaceuticals", "Consumables", "Diagnostics", "Hospital Equipment"]
+CITIES = ["Algiers", "Oran", "Constantine", "Annaba", "Blida", "Setif", "Batna", "Tlemcen", "Bejaia", "Tizi Ouzou"]
+FIRST_NAMES = ["Amina", "Yacine", "Sara", "Karim", "Lina", "Omar", "Nadia", "Rami", "Ines", "Samir", "Maya", "Adel"]
+LAST_NAMES = ["Benali", "Haddad", "Mansouri", "Brahimi", "Khelifi", "Saidi", "Bouzid", "Cherif", "Amrani", "Toumi"]
+
+DISTRIBUTOR_SHARE = 0.08
+
+
+# --- Fixed accounts ---
+
 def seed_users():
     """Initializes the database with predefined users if they don't exist."""
     print("🎬 Starting user database seeding...")
-    
+
     with Session(engine) as session:
-        for user_data in SEED_USERS:
-            email = user_data["email"]
-            # Check if user already exists by email
-            existing_user = session.exec(
-                select(User).where(User.email == email)
-            ).first()
-            
-            if existing_user:
-                print(f"✅ User {email} already exists. Skipping.")
-                continue
-
-            # 1. Pop the plain password and hash it
-            plain_password = user_data.pop("password")
-            hashed_password = get_password_hash(plain_password)
-            
-            # 2. Create the new User object
+        # One query for all seed accounts instead of one per user
+        emails = [user_data["email"] for user_data in SEED_USERS]
+        existing = set(session.exec(select(User.email).where(User.email.in_(emails))).all())
+        for email in existing:
+            print(f"✅ User {email} already exists. Skipping.")
+
+        missing = [dict(user_data) for user_data in SEED_USERS if user_data["email"] not in existing]
+        hashes = hash_passwords([user_data.pop("password") for user_data in missing])
+
+        for user_data, hashed_password in zip(missing, hashes):
             new_user = User(
                 **user_data,
                 hashed_password=hashed_password,
                 is_active=True,
                 subscription_active=False
             )
-            
+
             session.add(new_user)
             print(f"➕ Adding user: {new_user.email} with primary role {new_user.role.value}")
 
@@ -86,13 +139,214 @@ def seed_users():
             # If the error is related to database access (file lock, missing column), it often happens here.
             print(f"❌ Error during database commit: {e}")
 
+
+def hash_passwords(passwords: List[str], workers: int = 0) -> List[str]:
+    """bcrypt is deliberately slow, so spread hashing over worker processes"""
+    if len(passwords) < 2:
+        return [get_password_hash(p) for p in passwords]
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(get_password_hash, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+
+# --- Synthetic data ---
+
+def _spread_times(count: int, rng: random.Random, days: int = 365) -> Iterator[datetime]:
+    """
+    `count` ascending timestamps over the last `days` days (ascending keeps v7 ids
+    append-only), one at a time: each is the smallest of the uniform draws still
+    to come, so nothing has to be generated up front and sorted.
+    """
+    start = datetime.utcnow() - timedelta(days=days)
+    span = days * 86400
+    position = 0.0
+    for remaining in range(count, 0, -1):
+        position += (1 - position) * (1 - rng.random() ** (1 / remaining))
+        yield start + timedelta(seconds=position * span)
+
+
+def _batches(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _insert_chunks(table, batches: Iterable[List[Dict[str, Any]]], label: str) -> None:
+    """Insert each batch in its own transaction as soon as it is generated"""
+    started = time.perf_counter()
+    inserted = 0
+    for rows in batches:
+        with engine.begin() as conn:
+            conn.execute(insert(table), rows)
+        inserted += len(rows)
+    if not inserted:
+        return
+    elapsed = time.perf_counter() - started
+    rate = inserted / elapsed if elapsed else float("inf")
+    print(f"➕ {inserted:,} {label} inserted in {elapsed:.1f}s ({rate:,.0f} rows/s)")
+
+
+def generate_users(count: int, password: str, unique_passwords: bool, workers: int,
+                   rng: random.Random, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    with Session(engine) as session:
+        user_id = (session.exec(select(func.max(User.id))).one() or 0) + 1
+
+    pool = None
+    if unique_passwords:
+        workers = workers or os.cpu_count() or 1
+        print(f"🔐 Hashing {count:,} passwords on {workers} processes...")
+        pool = ProcessPoolExecutor(max_workers=workers)
+    else:
+        # Load-test accounts share one password: hash it once
+        shared_hash = get_password_hash(password)
+
+    try:
+        for times in _batches(_spread_times(count, rng), chunk_size):
+            ids = range(user_id, user_id + len(times))
+            user_id += len(times)
+            if pool is not None:
+                passwords = [f"{password}-{n}" for n in ids]
+                hashes = list(pool.map(get_password_hash, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+            else:
+                hashes = [shared_hash] * len(times)
+
+            rows = []
+            for n, hashed_password, created_at in zip(ids, hashes, times):
+                role = UserRole.DISTRIBUTOR if rng.random() < DISTRIBUTOR_SHARE else UserRole.CUSTOMER
+                rows.append({
+                    "id": n,
+                    "created_at": created_at,
+                    "username": f"loadtest_{n}",
+                    "email": f"loadtest_{n}@loadtest.medcore.com",
+                    "hashed_password": hashed_password,
+                    "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    "is_active": rng.random() > 0.02,
+                    "subscription_active": role == UserRole.DISTRIBUTOR and rng.random() < 0.4,
+                    "is_premium": rng.random() < 0.1,
+                    "role": role,
+                    "roles": [role.value],
+                })
+            yield rows
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def generate_companies(count: int, rng: random.Random, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    n = 0
+    for times in _batches(_spread_times(count, rng), chunk_size):
+        rows = []
+        for created_at in times:
+            n += 1
+            # Suffix keeps the unique name constraint satisfied at any volume
+            name = f"{rng.choice(BRANDS)} {rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_WORDS)} #{n}"
+            city = rng.choice(CITIES)
+            latitude, longitude = geocode(city)
+            rows.append({
+                "id": uuid7_from_datetime(created_at),
+                "created_at": created_at,
+                "name": name,
+                "description": f"{rng.choice(INDUSTRIES)} distributor",
+                "location": city,
+                "industry": rng.choice(INDUSTRIES),
+                # Spread around the city centre (about +-20 km)
+                "latitude": latitude + rng.uniform(-0.2, 0.2),
+                "longitude": longitude + rng.uniform(-0.2, 0.2),
+            })
+        yield rows
+
+
+def generate_products(count: int, distributor_ids: List[int], company_ids: List[str],
+                      rng: random.Random, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    # Heavy-tailed catalog sizes: weight each distributor by a Pareto draw
+    cum_weights = list(accumulate(rng.paretovariate(1.2) for _ in distributor_ids))
+    # Each distributor sells under one company
+    owner_company = {owner: rng.choice(company_ids) if company_ids else None for owner in distributor_ids}
+
+    for times in _batches(_spread_times(count, rng), chunk_size):
+        owners = rng.choices(distributor_ids, cum_weights=cum_weights, k=len(times))
+        rows = []
+        for owner_id, created_at in zip(owners, times):
+            family, base_price = rng.choice(PRODUCT_FAMILIES)
+            in_stock = rng.random() > 0.10
+            rows.append({
+                "id": uuid7_from_datetime(created_at),
+                "created_at": created_at,
+                "updated_at": created_at,
+                "name": f"{rng.choice(BRANDS)} {family} {rng.choice(VARIANTS)}",
+                "description": f"{family} for clinics and pharmacies.",
+                "price": round(base_price * math.exp(rng.gauss(0, 0.35)), 2),
+                "stock_quantity": int(rng.expovariate(1 / 120)) if in_stock else 0,
+                "is_active": rng.random() > 0.05,
+                "company_id": owner_company[owner_id],
+                "limit": 10,
+                "owner_id": str(owner_id),
+                "version": 1,
+            })
+        yield rows
+
+
+def seed_synthetic(args) -> None:
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+
+    if engine.dialect.name == "sqlite":
+        # WAL appends instead of rewriting pages through a rollback journal, and lets
+        # a running API keep reading while the load is in progress
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+
+    # Only the ids products need are kept: distributors (~8% of users) and companies
+    distributor_ids: List[int] = []
+    company_ids: List[str] = []
+
+    def users():
+        for rows in generate_users(args.users, args.password, args.unique_passwords, args.workers, rng, args.chunk_size):
+            distributor_ids.extend(row["id"] for row in rows if row["role"] == UserRole.DISTRIBUTOR)
+            yield rows
+
+    def companies():
+        for rows in generate_companies(args.companies, rng, args.chunk_size):
+            company_ids.extend(row["id"] for row in rows)
+            yield rows
+
+    _insert_chunks(User.__table__, users(), "users")
+    _insert_chunks(Company.__table__, companies(), "companies")
+
+    if args.products:
+        if not distributor_ids:
+            with Session(engine) as session:
+                distributor_ids = list(session.exec(select(User.id).where(User.role == UserRole.DISTRIBUTOR)).all())
+        if not distributor_ids:
+            print("❌ No distributor accounts to own products; generate some users first.")
+            return
+        products = generate_products(args.products, distributor_ids, company_ids, rng, args.chunk_size)
+        _insert_chunks(Product.__table__, products, "products")
+
+    print(f"🎉 Synthetic data ready in {time.perf_counter() - started:.1f}s")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed fixed accounts and optionally synthetic load-test data.")
+    parser.add_argument("--users", type=int, default=0, help="synthetic users to generate")
+    parser.add_argument("--companies", type=int, default=0, help="synthetic companies to generate")
+    parser.add_argument("--products", type=int, default=0, help="synthetic products to generate")
+    parser.add_argument("--password", default="loadtest123", help="password for generated accounts")
+    parser.add_argument("--unique-passwords", action="store_true", help="use '<password>-<id>' per account")
+    parser.add_argument("--workers", type=int, default=0, help="hashing processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="rows per transaction")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for reproducible data")
+    args = parser.parse_args()
+
     # Ensure all models are imported so SQLModel knows about them (CRUCIAL for metadata)
-    from models.user import User 
-    
+    import models  # noqa: F401
+
     # CRUCIAL FIX: Create all tables based on current model definitions
     print("🔄 Checking database schema and creating tables...")
-    SQLModel.metadata.create_all(engine) 
+    from db.session import create_db_and_tables
+    create_db_and_tables()
     print("✅ Tables created/verified.")
 
-    seed_users()
\ No newline at end of file
+    seed_users()
+    if args.users or args.companies or args.products:
+        seed_synthetic(args)
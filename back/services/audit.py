@@ -0,0 +1,240 @@
+import atexit
+import threading
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, inspect, insert
+from sqlmodel import Session
+
+from core.config import AUDIT_ENABLED, AUDIT_FLUSH_SECONDS, AUDIT_BATCH_SIZE
+from core.request_context import current_actor, current_request
+from db import pending
+from models.audit import AuditLog
+
+"""
+Audit log of who changed what.
+
+Changes are captured from the session, not from each route: after every
+flush, the rows of audited tables that were inserted, updated or deleted are
+turned into entries with their column diffs, the acting user (see
+core/request_context.py) and the request. Writes that bypass the unit of work
+(the PATCH and bulk statements) call record() themselves.
+
+Entries are kept with the transaction (db/pending.py), handed over only when
+it commits, and buffered in memory. A background thread appends them to the
+AuditLog table in batches, every AUDIT_FLUSH_SECONDS or AUDIT_BATCH_SIZE
+entries, so a request pays for building a few dicts, not for an extra write.
+Shutdown flushes what is left. On SQLite, triggers reject UPDATE and DELETE
+on the table.
+"""
+
+AUDITED_TABLES = {"product", "company", "user", "stockthreshold"}
+# Recorded as changed, never with their values
+REDACTED = {"hashed_password"}
+# Bumped on every write; `at` already says when
+IGNORED = {"updated_at"}
+
+_PENDING_KIND = "audit"
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if value is None or isinstance(value, (str, int, float, bool, list, dict)):
+        return value
+    return str(value)
+
+
+def _value(key: str, value: Any) -> Any:
+    return "<redacted>" if key in REDACTED else _plain(value)
+
+
+def record(session: Session, action: str, entity: str, entity_id: Any, changes: Dict[str, Any]) -> None:
+    """Add an entry to this session's transaction; written after it commits"""
+    if not AUDIT_ENABLED:
+        return
+    pending.add(session, _PENDING_KIND, {
+        "at": datetime.utcnow(),
+        "actor_id": current_actor(),
+        "action": action,
+        "entity": entity,
+        "entity_id": str(entity_id),
+        "changes": changes,
+        "request": current_request(),
+    })
+
+
+def record_statement(session: Session, action: str, entity: str, entity_id: Any,
+                     new_values: Optional[Dict[str, Any]] = None) -> None:
+    """Entry for a row changed by an UPDATE/DELETE statement: only the new values are known"""
+    changes = {key: {"new": _value(key, value)} for key, value in (new_values or {}).items() if key not in IGNORED}
+    record(session, action, entity, entity_id, changes)
+
+
+def _diff(state) -> Dict[str, Any]:
+    changes = {}
+    for attr in state.mapper.column_attrs:
+        key = attr.key
+        if key in IGNORED:
+            continue
+        history = state.attrs[key].history
+        if not history.has_changes():
+            continue
+        old = history.deleted[0] if history.deleted else None
+        new = history.added[0] if history.added else None
+        if old != new:
+            changes[key] = {"old": _value(key, old), "new": _value(key, new)}
+    return changes
+
+
+def _snapshot(state, side: str) -> Dict[str, Any]:
+    """Every set column of a row being inserted ("new") or deleted ("old")"""
+    values = {}
+    for attr in state.mapper.column_attrs:
+        value = state.dict.get(attr.key)
+        if attr.key not in IGNORED and value is not None:
+            values[attr.key] = {side: _value(attr.key, value)}
+    return values
+
+
+def _audited(obj) -> bool:
+    table = getattr(obj, "__table__", None)
+    return table is not None and table.name in AUDITED_TABLES
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    # Before/after values are still in the attribute history at this point
+    if not AUDIT_ENABLED:
+        return
+    for obj in session.new:
+        if _audited(obj):
+            state = inspect(obj)
+            record(session, "insert", obj.__table__.name, _identity(state), _snapshot(state, "new"))
+    for obj in session.dirty:
+        if _audited(obj):
+            state = inspect(obj)
+            changes = _diff(state)
+            if changes:
+                # Soft delete (db/soft_delete.py) is an UPDATE of deleted_at, but it is a delete
+                deleted_at = changes.get("deleted_at")
+                action = "delete" if deleted_at and deleted_at["old"] is None else "update"
+                record(session, action, obj.__table__.name, _identity(state), changes)
+    for obj in session.deleted:
+        if _audited(obj):
+            state = inspect(obj)
+            record(session, "delete", obj.__table__.name, _identity(state), _snapshot(state, "old"))
+
+
+def _identity(state) -> str:
+    key = state.mapper.primary_key_from_instance(state.obj())
+    return ":".join(str(part) for part in key)
+
+
+# --- Background writer ---
+
+class AuditWriter:
+    def __init__(self, flush_seconds: float, batch_size: int):
+        self.flush_seconds = flush_seconds
+        self.batch_size = batch_size
+        self._engine = None
+        self._buffer: List[Dict[str, Any]] = []
+        self._wake = threading.Condition()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        # Counters for monitoring
+        self.written = 0
+        self.failed_flushes = 0
+
+    def start(self, engine) -> None:
+        with self._wake:
+            if self._thread is not None:
+                return
+            self._engine = engine
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def append(self, entries: List[Dict[str, Any]]) -> None:
+        with self._wake:
+            if self._thread is None:
+                # Scripts that never ran the app lifespan: start on first use, flush at exit
+                from db.session import engine
+                self.start(engine)
+                atexit.register(self.stop)
+            self._buffer.extend(entries)
+            if len(self._buffer) >= self.batch_size:
+                self._wake.notify()
+
+    def stop(self) -> None:
+        """Write everything buffered, then stop the thread"""
+        with self._wake:
+            self._stopped = True
+            self._wake.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        with self._wake:
+            self._thread = None
+
+    def pending(self) -> int:
+        with self._wake:
+            return len(self._buffer)
+
+    def _run(self) -> None:
+        while True:
+            with self._wake:
+                if not self._stopped and len(self._buffer) < self.batch_size:
+                    self._wake.wait(self.flush_seconds)
+                batch, self._buffer = self._buffer, []
+                stopping = self._stopped
+            if batch:
+                self._write(batch, final=stopping)
+            if stopping:
+                return
+
+    def _write(self, batch: List[Dict[str, Any]], final: bool) -> None:
+        try:
+            with self._engine.begin() as conn:
+                for start in range(0, len(batch), self.batch_size):
+                    conn.execute(insert(AuditLog.__table__), batch[start:start + self.batch_size])
+            self.written += len(batch)
+        except Exception as e:
+            self.failed_flushes += 1
+            print(f"Audit flush of {len(batch)} entries failed: {e}")
+            if not final:
+                # Keep them, in order, for the next attempt
+                with self._wake:
+                    self._buffer[:0] = batch
+
+    def stats(self) -> Dict[str, int]:
+        return {"buffered": self.pending(), "written": self.written, "failed_flushes": self.failed_flushes}
+
+
+writer = AuditWriter(AUDIT_FLUSH_SECONDS, AUDIT_BATCH_SIZE)
+pending.on_commit(_PENDING_KIND, writer.append)
+
+
+_APPEND_ONLY_DDL = [
+    """CREATE TRIGGER IF NOT EXISTS auditlog_no_update BEFORE UPDATE ON auditlog BEGIN
+           SELECT RAISE(ABORT, 'auditlog is append-only');
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS auditlog_no_delete BEFORE DELETE ON auditlog BEGIN
+           SELECT RAISE(ABORT, 'auditlog is append-only');
+       END""",
+]
+
+
+def start(engine) -> None:
+    """Start the writer and guard the table; called from the app lifespan"""
+    from core.lifecycle import on_shutdown
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            for ddl in _APPEND_ONLY_DDL:
+                conn.exec_driver_sql(ddl)
+    writer.start(engine)
+    # After the write queue (registered on import) has committed its last batch
+    on_shutdown(writer.stop, last=True)
@@ -0,0 +1,301 @@
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, func
+from sqlmodel import Session, select
+
+"""
+Type-ahead suggestions served from memory.
+
+The index holds the distinct product names (weighted by how many active
+products carry the name) and company names. Every word start of a name is a
+key in one sorted list, so "glo" finds "Nitrile Gloves" as well as names
+starting with "glo". The best TOP_K entries of each prefix are cached and kept
+current as weights change, so a lookup never touches the database and is
+usually a single dict hit.
+
+Keeping it current:
+  - writes call track_product_names()/track_company_names() on their session;
+    once that session commits, those names are recounted in one grouped query
+    (names in a rolled-back transaction are simply dropped).
+  - every AUTOCOMPLETE_REFRESH_SECONDS the whole index is rebuilt from the
+    database, which also picks up writes made by other worker processes.
+"""
+
+PRODUCT = "product"
+COMPANY = "company"
+
+_WORD = re.compile(r"\w+")
+# Largest `limit` served; each cached prefix keeps this many best entries
+TOP_K = 25
+_KINDS = (None, PRODUCT, COMPANY)
+# Prefixes this short match a large part of the index, so their answers are
+# computed up front whenever the index is (re)built
+_WARM_PREFIX_LENGTH = 2
+_MAX_CACHED_PREFIXES = 100_000
+
+
+def normalize(text: str) -> str:
+    """Lowercase and strip accents so "Sérum" matches "ser" """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def _keys_for(text: str) -> List[str]:
+    """One key per word start: "Nitrile Gloves" -> ["nitrile gloves", "gloves"]"""
+    normalized = normalize(text).strip()
+    return list(dict.fromkeys(normalized[m.start():] for m in _WORD.finditer(normalized)))
+
+
+Entry = Tuple[str, str]  # (kind, text)
+
+
+class PrefixIndex:
+    """
+    Sorted word-start keys plus, per (prefix, kind), the TOP_K best entries.
+    A prefix's list is computed by scanning its key range once and then kept
+    up to date by set_weight(), so a lookup is usually one dict hit.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (key, kind, text), sorted
+        self._keys: List[Tuple[str, str, str]] = []
+        self._weights: Dict[Entry, int] = {}
+        self._top: Dict[Tuple[str, Optional[str]], List[Entry]] = {}
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+    @staticmethod
+    def _ranker(weights: Dict[Entry, int]):
+        return lambda entry: (-weights[entry], len(entry[1]), entry[1])
+
+    def load(self, entries: Iterable[Tuple[str, str, int]]) -> None:
+        """Replace the whole index with (kind, text, weight) entries"""
+        weights = {(kind, text): weight for kind, text, weight in entries if text and weight > 0}
+        keys = sorted((key, kind, text) for (kind, text) in weights for key in _keys_for(text))
+
+        # Warm the short prefixes before swapping, so lookups never see a cold index
+        rank = self._ranker(weights)
+        top: Dict[Tuple[str, Optional[str]], List[Entry]] = {}
+        for length in range(1, _WARM_PREFIX_LENGTH + 1):
+            groups: Dict[str, Set[Entry]] = {}
+            for key, kind, text in keys:
+                if len(key) >= length:
+                    groups.setdefault(key[:length], set()).add((kind, text))
+            for prefix, found in groups.items():
+                for kind in _KINDS:
+                    candidates = found if kind is None else [e for e in found if e[0] == kind]
+                    top[(prefix, kind)] = heapq.nsmallest(TOP_K, candidates, key=rank)
+
+        with self._lock:
+            self._keys = keys
+            self._weights = weights
+            self._top = top
+
+    def set_weight(self, kind: str, text: str, weight: int) -> None:
+        """Add, re-weight or (weight 0) remove one entry"""
+        entry = (kind, text)
+        keys = _keys_for(text)
+        with self._lock:
+            old = self._weights.get(entry, 0)
+            if weight > 0:
+                if not old:
+                    for key in keys:
+                        insort(self._keys, (key, kind, text))
+                self._weights[entry] = weight
+            elif old:
+                del self._weights[entry]
+                for key in keys:
+                    i = bisect_left(self._keys, (key, kind, text))
+                    if i < len(self._keys) and self._keys[i] == (key, kind, text):
+                        del self._keys[i]
+            else:
+                return
+
+            rank = self._ranker(self._weights)
+            prefixes = {key[:length] for key in keys for length in range(1, len(key) + 1)}
+            for prefix in prefixes:
+                for cache_kind in (None, kind):
+                    top = self._top.get((prefix, cache_kind))
+                    if top is None:
+                        continue
+                    if entry in top:
+                        if weight >= old:
+                            top.sort(key=rank)
+                        else:
+                            # Something outside the list may now outrank it: rescan on next lookup
+                            del self._top[(prefix, cache_kind)]
+                    elif weight > old and (len(top) < TOP_K or rank(entry) < rank(top[-1])):
+                        top.append(entry)
+                        top.sort(key=rank)
+                        del top[TOP_K:]
+
+    def _scan(self, prefix: str, kind: Optional[str]) -> List[Entry]:
+        found: Set[Entry] = set()
+        i = bisect_left(self._keys, (prefix,))
+        while i < len(self._keys) and self._keys[i][0].startswith(prefix):
+            _, entry_kind, text = self._keys[i]
+            if kind is None or entry_kind == kind:
+                found.add((entry_kind, text))
+            i += 1
+        return heapq.nsmallest(TOP_K, found, key=self._ranker(self._weights))
+
+    def search(self, prefix: str, limit: int = 10, kind: Optional[str] = None) -> List[Tuple[str, str, int]]:
+        """Top `limit` (kind, text, weight) whose name has a word starting with `prefix`, heaviest first"""
+        prefix = normalize(prefix).strip()
+        if not prefix:
+            return []
+        with self._lock:
+            top = self._top.get((prefix, kind))
+            if top is None:
+                top = self._scan(prefix, kind)
+                if len(self._top) >= _MAX_CACHED_PREFIXES:
+                    del self._top[next(iter(self._top))]
+                self._top[(prefix, kind)] = top
+            return [(entry_kind, text, self._weights[(entry_kind, text)]) for entry_kind, text in top[:limit]]
+
+
+index = PrefixIndex()
+
+
+# --- Loading from the database ---
+
+def _product_counts(session: Session, names: Optional[Iterable[str]] = None) -> List[Tuple[str, int]]:
+    from models.product import Product
+    statement = select(Product.name, func.count()).where(Product.is_active == True)  # noqa: E712
+    if names is not None:
+        statement = statement.where(Product.name.in_(list(names)))
+    return session.exec(statement.group_by(Product.name)).all()
+
+
+def build(engine) -> None:
+    """(Re)build the whole index: one grouped query over products, one over companies"""
+    from models.company import Company
+    with Session(engine) as session:
+        entries = [(PRODUCT, name, count) for name, count in _product_counts(session)]
+        entries += [(COMPANY, name, 1) for name in session.exec(select(Company.name)).all()]
+    index.load(entries)
+
+
+def refresh_names(engine, product_names: Set[str], company_names: Set[str]) -> None:
+    """Recount just these names after a write"""
+    from models.company import Company
+    with Session(engine) as session:
+        if product_names:
+            counts = dict(_product_counts(session, product_names))
+            for name in product_names:
+                index.set_weight(PRODUCT, name, counts.get(name, 0))
+        if company_names:
+            existing = set(session.exec(select(Company.name).where(Company.name.in_(list(company_names)))).all())
+            for name in company_names:
+                index.set_weight(COMPANY, name, 1 if name in existing else 0)
+
+
+# --- Incremental updates from writes ---
+
+_INFO_KEY = "autocomplete_names"
+
+
+def _pending(session: Session) -> Tuple[Set[str], Set[str]]:
+    return session.info.setdefault(_INFO_KEY, (set(), set()))
+
+
+def track_product_names(session: Session, *names: Optional[str]) -> None:
+    """Mark product names whose counts this session's transaction changes"""
+    _pending(session)[0].update(name for name in names if name)
+
+
+def track_company_names(session: Session, *names: Optional[str]) -> None:
+    _pending(session)[1].update(name for name in names if name)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    names = session.info.pop(_INFO_KEY, None)
+    if names and (names[0] or names[1]):
+        _refresher.schedule(*names)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_INFO_KEY, None)
+
+
+class _Refresher:
+    """Background thread doing the recounts off the request path, plus the periodic rebuild"""
+
+    def __init__(self):
+        self._engine = None
+        self._interval = 0.0
+        self._products: Set[str] = set()
+        self._companies: Set[str] = set()
+        self._wake = threading.Condition()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, engine, interval: float) -> None:
+        self._engine = engine
+        self._interval = interval
+        self._thread = threading.Thread(target=self._run, name="autocomplete", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._wake:
+            self._stopped = True
+            self._wake.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def schedule(self, products: Set[str], companies: Set[str]) -> None:
+        if self._thread is None:
+            return
+        with self._wake:
+            self._products |= products
+            self._companies |= companies
+            self._wake.notify()
+
+    def _run(self) -> None:
+        next_build = time.monotonic() + self._interval
+        while True:
+            with self._wake:
+                while not (self._products or self._companies or self._stopped):
+                    timeout = next_build - time.monotonic() if self._interval > 0 else None
+                    if timeout is not None and timeout <= 0:
+                        break
+                    self._wake.wait(timeout)
+                if self._stopped:
+                    return
+                products, self._products = self._products, set()
+                companies, self._companies = self._companies, set()
+            try:
+                if products or companies:
+                    refresh_names(self._engine, products, companies)
+                if self._interval > 0 and time.monotonic() >= next_build:
+                    build(self._engine)
+                    next_build = time.monotonic() + self._interval
+            except Exception as e:
+                print(f"Autocomplete refresh failed: {e}")
+
+
+_refresher = _Refresher()
+
+
+def is_running() -> bool:
+    """Whether tracked names are recounted (the lifespan started the refresher)"""
+    return _refresher._thread is not None
+
+
+def start(engine, refresh_interval: float) -> None:
+    """Build the index and keep it current; called from the app lifespan"""
+    from core.lifecycle import on_shutdown
+    build(engine)
+    _refresher.start(engine, refresh_interval)
+    on_shutdown(_refresher.stop)
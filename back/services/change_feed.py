@@ -0,0 +1,322 @@
+import asyncio
+import json
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set
+
+from sqlmodel import Session
+
+from core.config import (
+    CHANGE_FEED_BROKER_URL,
+    CHANGE_FEED_QUEUE_SIZE,
+    CHANGE_FEED_REPLAY_SIZE,
+)
+from db import pending
+from models.base import new_id
+
+"""
+Product change feed.
+
+Writes record what they changed with track_product_change(); once their
+transaction commits, the changes are published to the broker (a savepoint or
+transaction that rolls back publishes nothing). Clients follow them over SSE
+(GET /products/changes), filtered by product and/or company.
+
+Subscribers never hold a database session: each one is an asyncio queue on the
+event loop, indexed by the products and companies it watches. An event is
+encoded once and handed only to the queues that want it, so an idle watcher
+costs a dict entry and an open socket. A subscriber that falls
+CHANGE_FEED_QUEUE_SIZE events behind is sent a "reset" event and disconnected
+rather than buffering without bound; it should re-read what it watches.
+When the server starts shutting down, every stream ends at once (clients
+reconnect, with Last-Event-ID, to a worker that is still up).
+
+The last CHANGE_FEED_REPLAY_SIZE events are kept, so a client reconnecting
+with Last-Event-ID gets what it missed (or a "reset" if that is too old).
+
+The broker backend carries events between processes:
+    memory://           this worker only (default, and the local stand-in)
+    redis://host:6379/0 every worker/host subscribed to one channel (needs `redis`)
+"""
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+RESET = "reset"
+
+_REDIS_CHANNEL = "medcore:product-changes"
+
+
+# --- Backends ---
+
+class MemoryBackend:
+    """Delivers events straight back to this process's broker"""
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[List[Dict]], None]] = None
+
+    def start(self, deliver: Callable[[List[Dict]], None]) -> None:
+        self._deliver = deliver
+
+    def publish(self, events: List[Dict]) -> None:
+        if self._deliver is not None:
+            self._deliver(events)
+
+    def stop(self) -> None:
+        self._deliver = None
+
+
+class RedisBackend:
+    """Events go through a Redis pub/sub channel, so every worker sees every write"""
+
+    def __init__(self, url: str, channel: str = _REDIS_CHANNEL):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CHANGE_FEED_BROKER_URL points at Redis but the 'redis' package is not installed")
+        self.channel = channel
+        self._client = redis.Redis.from_url(url)
+        self._pubsub = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, deliver: Callable[[List[Dict]], None]) -> None:
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(self.channel)
+
+        def listen():
+            for message in self._pubsub.listen():
+                try:
+                    deliver(json.loads(message["data"]))
+                except Exception as e:
+                    print(f"Change feed message dropped: {e}")
+
+        self._thread = threading.Thread(target=listen, name="change-feed", daemon=True)
+        self._thread.start()
+
+    def publish(self, events: List[Dict]) -> None:
+        self._client.publish(self.channel, json.dumps(events))
+
+    def stop(self) -> None:
+        if self._pubsub is not None:
+            self._pubsub.close()
+
+
+def create_backend(url: str):
+    """Build the backend named by CHANGE_FEED_BROKER_URL"""
+    if url.startswith("memory://"):
+        return MemoryBackend()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported CHANGE_FEED_BROKER_URL {url!r}")
+
+
+# --- Broker ---
+
+def _frame(event_id: str, kind: str, data: Any) -> bytes:
+    return f"id: {event_id}\nevent: {kind}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+def reset_frame() -> bytes:
+    return f"event: {RESET}\ndata: {{}}\n\n".encode()
+
+
+class Subscription:
+    __slots__ = ("product_ids", "company_ids", "queue", "overflowed", "closed")
+
+    def __init__(self, product_ids: Set[str], company_ids: Set[str], size: int):
+        self.product_ids = product_ids
+        self.company_ids = company_ids
+        # Encoded SSE frames; None means the broker closed this subscription
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=size)
+        self.overflowed = False
+        self.closed = False
+
+    def wants(self, event: Dict) -> bool:
+        if not self.product_ids and not self.company_ids:
+            return True
+        return event["product_id"] in self.product_ids or event["company_id"] in self.company_ids
+
+
+class ChangeBroker:
+    """
+    Fan-out of change events to the subscribers of this process. Events may be
+    published from any thread; subscribers are only touched on the event loop.
+    """
+
+    def __init__(self, backend, queue_size: int = 256, replay_size: int = 1024):
+        self.backend = backend
+        self.queue_size = queue_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Set once the server starts shutting down: no new streams are kept open
+        self.draining = False
+        # (event, frame) for Last-Event-ID replay
+        self._recent: Deque = deque(maxlen=replay_size)
+        self._everything: Set[Subscription] = set()
+        self._by_product: Dict[str, Set[Subscription]] = {}
+        self._by_company: Dict[str, Set[Subscription]] = {}
+        # Counters for monitoring
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        """Bind to the running event loop; called from the app lifespan"""
+        self._loop = asyncio.get_running_loop()
+        self.backend.start(self._receive)
+
+    def drain(self) -> None:
+        """End every open stream now, so the server's graceful drain isn't held up by them"""
+        self.draining = True
+        for subscription in list(self._subscriptions()):
+            self._close(subscription)
+
+    async def stop(self) -> None:
+        self.backend.stop()
+        self._loop = None
+        for subscription in list(self._subscriptions()):
+            self._close(subscription)
+
+    def publish(self, events: List[Dict]) -> None:
+        """Send committed changes to every process; a no-op until start() (e.g. in scripts)"""
+        if events and self._loop is not None:
+            self.backend.publish(events)
+
+    def _receive(self, events: List[Dict]) -> None:
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._fan_out, events)
+        except RuntimeError:
+            pass  # loop already closed during shutdown
+
+    def _fan_out(self, events: List[Dict]) -> None:
+        for event in events:
+            frame = _frame(event["id"], event["type"], event)
+            self._recent.append((event, frame))
+            self.published += 1
+            targets = set(self._everything)
+            targets.update(self._by_product.get(event["product_id"], ()))
+            if event["company_id"] is not None:
+                targets.update(self._by_company.get(event["company_id"], ()))
+            for subscription in targets:
+                self._offer(subscription, frame)
+
+    def _offer(self, subscription: Subscription, frame: bytes) -> None:
+        try:
+            subscription.queue.put_nowait(frame)
+            self.delivered += 1
+        except asyncio.QueueFull:
+            # Too slow: stop feeding it; the stream sends "reset" once it has drained
+            self.dropped += 1
+            subscription.overflowed = True
+            self.unsubscribe(subscription)
+
+    def subscribe(self, product_ids: Iterable[str] = (), company_ids: Iterable[str] = (),
+                  last_event_id: Optional[str] = None) -> Subscription:
+        """Register a subscriber (on the event loop), replaying what it missed since last_event_id"""
+        subscription = Subscription(set(product_ids), set(company_ids), self.queue_size)
+        if self.draining:
+            subscription.closed = True
+            return subscription
+        if last_event_id:
+            ids = [event["id"] for event, _ in self._recent]
+            if last_event_id in ids:
+                for event, frame in list(self._recent)[ids.index(last_event_id) + 1:]:
+                    if subscription.wants(event):
+                        self._offer(subscription, frame)
+            else:
+                subscription.overflowed = True
+            if subscription.overflowed:
+                return subscription
+
+        if not subscription.product_ids and not subscription.company_ids:
+            self._everything.add(subscription)
+        for product_id in subscription.product_ids:
+            self._by_product.setdefault(product_id, set()).add(subscription)
+        for company_id in subscription.company_ids:
+            self._by_company.setdefault(company_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._everything.discard(subscription)
+        for index, keys in ((self._by_product, subscription.product_ids), (self._by_company, subscription.company_ids)):
+            for key in keys:
+                watchers = index.get(key)
+                if watchers is not None:
+                    watchers.discard(subscription)
+                    if not watchers:
+                        del index[key]
+
+    def _close(self, subscription: Subscription) -> None:
+        self.unsubscribe(subscription)
+        subscription.closed = True
+        try:
+            subscription.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass  # the stream sees `closed` once it drains
+
+    def _subscriptions(self) -> Set[Subscription]:
+        found = set(self._everything)
+        for index in (self._by_product, self._by_company):
+            for watchers in index.values():
+                found |= watchers
+        return found
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": len(self._subscriptions()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+broker = ChangeBroker(
+    create_backend(CHANGE_FEED_BROKER_URL),
+    queue_size=CHANGE_FEED_QUEUE_SIZE,
+    replay_size=CHANGE_FEED_REPLAY_SIZE,
+)
+
+
+def start() -> None:
+    from core.lifecycle import on_drain, on_shutdown
+    broker.start()
+    on_drain(broker.drain)
+    on_shutdown(broker.stop)
+
+
+# --- Publishing from writes ---
+
+_PENDING_KIND = "change_feed"
+pending.on_commit(_PENDING_KIND, broker.publish)
+
+
+def track_product_change(session: Session, kind: str, product_id: str,
+                         company_id: Optional[str], data: Optional[Dict[str, Any]] = None) -> None:
+    """Queue a change event, published once the session's transaction commits"""
+    event = {"id": new_id(), "type": kind, "product_id": product_id, "company_id": company_id, "product": data or {}}
+    pending.add(session, _PENDING_KIND, event)
+
+
+# --- Streaming ---
+
+async def sse_stream(subscription: Subscription, heartbeat: float):
+    """SSE body for one subscriber; unsubscribes when the client goes away"""
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            if (subscription.overflowed or subscription.closed) and subscription.queue.empty():
+                if subscription.overflowed:
+                    yield reset_frame()
+                return
+            try:
+                frame = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+            if frame is None:
+                return
+            yield frame
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,55 @@
+import smtplib
+from collections import deque
+from email.message import EmailMessage
+from typing import Deque, Sequence
+
+from core.config import SMTP_HOST, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, SMTP_USE_TLS, EMAIL_FROM
+
+"""
+Outgoing email.
+
+send_batch() delivers a list of messages over a single SMTP connection (one
+handshake and login for a whole run of alerts, not one per message). Without
+SMTP_HOST nothing leaves the machine: messages are printed and kept in
+`outbox`, which is what dev setups and tests look at.
+"""
+
+# Last messages "sent" without an SMTP server
+outbox: Deque[EmailMessage] = deque(maxlen=1000)
+
+
+def build_message(to: str, subject: str, body: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = EMAIL_FROM
+    message["To"] = to
+    message["Subject"] = subject
+    message.set_content(body)
+    return message
+
+
+def send_batch(messages: Sequence[EmailMessage]) -> int:
+    """
+    Send in order; returns how many went out. On an SMTP error the ones
+    before it are sent and the rest are not, so callers can retry the tail.
+    """
+    if not messages:
+        return 0
+    if not SMTP_HOST:
+        for message in messages:
+            outbox.append(message)
+            print(f"📧 To {message['To']}: {message['Subject']}")
+        return len(messages)
+
+    sent = 0
+    try:
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30) as smtp:
+            if SMTP_USE_TLS:
+                smtp.starttls()
+            if SMTP_USERNAME:
+                smtp.login(SMTP_USERNAME, SMTP_PASSWORD)
+            for message in messages:
+                smtp.send_message(message)
+                sent += 1
+    except (smtplib.SMTPException, OSError) as e:
+        print(f"Email delivery stopped after {sent} of {len(messages)}: {e}")
+    return sent
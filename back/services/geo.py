@@ -0,0 +1,237 @@
+import math
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, event, inspect, text
+from sqlmodel import Session
+
+from models.base import IdType
+from models.company import Company
+
+"""
+Company locations and proximity search.
+
+Geocoding is offline: free-text locations ("Oran", "Blida, Algeria") are
+matched against a built-in table of cities. It needs no network and is
+deterministic, so it also serves as the geocoder in tests; companies can send
+exact coordinates instead. Coordinates follow the location: a flush that
+changes a company's location re-geocodes it (unless it sets coordinates too),
+and backfill_coordinates() fills in companies stored without them, at startup.
+
+On SQLite, coordinates are indexed in an R-tree virtual table (company_rtree,
+keyed by the company rowid), maintained by triggers, so every write path keeps
+it current. A search looks at a bounding box around the point, and doubles it
+until enough matches are found or the radius limit is reached. Each step is an
+R-tree lookup, so the cost grows with the number of nearby companies, not with
+the whole network. Other databases use the same boxes against the
+latitude/longitude columns.
+"""
+
+EARTH_RADIUS_KM = 6371.0
+# First search radius; doubled until enough results are found
+START_RADIUS_KM = 25.0
+
+# City -> (latitude, longitude)
+CITY_COORDINATES: Dict[str, Tuple[float, float]] = {
+    "algiers": (36.7538, 3.0588),
+    "oran": (35.6971, -0.6308),
+    "constantine": (36.3650, 6.6147),
+    "annaba": (36.9000, 7.7667),
+    "blida": (36.4700, 2.8277),
+    "setif": (36.1911, 5.4137),
+    "batna": (35.5559, 6.1741),
+    "tlemcen": (34.8783, -1.3150),
+    "bejaia": (36.7509, 5.0567),
+    "tizi ouzou": (36.7169, 4.0497),
+    "djelfa": (34.6704, 3.2630),
+    "biskra": (34.8504, 5.7280),
+    "ouargla": (31.9493, 5.3250),
+    "ghardaia": (32.4909, 3.6735),
+    "tamanrasset": (22.7850, 5.5228),
+    "tunis": (36.8065, 10.1815),
+    "sfax": (34.7406, 10.7603),
+    "rabat": (34.0209, -6.8416),
+    "casablanca": (33.5731, -7.5898),
+    "marrakesh": (31.6295, -7.9811),
+    "cairo": (30.0444, 31.2357),
+    "tripoli": (32.8872, 13.1913),
+    "paris": (48.8566, 2.3522),
+    "marseille": (43.2965, 5.3698),
+    "lyon": (45.7640, 4.8357),
+    "madrid": (40.4168, -3.7038),
+    "barcelona": (41.3874, 2.1686),
+    "rome": (41.9028, 12.4964),
+    "berlin": (52.5200, 13.4050),
+    "london": (51.5072, -0.1276),
+    "istanbul": (41.0082, 28.9784),
+    "dubai": (25.2048, 55.2708),
+    "new york": (40.7128, -74.0060),
+}
+
+
+def _normalize(location: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", location)
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).casefold().split())
+
+
+def geocode(location: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Coordinates of a free-text location from the offline table; None if unknown"""
+    if not location:
+        return None
+    normalized = _normalize(location)
+    # "Blida, Algeria" -> try "blida, algeria", then "blida"
+    for candidate in (normalized, normalized.split(",")[0].strip()):
+        if candidate in CITY_COORDINATES:
+            return CITY_COORDINATES[candidate]
+    return None
+
+
+@event.listens_for(Session, "before_flush")
+def _geocode_locations(session, flush_context, instances):
+    """New companies without coordinates, and companies whose location changed, on every write path"""
+    for company in list(session.new) + list(session.dirty):
+        if not isinstance(company, Company):
+            continue
+        if company in session.new:
+            stale = company.latitude is None or company.longitude is None
+        else:
+            state = inspect(company)
+            stale = state.attrs.location.history.has_changes() and not (
+                state.attrs.latitude.history.has_changes() or state.attrs.longitude.history.has_changes()
+            )
+        if stale:
+            company.latitude, company.longitude = geocode(company.location) or (None, None)
+
+
+def backfill_coordinates(engine) -> int:
+    """Geocode companies stored without coordinates (older rows, cities added since); returns how many"""
+    table = Company.__table__
+    with engine.begin() as conn:
+        missing = conn.execute(
+            table.select().with_only_columns(table.c.id, table.c.location)
+            .where(table.c.location.is_not(None), (table.c.latitude.is_(None)) | (table.c.longitude.is_(None)))
+        ).all()
+        found = []
+        for company_id, location in missing:
+            point = geocode(location)
+            if point is not None:
+                found.append({"b_id": company_id, "latitude": point[0], "longitude": point[1]})
+        if found:
+            conn.execute(table.update().where(table.c.id == bindparam("b_id")), found)
+    if found:
+        print(f"Geocoded {len(found)} companies stored without coordinates")
+    return len(found)
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """(min_lat, max_lat, min_lng, max_lng) containing the circle; whole longitude range near the poles/antimeridian"""
+    d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = max(-90.0, lat - d_lat), min(90.0, lat + d_lat)
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat < 1e-6:
+        return min_lat, max_lat, -180.0, 180.0
+    d_lng = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+    if d_lng >= 180 or lng - d_lng < -180 or lng + d_lng > 180:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, lng - d_lng, lng + d_lng
+
+
+# --- Spatial index ---
+
+_RTREE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS company_rtree USING rtree(id, min_lat, max_lat, min_lng, max_lng)",
+    """CREATE TRIGGER IF NOT EXISTS company_rtree_insert AFTER INSERT ON company
+       WHEN NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL BEGIN
+           INSERT OR REPLACE INTO company_rtree VALUES (NEW.rowid, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS company_rtree_update AFTER UPDATE OF latitude, longitude ON company BEGIN
+           DELETE FROM company_rtree WHERE id = OLD.rowid;
+           INSERT INTO company_rtree SELECT NEW.rowid, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude
+               WHERE NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS company_rtree_delete AFTER DELETE ON company BEGIN
+           DELETE FROM company_rtree WHERE id = OLD.rowid;
+       END""",
+]
+
+_rtree_available = False
+
+
+def create_spatial_index(engine) -> bool:
+    """
+    Create the R-tree and its triggers (SQLite builds with the rtree module) and
+    reload it from the company table; rowids can change (VACUUM, migrate_ids.py),
+    so it is rebuilt on every start. Returns whether the R-tree is in use.
+    """
+    global _rtree_available
+    if engine.dialect.name != "sqlite":
+        return False
+    try:
+        with engine.begin() as conn:
+            for ddl in _RTREE_DDL:
+                conn.exec_driver_sql(ddl)
+            conn.exec_driver_sql("DELETE FROM company_rtree")
+            conn.exec_driver_sql(
+                "INSERT INTO company_rtree SELECT rowid, latitude, latitude, longitude, longitude FROM company "
+                "WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+            )
+    except Exception as e:
+        # SQLite compiled without rtree: fall back to plain column range scans
+        print(f"Spatial index unavailable, using column scans: {e}")
+        _rtree_available = False
+        return False
+    _rtree_available = True
+    return True
+
+
+_STOCKING = """
+    EXISTS (SELECT 1 FROM product p
+            WHERE p.company_id = c.id AND p.name = :product
+              AND p.is_active = 1 AND p.stock_quantity > 0 AND p.deleted_at IS NULL)
+"""
+
+
+def _in_box(session, box: Tuple[float, float, float, float], product: Optional[str]):
+    min_lat, max_lat, min_lng, max_lng = box
+    params = {"min_lat": min_lat, "max_lat": max_lat, "min_lng": min_lng, "max_lng": max_lng}
+    if _rtree_available:
+        sql = """SELECT c.id, c.latitude, c.longitude FROM company_rtree r JOIN company c ON c.rowid = r.id
+                 WHERE r.max_lat >= :min_lat AND r.min_lat <= :max_lat
+                   AND r.max_lng >= :min_lng AND r.min_lng <= :max_lng"""
+    else:
+        sql = """SELECT c.id, c.latitude, c.longitude FROM company c
+                 WHERE c.latitude BETWEEN :min_lat AND :max_lat
+                   AND c.longitude BETWEEN :min_lng AND :max_lng"""
+    if product is not None:
+        sql += " AND " + _STOCKING
+        params["product"] = product
+    # Raw SQL skips column types: have ids converted like the ORM's (bytes with ID_STORAGE=binary)
+    return session.execute(text(sql).columns(id=IdType), params).all()
+
+
+def nearest_companies(session, lat: float, lng: float, limit: int,
+                      max_radius_km: float, product: Optional[str] = None) -> List[Tuple[str, float]]:
+    """
+    (company id, distance km) of the `limit` nearest companies within
+    max_radius_km, optionally only those with `product` (exact name) in stock.
+    """
+    radius = min(START_RADIUS_KM, max_radius_km)
+    while True:
+        found = []
+        for company_id, c_lat, c_lng in _in_box(session, bounding_box(lat, lng, radius), product):
+            distance = haversine_km(lat, lng, c_lat, c_lng)
+            # The box's corners are further than `radius`; only the circle is certain
+            if distance <= radius:
+                found.append((distance, company_id))
+        if len(found) >= limit or radius >= max_radius_km:
+            found.sort()
+            return [(company_id, distance) for distance, company_id in found[:limit]]
+        radius = min(radius * 2, max_radius_km)
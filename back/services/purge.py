@@ -0,0 +1,111 @@
+import time
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, List
+
+from sqlalchemy import String, cast, delete, exists, insert, select, update
+
+from core.config import SOFT_DELETE_RETENTION_DAYS, PURGE_BATCH_SIZE
+from models.alert import StockAlert, StockThreshold
+from models.archive import ArchivedRow
+from models.product import Product, ProductNeighbours
+from models.user import User
+
+"""
+Background side of soft delete (run by purge_deleted.py).
+
+  1. Products of deleted users are soft-deleted too. DELETE /users/{id} does
+     this itself; this catches users deleted any other way.
+  2. Products deleted more than the retention period ago are copied to
+     ArchivedRow as JSON and removed, along with the rows that hang off them.
+  3. The same for deleted users, once none of their products are left.
+
+Each batch of PURGE_BATCH_SIZE rows is its own short transaction, so the API
+keeps writing in between. Rows are found through the partial indexes over
+deleted rows (deleted_index in models/base.py), not by scanning the tables.
+These are Core statements, so the default filter doesn't apply here.
+"""
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def cascade_deleted_users(engine, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Soft-delete the live products of deleted users; returns how many"""
+    table = Product.__table__
+    deleted_owners = select(cast(User.__table__.c.id, String)).where(User.__table__.c.deleted_at.is_not(None))
+    total = 0
+    while True:
+        now = datetime.utcnow()
+        with engine.begin() as conn:
+            ids = conn.execute(
+                select(table.c.id)
+                .where(table.c.deleted_at.is_(None), table.c.owner_id.in_(deleted_owners))
+                .limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                return total
+            conn.execute(
+                update(table)
+                .where(table.c.id.in_(ids))
+                .values(deleted_at=now, updated_at=now, version=table.c.version + 1)
+            )
+        total += len(ids)
+
+
+def _archive(engine, model, cutoff: datetime, batch_size: int, dependents=(), condition=None) -> int:
+    """Move soft-deleted rows older than `cutoff` to ArchivedRow, oldest first; returns how many"""
+    table = model.__table__
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            statement = select(table).where(table.c.deleted_at.is_not(None), table.c.deleted_at < cutoff)
+            if condition is not None:
+                statement = statement.where(condition)
+            rows = conn.execute(statement.order_by(table.c.deleted_at).limit(batch_size)).mappings().all()
+            if not rows:
+                return total
+            now = datetime.utcnow()
+            conn.execute(insert(ArchivedRow.__table__), [
+                {
+                    "table_name": table.name,
+                    "row_id": str(row["id"]),
+                    "data": {key: _plain(value) for key, value in row.items()},
+                    "deleted_at": row["deleted_at"],
+                    "archived_at": now,
+                }
+                for row in rows
+            ])
+            ids: List[Any] = [row["id"] for row in rows]
+            for column in dependents:
+                # Referencing columns are text (user ids are stored as strings there)
+                conn.execute(delete(column.table).where(column.in_([str(i) for i in ids])))
+            conn.execute(delete(table).where(table.c.id.in_(ids)))
+        total += len(rows)
+
+
+def purge(engine, retention_days: float = SOFT_DELETE_RETENTION_DAYS, batch_size: int = PURGE_BATCH_SIZE) -> Dict[str, int]:
+    started = time.perf_counter()
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    products = Product.__table__
+
+    cascaded = cascade_deleted_users(engine, batch_size)
+    archived_products = _archive(
+        engine, Product, cutoff, batch_size,
+        dependents=(ProductNeighbours.__table__.c.product_id, StockAlert.__table__.c.product_id),
+    )
+    users = User.__table__
+    archived_users = _archive(
+        engine, User, cutoff, batch_size,
+        dependents=(StockThreshold.__table__.c.owner_id,),
+        # Products reference their owner: wait until they are archived too
+        condition=~exists().where(products.c.owner_id == cast(users.c.id, String)),
+    )
+    print(f"✅ Purge: {cascaded} products of deleted users hidden, {archived_products} products and "
+          f"{archived_users} users archived in {time.perf_counter() - started:.1f}s")
+    return {"cascaded": cascaded, "products": archived_products, "users": archived_users}
@@ -0,0 +1,171 @@
+import math
+import re
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, insert
+from sqlmodel import Session, select
+
+from models.product import Product, ProductNeighbours
+
+"""
+Related products from text similarity.
+
+Each active product becomes a TF-IDF vector over the words of its name
+(counted twice, names say more than descriptions) and description. Rows are
+L2-normalised, so the cosine similarity of every pair is a sparse matrix
+product; it is computed a block of rows at a time and only the top-k
+neighbours of each product are kept, in the ProductNeighbours table. Serving
+"related items" is then one primary-key lookup plus one IN query.
+
+    rebuild(engine)                  every product (nightly)
+    rebuild(engine, incremental=True) only products changed since the last run
+
+The incremental run re-vectorises the whole catalog (cheap) but recomputes
+neighbours only for changed rows; unchanged products pick up new neighbours
+at the next full rebuild. Needs numpy and scipy (see requirements.txt); the
+API itself only reads the stored neighbours.
+"""
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOP_WORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the this to with your our".split()
+)
+NAME_WEIGHT = 2
+# Words in more than this share of products ("sterile", boilerplate descriptions)
+# barely distinguish them but would make every pair similar; they are dropped
+MAX_DOCUMENT_SHARE = 0.3
+# Rows of the similarity matrix computed per block; bounds peak memory
+BLOCK_ROWS = 1024
+# Neighbours below this cosine similarity aren't worth showing
+MIN_SCORE = 0.05
+_WRITE_CHUNK = 5000
+
+
+def _tokens(name: str, description: Optional[str]) -> Counter:
+    counts = Counter()
+    for weight, text in ((NAME_WEIGHT, name), (1, description)):
+        for token in _TOKEN.findall((text or "").lower()):
+            if len(token) > 1 and token not in _STOP_WORDS:
+                counts[token] += weight
+    return counts
+
+
+def vectorize(documents: Sequence[Tuple[str, Optional[str]]]):
+    """(name, description) pairs -> L2-normalised TF-IDF rows as a CSR matrix"""
+    import numpy as np
+    from scipy.sparse import csr_matrix, diags
+
+    vocabulary: Dict[str, int] = {}
+    indptr, indices, data = [0], [], []
+    for name, description in documents:
+        for token, count in _tokens(name, description).items():
+            indices.append(vocabulary.setdefault(token, len(vocabulary)))
+            data.append(1.0 + math.log(count))  # sublinear term frequency
+        indptr.append(len(indices))
+
+    matrix = csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(documents), max(1, len(vocabulary))),
+    )
+    document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1.0
+    if len(documents) >= 20:
+        idf[document_frequency > MAX_DOCUMENT_SHARE * len(documents)] = 0.0
+    matrix = (matrix @ diags(idf.astype(np.float32))).tocsr()
+    matrix.eliminate_zeros()
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return (diags(1.0 / norms).astype(np.float32) @ matrix).tocsr()
+
+
+def top_neighbours(matrix, rows: Sequence[int], k: int) -> List[List[int]]:
+    """For each of `rows`, the indices of its k most similar rows (excluding itself)"""
+    import numpy as np
+
+    transposed = matrix.T.tocsc()
+    result: List[List[int]] = []
+    for start in range(0, len(rows), BLOCK_ROWS):
+        block_rows = rows[start:start + BLOCK_ROWS]
+        scores = (matrix[block_rows] @ transposed).tocsr()
+        for offset, row in enumerate(block_rows):
+            lo, hi = scores.indptr[offset], scores.indptr[offset + 1]
+            columns, values = scores.indices[lo:hi], scores.data[lo:hi]
+            keep = (columns != row) & (values >= MIN_SCORE)
+            columns, values = columns[keep], values[keep]
+            if len(values) > k:
+                best = np.argpartition(-values, k)[:k]
+                columns, values = columns[best], values[best]
+            order = np.argsort(-values, kind="stable")
+            result.append(columns[order].tolist())
+    return result
+
+
+def rebuild(engine, k: int = 10, incremental: bool = False) -> int:
+    """Recompute and store neighbours; returns how many products were updated"""
+    started = time.perf_counter()
+    # The watermark of the next incremental run: taken before reading, so a product
+    # updated while this run computes is newer than it and gets picked up next time
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        products = session.exec(
+            select(Product.id, Product.name, Product.description, Product.updated_at)
+            .where(Product.is_active == True)  # noqa: E712
+            .order_by(Product.id)
+        ).all()
+        if not products:
+            return 0
+
+        if incremental:
+            last_run = session.exec(select(func.max(ProductNeighbours.computed_at))).one()
+            computed = set(session.exec(select(ProductNeighbours.product_id)).all())
+            rows = [
+                i for i, (product_id, _, _, updated_at) in enumerate(products)
+                if product_id not in computed or last_run is None or updated_at > last_run
+            ]
+        else:
+            rows = list(range(len(products)))
+        if not rows:
+            return 0
+
+    matrix = vectorize([(name, description) for _, name, description, _ in products])
+    neighbours = top_neighbours(matrix, rows, k)
+    ids = [product_id for product_id, _, _, _ in products]
+    records = [
+        {"product_id": ids[row], "neighbour_ids": [ids[n] for n in found], "computed_at": now}
+        for row, found in zip(rows, neighbours)
+    ]
+
+    table = ProductNeighbours.__table__
+    with engine.begin() as conn:
+        if incremental:
+            for start in range(0, len(records), 500):
+                chunk = [record["product_id"] for record in records[start:start + 500]]
+                conn.execute(delete(table).where(table.c.product_id.in_(chunk)))
+        else:
+            conn.execute(delete(table))
+        for start in range(0, len(records), _WRITE_CHUNK):
+            conn.execute(insert(table), records[start:start + _WRITE_CHUNK])
+
+    print(f"✅ Neighbours for {len(records)} of {len(products)} products in {time.perf_counter() - started:.1f}s")
+    return len(records)
+
+
+def related_products(session: Session, product_id: str, limit: int) -> Optional[List[Product]]:
+    """Stored neighbours that are still active, most similar first; None if never computed"""
+    stored = session.get(ProductNeighbours, product_id)
+    if stored is None:
+        return None
+    wanted = stored.neighbour_ids[: limit * 2]  # spare ids in case some were deactivated
+    if not wanted:
+        return []
+    found = {
+        product.id: product
+        for product in session.exec(
+            select(Product).where(Product.id.in_(wanted), Product.is_active == True)  # noqa: E712
+        )
+    }
+    return [found[i] for i in wanted if i in found][:limit]
@@ -0,0 +1,159 @@
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Integer, cast, delete, func, insert, update
+from sqlmodel import Session, select
+
+from core.config import LOW_STOCK_DEFAULT_THRESHOLD, LOW_STOCK_DIGEST_MAX_ITEMS
+from models.alert import JobCheckpoint, StockAlert, StockThreshold
+from models.product import Product
+from models.user import User
+from services.emails import build_message, send_batch
+
+"""
+Low-stock alerts (run by check_stock.py).
+
+evaluate() looks only at products changed since the previous run, found
+through the index on Product.updated_at (every write path bumps it), plus the
+catalogs of distributors who changed their threshold. A product at or below its
+owner's threshold gets a StockAlert row. The row stays while the product is
+low, so the product is alerted once, not on every run; restocking (or
+deactivating) it deletes the row and re-arms the alert.
+
+deliver() sends the undelivered alerts as one digest email per distributor,
+all over one SMTP connection, and marks what went out.
+
+Each run re-reads a few seconds before the last checkpoint, so writes that
+committed late are not missed; looking at a product twice is harmless.
+"""
+
+CHECKPOINT = "stock_alerts"
+_OVERLAP = timedelta(seconds=5)
+_IN_CHUNK = 500
+
+Row = Tuple[str, str, int, bool, int]  # (product id, owner id, stock, active, threshold)
+
+
+def _chunks(items: List, size: int = _IN_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _candidates(session: Session, since: Optional[datetime]) -> Dict[str, Row]:
+    threshold = func.coalesce(StockThreshold.threshold, LOW_STOCK_DEFAULT_THRESHOLD)
+    base = (
+        select(Product.id, Product.owner_id, Product.stock_quantity, Product.is_active, threshold)
+        .join(StockThreshold, StockThreshold.owner_id == Product.owner_id, isouter=True)
+    )
+    if since is None:
+        return {row[0]: row for row in session.exec(base)}
+
+    found = {row[0]: row for row in session.exec(base.where(Product.updated_at > since))}
+    # A new threshold can change the answer for every product of that distributor
+    owners = session.exec(select(StockThreshold.owner_id).where(StockThreshold.updated_at > since)).all()
+    for chunk in _chunks(list(owners)):
+        for row in session.exec(base.where(Product.owner_id.in_(chunk))):
+            found[row[0]] = row
+    return found
+
+
+def evaluate(engine, full: bool = False) -> Tuple[int, int]:
+    """Raise alerts for products that went low and clear those restocked; returns (raised, cleared)"""
+    started = datetime.utcnow()
+    raised = cleared = 0
+    with Session(engine) as session:
+        checkpoint = session.get(JobCheckpoint, CHECKPOINT)
+        since = None if full or checkpoint is None else checkpoint.position - _OVERLAP
+        rows = _candidates(session, since)
+
+        table = StockAlert.__table__
+        for chunk in _chunks(list(rows)):
+            alerted = set(session.exec(select(StockAlert.product_id).where(StockAlert.product_id.in_(chunk))).all())
+            new_alerts, restocked = [], []
+            for product_id in chunk:
+                _, owner_id, stock, active, threshold = rows[product_id]
+                low = active and stock <= threshold
+                if low and product_id not in alerted:
+                    new_alerts.append({
+                        "product_id": product_id, "owner_id": str(owner_id), "stock_quantity": stock,
+                        "threshold": threshold, "created_at": started, "delivered_at": None,
+                    })
+                elif not low and product_id in alerted:
+                    restocked.append(product_id)
+            if new_alerts:
+                session.connection().execute(insert(table), new_alerts)
+            if restocked:
+                session.connection().execute(delete(table).where(table.c.product_id.in_(restocked)))
+            raised += len(new_alerts)
+            cleared += len(restocked)
+
+        # Alerts of deleted products (a Core statement: soft-deleted rows must be excluded by hand)
+        live = select(Product.__table__.c.id).where(Product.__table__.c.deleted_at.is_(None))
+        session.connection().execute(delete(table).where(table.c.product_id.not_in(live)))
+
+        if checkpoint is None:
+            checkpoint = JobCheckpoint(name=CHECKPOINT, position=started)
+        checkpoint.position = started
+        session.add(checkpoint)
+        session.commit()
+    return raised, cleared
+
+
+def _digest(items: List[Tuple[str, int, int]]) -> str:
+    lines = ["These products are at or below your low-stock level:", ""]
+    for name, stock, threshold in items[:LOW_STOCK_DIGEST_MAX_ITEMS]:
+        lines.append(f"  - {name}: {stock} left (alert at {threshold})")
+    if len(items) > LOW_STOCK_DIGEST_MAX_ITEMS:
+        lines.append(f"  ... and {len(items) - LOW_STOCK_DIGEST_MAX_ITEMS} more")
+    return "\n".join(lines)
+
+
+def deliver(engine) -> int:
+    """One digest email per distributor for the undelivered alerts; returns how many alerts were sent"""
+    with Session(engine) as session:
+        rows = session.exec(
+            select(StockAlert.product_id, StockAlert.owner_id, Product.name, StockAlert.stock_quantity,
+                   StockAlert.threshold, User.email)
+            .join(Product, Product.id == StockAlert.product_id)
+            # owner_id is text holding the integer user id
+            .join(User, User.id == cast(StockAlert.owner_id, Integer))
+            .where(StockAlert.delivered_at.is_(None))
+            .order_by(StockAlert.owner_id, Product.name)
+        ).all()
+        if not rows:
+            return 0
+
+        per_owner: Dict[str, List] = defaultdict(list)
+        emails: Dict[str, str] = {}
+        for product_id, owner_id, name, stock, threshold, email in rows:
+            per_owner[owner_id].append((product_id, name, stock, threshold))
+            emails[owner_id] = email
+
+        owners = list(per_owner)
+        messages = [
+            build_message(
+                emails[owner_id],
+                f"Low stock: {len(per_owner[owner_id])} product(s)",
+                _digest([(name, stock, threshold) for _, name, stock, threshold in per_owner[owner_id]]),
+            )
+            for owner_id in owners
+        ]
+        sent = send_batch(messages)
+
+        delivered = [product_id for owner_id in owners[:sent] for product_id, *_ in per_owner[owner_id]]
+        now = datetime.utcnow()
+        table = StockAlert.__table__
+        for chunk in _chunks(delivered):
+            session.connection().execute(update(table).where(table.c.product_id.in_(chunk)).values(delivered_at=now))
+        session.commit()
+    return len(delivered)
+
+
+def run(engine, full: bool = False, send: bool = True) -> None:
+    started = time.perf_counter()
+    raised, cleared = evaluate(engine, full=full)
+    delivered = deliver(engine) if send else 0
+    print(f"✅ Stock alerts: {raised} raised, {cleared} cleared, {delivered} delivered "
+          f"in {time.perf_counter() - started:.1f}s")
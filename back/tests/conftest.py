@@ -0,0 +1,184 @@
+import os
+
+# Settings are read when core.config is imported: point everything that could
+# touch a real file or background thread away from it before the app loads
+os.environ.update({
+    "DATABASE_URL": "sqlite://",
+    "DATABASE_REPLICA_URLS": "",
+    "SECRET_KEY": "test-secret-key",
+    "WRITE_QUEUE_ENABLED": "0",
+    "AUDIT_ENABLED": "0",
+    "AUTOCOMPLETE_ENABLED": "0",
+    "SERVE_FRONTEND": "0",
+    "CHANGE_FEED_BROKER_URL": "memory://",
+})
+
+from contextlib import contextmanager  # noqa: E402
+from typing import Callable, Dict, List  # noqa: E402
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from passlib.context import CryptContext  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from sqlmodel import Session, SQLModel, create_engine  # noqa: E402
+
+import main  # noqa: E402
+from core import security  # noqa: E402
+from core.rate_limit import limiter  # noqa: E402
+from db.session import get_read_session, get_session  # noqa: E402
+from services.geo import create_spatial_index  # noqa: E402
+
+"""
+Shared fixtures for the API tests.
+
+Every test process (one per xdist worker with `pytest -n auto`) builds the
+schema once in a private in-memory database. Each test then runs inside a
+transaction on that database that is rolled back afterwards: the routes'
+commits only release savepoints, so tests see their own writes and nothing
+else, and no test pays for building tables.
+
+The app is used without its lifespan, so the write queue, audit writer,
+replicas and autocomplete refresher never start; routes take the fallback
+path of each (inline writes on the request session).
+"""
+
+PASSWORD = "correct-horse-9"
+_TRANSACTION_CONTROL = ("BEGIN", "SAVEPOINT", "RELEASE", "ROLLBACK", "COMMIT")
+
+
+@pytest.fixture(scope="session")
+def engine():
+    # One connection for everyone, or each would get its own empty :memory: database
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+
+    # pysqlite opens transactions lazily and mishandles SAVEPOINT; let SQLAlchemy issue BEGIN itself
+    @event.listens_for(engine, "connect")
+    def _no_implicit_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    SQLModel.metadata.create_all(engine)
+    create_spatial_index(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def cheap_password_hashing():
+    """bcrypt at its minimum cost: the same hashes and checks, a fraction of the time"""
+    previous = security._pwd_context
+    security._pwd_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+    yield
+    security._pwd_context = previous
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    """A database file of its own with the full schema, for code that opens its own connections or threads"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    """A session whose commits are undone when the test ends"""
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture
+def client(session):
+    def override():
+        yield session
+
+    main.app.dependency_overrides[get_session] = override
+    main.app.dependency_overrides[get_read_session] = override
+    # Every test starts with full rate-limit buckets
+    limiter.store.reset()
+    # Not entered as a context manager: that would run the app's lifespan
+    client = TestClient(main.app)
+    try:
+        yield client
+    finally:
+        client.close()
+        main.app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def file_client(file_engine):
+    """A client whose requests use file_engine, for code that reads back through its own sessions or threads"""
+    def override():
+        with Session(file_engine) as session:
+            yield session
+
+    main.app.dependency_overrides[get_session] = override
+    main.app.dependency_overrides[get_read_session] = override
+    limiter.store.reset()
+    client = TestClient(main.app)
+    try:
+        yield client
+    finally:
+        client.close()
+        main.app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def make_user(client) -> Callable[..., Dict]:
+    """Sign a user up; returns the signup response plus ready-made auth headers"""
+    created = []
+
+    def make(role: str = "distributor", name: str = None) -> Dict:
+        name = name or f"{role}{len(created) + 1}"
+        response = client.post("/auth/signup", json={
+            "username": name, "email": f"{name}@example.com", "password": PASSWORD, "role": role,
+        })
+        assert response.status_code == 200, response.text
+        body = response.json()
+        body["password"] = PASSWORD
+        body["headers"] = {"Authorization": f"Bearer {body['access_token']}"}
+        created.append(body)
+        return body
+
+    return make
+
+
+@pytest.fixture
+def distributor(make_user) -> Dict:
+    return make_user("distributor")
+
+
+@pytest.fixture
+def count_queries(engine):
+    """
+    with count_queries() as queries: ...  -> the SQL statements run inside the
+    block, for asserting that an endpoint's query count doesn't grow with its data
+    """
+    @contextmanager
+    def counting():
+        statements: List[str] = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            # The per-test transaction's own SAVEPOINT/RELEASE/... are not the endpoint's queries
+            if not statement.lstrip().upper().startswith(_TRANSACTION_CONTROL):
+                statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    return counting
@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import Session, select
+
+from core import lifecycle
+from models.audit import AuditLog
+from models.user import User
+from services import audit
+
+PASSWORD = "correct-horse-9"
+
+
+@pytest.fixture
+def audited(file_engine, monkeypatch):
+    """Audit on, as in production: triggers on the table and the background writer on file_engine"""
+    monkeypatch.setattr(audit, "AUDIT_ENABLED", True)
+    monkeypatch.setattr(lifecycle, "_shutdown_hooks", [])
+    audit.start(file_engine)
+    yield file_engine
+    audit.writer.stop()
+
+
+def entries(engine, **where):
+    """Everything recorded so far; stopping the writer flushes its buffer"""
+    audit.writer.stop()
+    with Session(engine) as session:
+        statement = select(AuditLog).order_by(AuditLog.id)
+        for column, value in where.items():
+            statement = statement.where(getattr(AuditLog, column) == value)
+        return session.exec(statement).all()
+
+
+def sign_up(client):
+    response = client.post("/auth/signup", json={
+        "username": "auditee", "email": "auditee@example.com", "password": PASSWORD, "role": "distributor",
+    })
+    assert response.status_code == 200, response.text
+    body = response.json()
+    return body["user"]["id"], {"Authorization": f"Bearer {body['access_token']}"}
+
+
+def test_an_update_is_recorded_with_its_diff(file_client, audited):
+    user_id, headers = sign_up(file_client)
+    response = file_client.put(f"/users/{user_id}", json={"full_name": "Ada Auditee"}, headers=headers)
+    assert response.status_code == 200, response.text
+
+    [entry] = entries(audited, entity="user", action="update")
+    assert entry.entity_id == str(user_id)
+    assert entry.actor_id == str(user_id)
+    assert entry.request == f"PUT /users/{user_id}"
+    assert entry.changes == {"full_name": {"old": None, "new": "Ada Auditee"}}
+
+
+def test_passwords_are_never_written_to_the_log(file_client, audited):
+    user_id, _ = sign_up(file_client)
+    with Session(audited) as session:
+        user = session.get(User, user_id)
+        old_hash = user.hashed_password
+        user.hashed_password = "$2b$04$new-hash"
+        session.commit()
+
+    recorded = entries(audited, entity="user")
+    assert [entry.action for entry in recorded] == ["insert", "update"]
+    assert recorded[0].changes["hashed_password"] == {"new": "<redacted>"}
+    assert recorded[1].changes == {"hashed_password": {"old": "<redacted>", "new": "<redacted>"}}
+    with audited.connect() as conn:
+        raw = conn.execute(text("SELECT group_concat(changes) FROM auditlog")).scalar()
+    assert old_hash not in raw and "new-hash" not in raw
+
+
+@pytest.mark.parametrize("statement", [
+    "UPDATE auditlog SET actor_id = 'someone else'",
+    "DELETE FROM auditlog",
+])
+def test_the_log_is_append_only(file_client, audited, statement):
+    sign_up(file_client)
+    assert entries(audited)
+
+    with pytest.raises(DBAPIError, match="append-only"):
+        with audited.begin() as conn:
+            conn.execute(text(statement))
+    assert len(entries(audited)) == 1
@@ -0,0 +1,78 @@
+from sqlmodel import select
+
+from models.user import User
+
+PASSWORD = "another-password-1"
+
+def test_each_test_starts_with_an_empty_database(session):
+    assert session.exec(select(User)).all() == []
+
+
+def test_signup_returns_a_working_token(client, make_user):
+    user = make_user("customer", "alice")
+    assert user["user"]["username"] == "alice"
+
+    response = client.get("/auth/me", headers=user["headers"])
+    assert response.status_code == 200
+    assert response.json()["email"] == "alice@example.com"
+
+
+def test_signup_rejects_taken_email_and_username(client, make_user):
+    make_user("customer", "alice")
+    taken_email = {"username": "other", "email": "alice@example.com", "password": PASSWORD}
+    taken_name = {"username": "alice", "email": "other@example.com", "password": PASSWORD}
+
+    assert client.post("/auth/signup", json=taken_email).json()["detail"] == "Email already registered"
+    assert client.post("/auth/signup", json=taken_name).json()["detail"] == "Username already taken"
+
+
+def test_login(client, make_user):
+    alice = make_user("customer", "alice")
+
+    ok = client.post("/auth/login", json={"email": "alice@example.com", "password": alice["password"]})
+    wrong = client.post("/auth/login", json={"email": "alice@example.com", "password": "wrong"})
+
+    assert ok.status_code == 200 and ok.json()["access_token"]
+    assert wrong.status_code == 401
+
+
+def test_invalid_token_is_rejected(client):
+    response = client.get("/auth/me", headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+
+
+def test_signup_is_rate_limited_per_ip(client):
+    statuses = [
+        client.post("/auth/signup", json={"username": f"u{i}", "email": f"u{i}@example.com", "password": PASSWORD}).status_code
+        for i in range(6)
+    ]
+    assert statuses == [200] * 5 + [429]
+
+
+def test_deleted_user_cannot_sign_in_and_keeps_their_email(client, make_user):
+    user = make_user("customer", "alice")
+
+    response = client.delete(f"/users/{user['user']['id']}", headers=user["headers"])
+
+    assert response.status_code == 200
+    assert client.get("/auth/me", headers=user["headers"]).status_code == 401
+    again = {"username": "alice2", "email": "alice@example.com", "password": PASSWORD}
+    assert client.post("/auth/signup", json=again).status_code == 400
+
+
+def test_users_cannot_delete_each_other(client, make_user):
+    alice, bob = make_user("customer", "alice"), make_user("customer", "bob")
+
+    response = client.delete(f"/users/{bob['user']['id']}", headers=alice["headers"])
+
+    assert response.status_code == 403
+
+
+def test_user_list_leaves_out_deleted_users(client, make_user):
+    alice, bob = make_user("distributor", "alice"), make_user("customer", "bob")
+    client.delete(f"/users/{bob['user']['id']}", headers=bob["headers"])
+
+    listed = client.get("/users/", headers=alice["headers"]).json()
+
+    assert [user["username"] for user in listed] == ["alice"]
+    assert listed[0]["roles"] == ["distributor"] and listed[0]["is_active"] is True
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+from sqlmodel import Session
+
+from models import Product
+from services import autocomplete
+from services.autocomplete import COMPANY, PRODUCT, PrefixIndex
+
+
+def eventually(check, timeout=5):
+    """Poll until check() is true; the refresher recounts in its own thread"""
+    deadline = time.monotonic() + timeout
+    while not check():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_prefixes_match_any_word_start_heaviest_first():
+    index = PrefixIndex()
+    index.load([(PRODUCT, "Nitrile Gloves", 3), (PRODUCT, "Glucose Meter", 5), (COMPANY, "Sérum Labs", 1)])
+
+    assert [text for _, text, _ in index.search("gl")] == ["Glucose Meter", "Nitrile Gloves"]
+    assert [text for _, text, _ in index.search("glov")] == ["Nitrile Gloves"]
+    assert index.search("SER", kind=COMPANY) == [(COMPANY, "Sérum Labs", 1)]
+    assert index.search("ser", kind=PRODUCT) == []
+
+    index.set_weight(PRODUCT, "Nitrile Gloves", 0)
+    index.set_weight(PRODUCT, "Latex Gloves", 2)
+    assert [text for _, text, _ in index.search("gl")] == ["Glucose Meter", "Latex Gloves"]
+
+
+@pytest.fixture
+def live_index(file_engine, monkeypatch):
+    """The real refresher on file_engine, with an index of its own"""
+    monkeypatch.setattr(autocomplete, "index", PrefixIndex())
+    monkeypatch.setattr(autocomplete, "_refresher", autocomplete._Refresher())
+    autocomplete.build(file_engine)
+    autocomplete._refresher.start(file_engine, 0.2)
+    yield
+    autocomplete._refresher.stop()
+
+
+def suggestions(client, q):
+    response = client.get("/search/autocomplete", params={"q": q, "kind": "product"})
+    assert response.status_code == 200
+    return {item["text"]: item["weight"] for item in response.json()}
+
+
+def test_writes_keep_the_search_index_current(file_client, live_index):
+    token = file_client.post("/auth/signup", json={
+        "username": "dist", "email": "dist@example.com", "password": "correct-horse-9", "role": "distributor",
+    }).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def create(name):
+        return file_client.post("/products/create", json={"name": name, "price": 1}, headers=headers).json()["product"]
+
+    first, _ = create("Nitrile Gloves"), create("Nitrile Gloves")
+    eventually(lambda: suggestions(file_client, "glo") == {"Nitrile Gloves": 2})
+
+    renamed = file_client.patch(f"/products/{first['id']}", json={"name": "Latex Gloves", "version": first["version"]},
+                                headers=headers).json()["product"]
+    eventually(lambda: suggestions(file_client, "glo") == {"Nitrile Gloves": 1, "Latex Gloves": 1})
+
+    file_client.patch(f"/products/{renamed['id']}", json={"is_active": False, "version": renamed["version"]},
+                      headers=headers)
+    eventually(lambda: suggestions(file_client, "glo") == {"Nitrile Gloves": 1})
+
+
+def test_the_periodic_rebuild_picks_up_untracked_writes(file_client, file_engine, live_index):
+    # As another worker process would: written without telling this process's index
+    with Session(file_engine) as session:
+        session.add(Product(name="Suture Kit", price=4, owner_id="1"))
+        session.commit()
+
+    eventually(lambda: suggestions(file_client, "sut") == {"Suture Kit": 1})
@@ -0,0 +1,89 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from db.backup import SNAPSHOT_FORMAT, backup, list_snapshots, restore, snapshot, snapshot_name, verify
+
+
+def make_database(path, rows=2000):
+    """A WAL database of a few hundred pages, like the app's"""
+    connection = sqlite3.connect(path, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("CREATE TABLE item (id INTEGER PRIMARY KEY, body BLOB)")
+    connection.executemany("INSERT INTO item (body) VALUES (?)", [(b"x" * 1000,) for _ in range(rows)])
+    connection.close()
+    return path
+
+
+def count(path):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute("SELECT count(*) FROM item").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def test_a_stepped_backup_lets_writers_carry_on(tmp_path):
+    database = make_database(tmp_path / "live.db")
+    # timeout=0: a write that had to wait for the backup would fail instead
+    writer = sqlite3.connect(database, timeout=0, isolation_level=None)
+    written = []
+
+    def write_while_copying(copied, total):
+        if copied < total:
+            writer.execute("INSERT INTO item (body) VALUES (?)", (b"new",))
+            written.append(copied)
+
+    stats = backup(database, tmp_path / "copy.db", pages=20, sleep_ms=0, progress=write_while_copying)
+    writer.close()
+
+    assert stats["steps"] > 10 and len(written) == stats["steps"] - 1
+    # The copy is the database as of the start of the backup, complete and consistent
+    assert verify(tmp_path / "copy.db") == ([], {"item": 2000})
+    assert count(database) == 2000 + len(written)
+    assert not (tmp_path / "copy.db.partial").exists()
+
+
+def test_verify_rejects_a_truncated_copy(tmp_path):
+    database = make_database(tmp_path / "live.db")
+    copy = tmp_path / "copy.db"
+    backup(database, copy, sleep_ms=0)
+    assert verify(copy) == ([], {"item": 2000})
+
+    copy.write_bytes(copy.read_bytes()[:copy.stat().st_size // 2])
+    problems, _ = verify(copy)
+    assert problems
+    with pytest.raises(RuntimeError, match="Refusing to restore"):
+        restore(copy, database)
+    assert count(database) == 2000
+
+
+def test_snapshots_keep_the_newest(tmp_path):
+    database = make_database(tmp_path / "live.db", rows=10)
+    directory = tmp_path / "backups"
+    now = datetime.utcnow()
+    for days in (3, 2, 1):
+        backup(database, directory / snapshot_name(now - timedelta(days=days)), sleep_ms=0)
+    (directory / "database-latest.db").write_bytes(b"not a snapshot")
+
+    taken, _ = snapshot(database, directory, keep=2, sleep_ms=0)
+
+    assert [path.name for _, path in list_snapshots(directory)] == [snapshot_name(now - timedelta(days=1)), taken.name]
+    assert (directory / "database-latest.db").exists()
+
+
+def test_restore_keeps_the_database_it_replaces(tmp_path):
+    database = make_database(tmp_path / "live.db", rows=10)
+    saved = tmp_path / "saved.db"
+    backup(database, saved, sleep_ms=0)
+    connection = sqlite3.connect(database, isolation_level=None)
+    connection.execute("DELETE FROM item WHERE id > 3")
+    connection.close()
+
+    previous = restore(saved, database)
+
+    assert count(database) == 10
+    assert previous.name.startswith("live.db.before-restore-")
+    datetime.strptime(previous.name.rsplit("-", 1)[1], SNAPSHOT_FORMAT)
+    assert verify(previous) == ([], {"item": 3})
@@ -0,0 +1,43 @@
+import asyncio
+import signal
+
+from core import lifecycle
+from services.change_feed import ChangeBroker, MemoryBackend, sse_stream
+
+
+async def _stream_ends_on_sigterm(broker: ChangeBroker, received):
+    broker.start()
+    lifecycle.install_signal_hooks()
+    stream = sse_stream(broker.subscribe(), heartbeat=0.05)
+    assert await stream.__anext__() == b"retry: 3000\n\n"
+    assert await stream.__anext__() == b": ping\n\n"
+    assert broker.stats()["subscribers"] == 1
+
+    signal.raise_signal(signal.SIGTERM)
+    frames = [frame async for frame in stream]
+    assert b": ping\n\n" not in frames[1:]
+    # The server's own handler still runs, to start its graceful shutdown
+    assert received == [signal.SIGTERM]
+
+    # Streams opened after the signal (keep-alive connections) end straight away
+    late = [frame async for frame in sse_stream(broker.subscribe(), heartbeat=0.05)]
+    assert late == [b"retry: 3000\n\n"]
+    assert broker.stats()["subscribers"] == 0
+    await broker.stop()
+
+
+def test_streams_end_when_shutdown_begins(monkeypatch):
+    """SIGTERM closes open streams before the server's graceful drain waits on them"""
+    received = []
+
+    def server_handler(signum, frame):
+        received.append(signum)
+
+    broker = ChangeBroker(MemoryBackend())
+    monkeypatch.setattr(lifecycle, "_drain_hooks", [broker.drain])
+    previous = {sig: signal.signal(sig, server_handler) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        asyncio.run(asyncio.wait_for(_stream_ends_on_sigterm(broker, received), 5))
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
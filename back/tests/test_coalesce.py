@@ -0,0 +1,96 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlmodel import Session
+from starlette.requests import Request
+
+from core.coalesce import FRESH_READ, SingleFlight, query_key
+from core.consistency import COOKIE_NAME
+from db.session import get_read_session
+
+WAITERS = 5
+
+
+def run_together(flight: SingleFlight, key, fn):
+    """Start WAITERS identical calls, let the first one finish only once the others have joined it"""
+    release = threading.Event()
+
+    def leader_fn():
+        release.wait(5)
+        return fn()
+
+    with ThreadPoolExecutor(WAITERS) as pool:
+        futures = [pool.submit(flight.do, key, leader_fn) for _ in range(WAITERS)]
+        deadline = time.monotonic() + 5
+        while flight.stats()["coalesced"] < WAITERS - 1 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        release.set()
+        return [future.exception() or future.result() for future in futures]
+
+
+def test_concurrent_identical_calls_share_one_run():
+    flight = SingleFlight("test.shared")
+    runs = []
+
+    def load():
+        runs.append(1)
+        return {"id": "p1"}
+
+    results = run_together(flight, ("db", "p1"), load)
+
+    assert len(runs) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats()["executed"] == 1 and flight.stats()["coalesced"] == WAITERS - 1
+
+
+def test_an_exception_reaches_every_waiter():
+    flight = SingleFlight("test.errors")
+    error = LookupError("gone")
+
+    def load():
+        raise error
+
+    results = run_together(flight, ("db", "p1"), load)
+
+    assert results == [error] * WAITERS
+    assert flight.stats()["in_flight"] == 0
+
+
+def request_with(cookies: str = "") -> Request:
+    headers = [(b"cookie", cookies.encode())] if cookies else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+@pytest.mark.parametrize("wrote", [False, True])
+def test_a_client_that_just_wrote_does_not_join_a_flight(engine, wrote):
+    cookie = f"{COOKIE_NAME}={int(time.time()) + 60}" if wrote else ""
+    sessions = get_read_session(request_with(cookie))
+    session = next(sessions)
+    try:
+        key = query_key(session, "p1")
+    finally:
+        sessions.close()
+
+    assert session.info.get(FRESH_READ, False) == wrote
+    assert (key is None) == wrote
+
+
+def test_a_fresh_read_runs_alone_while_a_flight_is_in_progress(engine):
+    flight = SingleFlight("test.fresh")
+    started, release = threading.Event(), threading.Event()
+
+    def stale_load():
+        started.set()
+        release.wait(5)
+        return "before the write"
+
+    with ThreadPoolExecutor(1) as pool, Session(engine) as session, Session(engine) as fresh:
+        in_flight = pool.submit(flight.do, query_key(session, "p1"), stale_load)
+        started.wait(5)
+        fresh.info[FRESH_READ] = True
+
+        assert flight.do(query_key(fresh, "p1"), lambda: "after the write") == "after the write"
+        release.set()
+        assert in_flight.result() == "before the write"
@@ -0,0 +1,94 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from sqlalchemy import insert
+
+from models.base import new_id
+from models.company import Company
+from services.geo import backfill_coordinates, create_spatial_index, geocode
+
+
+def create_company(client, user, **fields):
+    response = client.post("/companies/create", json=fields, headers=user["headers"])
+    assert response.status_code == 200, response.text
+    return response.json()["company"]
+
+
+def test_company_names_are_unique(client, distributor):
+    create_company(client, distributor, name="Acme Medical")
+
+    response = client.post("/companies/create", json={"name": "Acme Medical"}, headers=distributor["headers"])
+
+    assert response.status_code == 400
+
+
+def test_location_is_geocoded(client, distributor):
+    company = create_company(client, distributor, name="Acme Medical", location="Cairo")
+
+    assert company["latitude"] is not None and company["longitude"] is not None
+
+
+def test_nearest_orders_by_distance(client, distributor):
+    near = create_company(client, distributor, name="Near", latitude=30.05, longitude=31.25)
+    far = create_company(client, distributor, name="Far", latitude=31.2, longitude=29.9)
+    create_company(client, distributor, name="Elsewhere", latitude=-33.9, longitude=18.4)
+
+    response = client.get("/companies/nearest", params={"lat": 30.04, "lng": 31.24, "radius_km": 500})
+
+    assert response.status_code == 200
+    found = response.json()
+    assert [company["id"] for company in found] == [near["id"], far["id"]]
+    assert found[0]["distance_km"] < found[1]["distance_km"]
+
+
+def test_nearest_with_binary_ids():
+    # ID_STORAGE is read once on import, so the same test runs in a process of its own
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", f"{__file__}::test_nearest_orders_by_distance"],
+        cwd=Path(__file__).parents[1], env={**os.environ, "ID_STORAGE": "binary"}, capture_output=True, text=True,
+    )
+
+    assert result.returncode == 0, result.stdout
+
+
+def test_listing_is_ordered_by_name_and_matches_the_schema(client, distributor):
+    created = create_company(client, distributor, name="Beta", location="Cairo")
+    create_company(client, distributor, name="Alpha")
+
+    listed = client.get("/companies/").json()
+
+    assert [company["name"] for company in listed] == ["Alpha", "Beta"]
+    assert listed[1] == created
+
+
+def test_changing_the_location_moves_the_company(client, session, distributor):
+    created = create_company(client, distributor, name="Mover", location="Oran")
+    company = session.get(Company, created["id"])
+
+    company.location = "Cairo"
+    session.commit()
+
+    assert (company.latitude, company.longitude) == geocode("Cairo")
+    found = client.get("/companies/nearest", params={"near": "Cairo", "radius_km": 50}).json()
+    assert [c["id"] for c in found] == [created["id"]]
+
+    # Coordinates given along with the location win
+    company.location, company.latitude, company.longitude = "Somewhere", 1.5, 2.5
+    session.commit()
+    assert (company.latitude, company.longitude) == (1.5, 2.5)
+
+
+def test_companies_stored_without_coordinates_are_backfilled(file_client, file_engine):
+    # Written before geocoding existed: the flush hook never saw it
+    with file_engine.begin() as conn:
+        conn.execute(insert(Company.__table__).values(id=new_id(), name="Old", location="Blida"))
+
+    # As the lifespan does at startup
+    assert backfill_coordinates(file_engine) == 1
+    create_spatial_index(file_engine)
+
+    found = file_client.get("/companies/nearest", params={"near": "Blida", "radius_km": 50}).json()
+    assert [c["name"] for c in found] == ["Old"]
+    assert backfill_coordinates(file_engine) == 0
@@ -0,0 +1,60 @@
+import pytest
+
+from db.loaders import BatchLoader
+from models.user import User
+
+
+def create_product(client, user, **fields):
+    body = {"name": "Gauze", "price": 2.5, **fields}
+    response = client.post("/products/create", json=body, headers=user["headers"])
+    assert response.status_code == 200, response.text
+    return response.json()["product"]
+
+
+def test_each_key_is_loaded_once_per_request(session, make_user, count_queries):
+    ids = [make_user("customer")["user"]["id"] for _ in range(3)]
+    loader = BatchLoader(session, User, User.id, to_db=int)
+
+    with count_queries() as queries:
+        first = loader.load_many([ids[0], ids[1], ids[1], None, "not-a-number"])
+        second = loader.load_many(ids)
+        third = loader.load(ids[2])
+
+    assert set(first) == {str(ids[0]), str(ids[1])}
+    assert set(second) == {str(i) for i in ids}
+    assert third.id == ids[2]
+    # The first call loads two users, the second only the third one, the last none
+    assert len(queries) == 2
+
+
+def test_unknown_expand_is_rejected(client):
+    assert client.get("/products/", params={"expand": "owner,price"}).status_code == 400
+
+
+@pytest.mark.parametrize("expand", ["owner", "company", "owner,company"])
+def test_expand_runs_the_same_queries_for_any_page_size(client, make_user, count_queries, expand):
+    owners = [make_user("distributor") for _ in range(3)]
+    companies = [
+        client.post("/companies/create", json={"name": f"Company {i}"}, headers=owners[0]["headers"]).json()["company"]
+        for i in range(3)
+    ]
+
+    def list_products():
+        with count_queries() as queries:
+            response = client.get("/products/", params={"expand": expand})
+        assert response.status_code == 200
+        return response.json()["items"], len(queries)
+
+    create_product(client, owners[0], company_id=companies[0]["id"])
+    few, few_queries = list_products()
+    for i in range(12):
+        create_product(client, owners[i % 3], name=f"P{i}", company_id=companies[i % 3]["id"])
+    many, many_queries = list_products()
+
+    assert len(few) == 1 and len(many) == 13
+    assert many_queries == few_queries
+    for item in many:
+        if "owner" in expand:
+            assert item["owner"]["id"] == int(item["owner_id"])
+        if "company" in expand:
+            assert item["company"]["id"] == item["company_id"]
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlmodel import Session, select
+
+import migrate_ids
+from models import AuditLog, Company, Product, ProductNeighbours, StockAlert, User
+from services.audit import _APPEND_ONLY_DDL
+
+
+def test_rekey_follows_ids_outside_foreign_keys(file_engine, monkeypatch):
+    monkeypatch.setattr(migrate_ids, "engine", file_engine)
+    start = datetime(2024, 1, 1)
+    company_id, first_id, second_id = (str(uuid4()) for _ in range(3))
+    with Session(file_engine) as session:
+        session.add(User(id=1, username="d", email="d@example.com", hashed_password="x", role="distributor"))
+        session.add(Company(id=company_id, name="Acme", created_at=start))
+        for n, product_id in enumerate((first_id, second_id)):
+            session.add(Product(id=product_id, name=f"P{n}", price=1, owner_id="1", company_id=company_id,
+                                created_at=start + timedelta(days=n + 1)))
+        session.commit()
+        session.add(ProductNeighbours(product_id=first_id, neighbour_ids=[second_id]))
+        session.add(StockAlert(product_id=second_id, owner_id="1", stock_quantity=1, threshold=5))
+        session.add(AuditLog(at=start, action="update", entity="product", entity_id=first_id,
+                             changes={"company_id": company_id, "price": 2}))
+        session.commit()
+    with file_engine.begin() as conn:
+        for ddl in _APPEND_ONLY_DDL:
+            conn.exec_driver_sql(ddl)
+
+    migrate_ids.migrate(rekey=True, chunk_size=1)
+
+    with Session(file_engine) as session:
+        products = session.exec(select(Product).order_by(Product.created_at)).all()
+        new_first, new_second = (product.id for product in products)
+        new_company = session.exec(select(Company.id)).one()
+        assert {new_first, new_second, new_company}.isdisjoint({first_id, second_id, company_id})
+        assert session.get(ProductNeighbours, new_first).neighbour_ids == [new_second]
+        assert session.get(StockAlert, new_second) is not None
+        entry = session.exec(select(AuditLog)).one()
+        assert entry.entity_id == new_first
+        assert entry.changes == {"company_id": new_company, "price": 2}
+    # Still append-only afterwards
+    with file_engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT count(*) FROM sqlite_master WHERE type = 'trigger'").scalar() == 2
@@ -0,0 +1,124 @@
+import pytest
+from sqlmodel import select
+
+from models.product import Product
+
+
+def create_product(client, user, **fields):
+    body = {"name": "Gauze", "price": 2.5, "stock_quantity": 40, **fields}
+    response = client.post("/products/create", json=body, headers=user["headers"])
+    assert response.status_code == 200, response.text
+    return response.json()["product"]
+
+
+def test_only_distributors_create_products(client, make_user):
+    customer = make_user("customer")
+
+    response = client.post("/products/create", json={"name": "Gauze", "price": 1}, headers=customer["headers"])
+
+    assert response.status_code == 403
+
+
+def test_create_and_read(client, distributor):
+    product = create_product(client, distributor, name="Syringe 5ml")
+
+    response = client.get(f"/products/{product['id']}")
+
+    assert response.status_code == 200
+    assert response.json()["name"] == "Syringe 5ml"
+    assert response.json()["owner_id"] == str(distributor["user"]["id"])
+
+
+def test_unknown_product_is_404(client):
+    assert client.get("/products/does-not-exist").status_code == 404
+
+
+def test_listing_pages_newest_first(client, distributor):
+    ids = [create_product(client, distributor, name=f"P{i}")["id"] for i in range(5)]
+
+    first = client.get("/products/", params={"limit": 3}).json()
+    second = client.get("/products/", params={"limit": 3, "after": first["next_cursor"]}).json()
+
+    assert [p["id"] for p in first["items"]] == ids[::-1][:3]
+    assert [p["id"] for p in second["items"]] == ids[::-1][3:]
+    assert second["next_cursor"] is None
+
+
+def test_only_the_owner_edits(client, make_user):
+    owner, other = make_user("distributor"), make_user("distributor")
+    product = create_product(client, owner)
+    body = {"name": "Renamed", "price": 3}
+
+    assert client.put(f"/products/{product['id']}", json=body, headers=other["headers"]).status_code == 403
+    assert client.put(f"/products/{product['id']}", json=body, headers=owner["headers"]).status_code == 200
+
+
+def test_patch_with_a_stale_version_conflicts(client, distributor):
+    product = create_product(client, distributor)
+    url = f"/products/{product['id']}"
+
+    first = client.patch(url, json={"price": 3, "version": product["version"]}, headers=distributor["headers"])
+    stale = client.patch(url, json={"price": 4, "version": product["version"]}, headers=distributor["headers"])
+
+    assert first.status_code == 200
+    assert first.json()["product"]["version"] == product["version"] + 1
+    assert stale.status_code == 409
+    assert client.get(url).json()["price"] == 3
+
+
+def test_patch_is_one_statement(client, distributor, count_queries):
+    product = create_product(client, distributor)
+
+    with count_queries() as queries:
+        response = client.patch(f"/products/{product['id']}", json={"is_active": False, "version": product["version"]},
+                                headers=distributor["headers"])
+
+    assert response.status_code == 200
+    assert [q.split()[0] for q in queries if "product" in q] == ["UPDATE"]
+
+
+@pytest.mark.parametrize("field", ["name", "price", "stock_quantity", "is_active", "limit"])
+def test_patch_rejects_null_for_required_fields(client, distributor, field):
+    product = create_product(client, distributor)
+    url = f"/products/{product['id']}"
+
+    response = client.patch(url, json={field: None, "version": product["version"]}, headers=distributor["headers"])
+
+    assert response.status_code == 422
+    assert client.get(url).json()["version"] == product["version"]
+
+
+def test_delete_hides_the_product_but_keeps_the_row(client, session, distributor):
+    product = create_product(client, distributor)
+
+    response = client.delete(f"/products/{product['id']}", headers=distributor["headers"])
+
+    assert response.status_code == 200
+    assert client.get(f"/products/{product['id']}").status_code == 404
+    assert client.get("/products/").json()["items"] == []
+    row = session.exec(select(Product).where(Product.id == product["id"]).execution_options(include_deleted=True)).one()
+    assert row.deleted_at is not None
+
+
+def test_bulk_update_reports_a_null_item_without_failing_the_batch(client, distributor):
+    good, bad = create_product(client, distributor), create_product(client, distributor)
+    items = [{"id": good["id"], "price": 9}, {"id": bad["id"], "name": None}]
+
+    response = client.post("/products/bulk-update", json={"items": items}, headers=distributor["headers"])
+
+    assert response.status_code == 200
+    assert [r["status"] for r in response.json()["results"]] == ["updated", "invalid"]
+    assert client.get(f"/products/{good['id']}").json()["price"] == 9
+    assert client.get(f"/products/{bad['id']}").json()["name"] == "Gauze"
+
+
+def test_bulk_delete_reports_each_id(client, make_user):
+    owner, other = make_user("distributor"), make_user("distributor")
+    mine, theirs = create_product(client, owner), create_product(client, other)
+
+    response = client.post(
+        "/products/bulk-delete", json={"ids": [mine["id"], theirs["id"], "missing"]}, headers=owner["headers"],
+    )
+
+    statuses = {result["id"]: result["status"] for result in response.json()["results"]}
+    assert statuses == {mine["id"]: "deleted", theirs["id"]: "forbidden", "missing": "not_found"}
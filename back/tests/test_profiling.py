@@ -0,0 +1,60 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from core import profiling
+from core.profiling import ProfileStore, ProfilingMiddleware
+
+
+@pytest.fixture
+def profiled(client, engine, tmp_path, monkeypatch):
+    """The app behind the profiling middleware, with token "secret" and profiles in tmp_path"""
+    store = ProfileStore(tmp_path, keep=2)
+    monkeypatch.setattr(profiling, "profile_store", store)
+    monkeypatch.setattr("routers.profiles.profile_store", store)
+    profiling.install(engine)
+    app = ProfilingMiddleware(main.app, token="secret", sample_rate=0, store=store)
+    return TestClient(app), store
+
+
+def test_only_requests_with_the_token_are_profiled(profiled, distributor):
+    client, store = profiled
+
+    plain = client.get("/products/")
+    wrong = client.get("/products/", headers={"X-Profile": "guess"})
+    right = client.post(
+        "/products/create", json={"name": "Gauze", "price": 1},
+        headers={**distributor["headers"], "X-Profile": "secret"},
+    )
+
+    assert "x-profile-id" not in plain.headers and "x-profile-id" not in wrong.headers
+    [summary] = store.list()
+    assert right.headers["x-profile-id"] == summary["id"]
+    assert summary["path"] == "/products/create" and summary["status"] == 200
+    # The route's thread was found through its queries
+    assert summary["queries"] > 0 and summary["db_seconds"] > 0
+
+
+def test_admins_download_folded_stacks(profiled, make_user):
+    client, store = profiled
+    admin, customer = make_user("admin"), make_user("customer")
+    profile_id = client.get("/products/", headers={"X-Profile": "secret"}).headers["x-profile-id"]
+
+    listing = client.get("/profiles/", headers=admin["headers"])
+    download = client.get(f"/profiles/{profile_id}", headers=admin["headers"])
+
+    assert [p["id"] for p in listing.json()] == [profile_id]
+    assert download.status_code == 200
+    for line in download.text.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert stack and int(count) > 0
+    assert client.get(f"/profiles/{profile_id}", headers=customer["headers"]).status_code == 403
+    assert client.get("/profiles/..%2Fsecret", headers=admin["headers"]).status_code == 404
+
+
+def test_only_the_newest_profiles_are_kept(profiled):
+    client, store = profiled
+
+    ids = [client.get("/health", headers={"X-Profile": "secret"}).headers["x-profile-id"] for _ in range(3)]
+
+    assert [p["id"] for p in store.list()] == ids[:0:-1]
@@ -0,0 +1,59 @@
+import itertools
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+import main
+from core.consistency import COOKIE_NAME, ReadYourWritesMiddleware
+from core.rate_limit import limiter
+from db import session as db_session
+from db.session import LocalReplica, get_read_session, get_session
+
+
+@pytest.fixture
+def replica(file_engine, monkeypatch):
+    """One local replica of a file primary, routed to by the real get_read_session"""
+    replica = LocalReplica(file_engine)
+    replica.refresh()
+    monkeypatch.setattr(db_session, "engine", file_engine)
+    monkeypatch.setattr(db_session, "_read_engine_cycle", itertools.cycle([replica.engine]))
+    yield replica
+    replica.engine.dispose()
+
+
+@pytest.fixture
+def primary_client(file_engine, replica):
+    def primary_session():
+        with Session(file_engine) as session:
+            yield session
+
+    main.app.dependency_overrides[get_session] = primary_session
+    main.app.dependency_overrides.pop(get_read_session, None)
+    limiter.store.reset()
+    try:
+        # main.py only installs the middleware when replicas are configured at import
+        yield TestClient(ReadYourWritesMiddleware(main.app))
+    finally:
+        main.app.dependency_overrides.clear()
+
+
+def test_reads_follow_the_read_your_writes_cookie(primary_client, replica):
+    signup = primary_client.post("/auth/signup", json={
+        "username": "dist", "email": "dist@example.com", "password": "correct-horse-9", "role": "distributor",
+    })
+    headers = {"Authorization": f"Bearer {signup.json()['access_token']}"}
+    created = primary_client.post("/products/create", json={"name": "Gauze", "price": 2}, headers=headers)
+    assert created.status_code == 200, created.text
+    url = f"/products/{created.json()['product']['id']}"
+    assert COOKIE_NAME in primary_client.cookies
+
+    # Just wrote: served by the primary, which has the product
+    assert primary_client.get(url).status_code == 200
+
+    # No cookie: served by the replica, which hasn't been refreshed since
+    primary_client.cookies.clear()
+    assert primary_client.get(url).status_code == 404
+
+    replica.refresh()
+    assert primary_client.get(url).status_code == 200
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from sqlmodel import Session, select
+
+from models import Product, ProductNeighbours
+from services import similarity
+
+NAMES = ["Nitrile Gloves", "Latex Gloves", "Vinyl Gloves", "Glucose Meter", "Glucose Strips"]
+
+
+def add_products(engine):
+    with Session(engine) as session:
+        products = [Product(name=name, price=1, owner_id="1") for name in NAMES]
+        session.add_all(products)
+        session.commit()
+        return [product.id for product in products]
+
+
+def neighbours(engine, product_id):
+    with Session(engine) as session:
+        return session.get(ProductNeighbours, product_id).neighbour_ids
+
+
+def test_similar_names_are_neighbours(file_engine):
+    ids = add_products(file_engine)
+
+    assert similarity.rebuild(file_engine, k=2) == len(NAMES)
+
+    assert set(neighbours(file_engine, ids[0])) == {ids[1], ids[2]}
+    assert neighbours(file_engine, ids[3]) == [ids[4]]
+
+
+def test_a_product_updated_during_a_rebuild_is_picked_up_by_the_next_incremental_run(file_engine, monkeypatch):
+    ids = add_products(file_engine)
+    vectorize = similarity.vectorize
+
+    def vectorize_while_someone_edits(documents):
+        # Between the rebuild's read and its write of computed_at
+        with Session(file_engine) as session:
+            product = session.get(Product, ids[3])
+            product.name = "Nitrile Exam Gloves"
+            product.updated_at = datetime.utcnow()
+            session.commit()
+        return vectorize(documents)
+
+    monkeypatch.setattr(similarity, "vectorize", vectorize_while_someone_edits)
+    similarity.rebuild(file_engine, k=2)
+    monkeypatch.setattr(similarity, "vectorize", vectorize)
+
+    assert similarity.rebuild(file_engine, k=2, incremental=True) == 1
+    assert ids[0] in neighbours(file_engine, ids[3])
+    # Nothing changed since: nothing to do
+    assert similarity.rebuild(file_engine, k=2, incremental=True) == 0
+    with Session(file_engine) as session:
+        assert len(session.exec(select(ProductNeighbours)).all()) == len(NAMES)
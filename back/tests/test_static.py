@@ -0,0 +1,26 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.static import PrecompressedStaticFiles
+
+
+@pytest.fixture
+def static_client(tmp_path):
+    (tmp_path / "app.0123456789.js").write_text("console.log('hi')")
+    (tmp_path / "app.0123456789.js.gz").write_bytes(gzip.compress(b"console.log('hi')"))
+    app = FastAPI()
+    app.mount("/static", PrecompressedStaticFiles(directory=tmp_path), name="static")
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("accept, encoding", [("gzip", "gzip"), ("identity", None)])
+def test_both_variants_vary_on_accept_encoding(static_client, accept, encoding):
+    response = static_client.get("/static/app.0123456789.js", headers={"Accept-Encoding": accept})
+
+    assert response.status_code == 200
+    assert response.headers.get("content-encoding") == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.text == "console.log('hi')"
@@ -0,0 +1,103 @@
+from collections import deque
+
+import pytest
+
+from services import emails, stock_alerts
+
+PASSWORD = "correct-horse-9"
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    """Digests "sent" during the test"""
+    sent = deque()
+    monkeypatch.setattr(emails, "SMTP_HOST", "")
+    monkeypatch.setattr(emails, "outbox", sent)
+    return sent
+
+
+@pytest.fixture
+def owner(file_client):
+    response = file_client.post("/auth/signup", json={
+        "username": "stockist", "email": "stockist@example.com", "password": PASSWORD, "role": "distributor",
+    })
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def create_product(client, headers, **fields):
+    body = {"name": "Gauze", "price": 2.5, "stock_quantity": 40, **fields}
+    response = client.post("/products/create", json=body, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["product"]
+
+
+def set_stock(client, headers, product, stock):
+    current = client.get(f"/products/{product['id']}").json()
+    response = client.patch(f"/products/{product['id']}", json={"stock_quantity": stock, "version": current["version"]},
+                            headers=headers)
+    assert response.status_code == 200, response.text
+
+
+def check(engine):
+    """One check_stock.py run: (raised, cleared, delivered)"""
+    raised, cleared = stock_alerts.evaluate(engine)
+    return raised, cleared, stock_alerts.deliver(engine)
+
+
+def test_a_product_going_low_is_alerted_once(file_client, file_engine, owner, outbox, monkeypatch):
+    looked_at = []
+    candidates = stock_alerts._candidates
+    monkeypatch.setattr(stock_alerts, "_candidates", lambda *args: looked_at.append(candidates(*args)) or looked_at[-1])
+
+    product = create_product(file_client, owner, name="Nitrile Gloves")
+    create_product(file_client, owner, name="Syringes")
+    assert check(file_engine) == (0, 0, 0)
+
+    set_stock(file_client, owner, product, 3)
+    assert check(file_engine) == (1, 0, 1)
+    # Right away again: the product is re-read inside the checkpoint overlap, but is already alerted
+    assert check(file_engine) == (0, 0, 0)
+    assert product["id"] in looked_at[-1]
+
+    assert len(outbox) == 1
+    digest = outbox[0]
+    assert digest["To"] == "stockist@example.com"
+    assert digest["Subject"] == "Low stock: 1 product(s)"
+    assert "Nitrile Gloves: 3 left (alert at 10)" in digest.get_content()
+    assert "Syringes" not in digest.get_content()
+
+    alerts = file_client.get("/alerts/", headers=owner).json()
+    assert [(a["product_name"], a["stock_quantity"]) for a in alerts] == [("Nitrile Gloves", 3)]
+    assert alerts[0]["delivered_at"] is not None
+
+
+def test_restocking_re_arms_the_alert(file_client, file_engine, owner, outbox):
+    product = create_product(file_client, owner)
+    set_stock(file_client, owner, product, 2)
+    assert check(file_engine) == (1, 0, 1)
+
+    set_stock(file_client, owner, product, 80)
+    assert check(file_engine) == (0, 1, 0)
+    set_stock(file_client, owner, product, 1)
+    assert check(file_engine) == (1, 0, 1)
+    assert check(file_engine) == (0, 0, 0)
+    assert len(outbox) == 2
+
+
+def test_one_digest_per_distributor_for_a_new_threshold(file_client, file_engine, owner, outbox):
+    for name in ("Gauze", "Masks", "Syringes"):
+        create_product(file_client, owner, name=name, stock_quantity=40)
+    assert check(file_engine) == (0, 0, 0)
+
+    # Nothing about the products changed, only the threshold: the whole catalog is re-checked
+    assert file_client.put("/alerts/threshold", json={"threshold": 50}, headers=owner).status_code == 200
+    assert check(file_engine) == (3, 0, 3)
+    assert check(file_engine) == (0, 0, 0)
+
+    assert len(outbox) == 1
+    assert outbox[0]["Subject"] == "Low stock: 3 product(s)"
+    body = outbox[0].get_content()
+    assert [line.strip() for line in body.splitlines() if line.startswith("  - ")] == [
+        "- Gauze: 40 left (alert at 50)", "- Masks: 40 left (alert at 50)", "- Syringes: 40 left (alert at 50)",
+    ]
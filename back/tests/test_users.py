@@ -0,0 +1,97 @@
+import routers.user
+
+
+def account(name, **fields):
+    return {"username": name, "email": f"{name}@hospital.org", "password": f"{name}-password", **fields}
+
+
+def test_bulk_create_reports_each_row(client, make_user):
+    admin = make_user("admin")
+    make_user("customer", "taken")
+    items = [
+        account("nurse1"),
+        account("taken"),
+        {**account("nurse2"), "email": "taken@example.com"},
+        account("nurse1"),
+        account("doctor1", role="distributor", full_name="Dr. One"),
+    ]
+
+    response = client.post("/users/bulk-create", json={"items": items}, headers=admin["headers"])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [result["status"] for result in body["results"]] == [
+        "created", "username_taken", "email_taken", "duplicate", "created",
+    ]
+    assert (body["succeeded"], body["failed"]) == (2, 3)
+    created = body["results"][4]
+    assert created["index"] == 4 and created["id"] is not None
+
+    login = client.post("/auth/login", json={"email": "doctor1@hospital.org", "password": "doctor1-password"})
+    assert login.status_code == 200
+    assert login.json()["user"]["roles"] == ["distributor"]
+
+
+def test_bulk_create_is_for_admins_only(client, distributor):
+    response = client.post("/users/bulk-create", json={"items": [account("nurse1")]}, headers=distributor["headers"])
+
+    assert response.status_code == 403
+
+
+def test_bulk_create_is_capped(client, make_user, monkeypatch):
+    admin = make_user("admin")
+    monkeypatch.setattr(routers.user, "BULK_MAX_ITEMS", 2)
+
+    items = [account(f"nurse{i}") for i in range(3)]
+    response = client.post("/users/bulk-create", json={"items": items}, headers=admin["headers"])
+
+    assert response.status_code == 400
+
+
+def test_bulk_create_inserts_in_chunks(client, make_user, monkeypatch, count_queries):
+    admin = make_user("admin")
+    monkeypatch.setattr(routers.user, "PROVISION_CHUNK_SIZE", 2)
+
+    with count_queries() as queries:
+        response = client.post(
+            "/users/bulk-create", json={"items": [account(f"nurse{i}") for i in range(5)]}, headers=admin["headers"],
+        )
+
+    ids = [result["id"] for result in response.json()["results"]]
+    assert len(set(ids)) == 5 and None not in ids
+    # One multi-row INSERT per chunk of 2
+    assert sum(1 for query in queries if query.startswith("INSERT INTO user ")) == 3
+
+
+def test_bulk_create_retries_a_chunk_after_a_concurrent_signup(client, make_user, monkeypatch):
+    admin = make_user("admin")
+    make_user("customer", "late")
+    real_taken = routers.user._taken
+    calls = []
+
+    def missed_once(session, items):
+        # The first check runs before "late" signed up
+        calls.append(len(items))
+        return (set(), set()) if len(calls) == 1 else real_taken(session, items)
+
+    monkeypatch.setattr(routers.user, "_taken", missed_once)
+    items = [account("nurse1"), account("late"), account("nurse2")]
+    response = client.post("/users/bulk-create", json={"items": items}, headers=admin["headers"])
+
+    assert [result["status"] for result in response.json()["results"]] == ["created", "username_taken", "created"]
+    assert len(calls) == 2
+
+
+def test_deleting_a_user_hides_their_products(client, make_user):
+    owner, other = make_user("distributor"), make_user("distributor")
+    for name, user in (("Gauze", owner), ("Masks", owner), ("Syringes", other)):
+        response = client.post("/products/create", json={"name": name, "price": 1, "stock_quantity": 5},
+                               headers=user["headers"])
+        assert response.status_code == 200
+    gauze = client.get("/products/", params={"owner_id": owner["user"]["id"]}).json()["items"][0]
+
+    assert client.delete(f"/users/{owner['user']['id']}", headers=other["headers"]).status_code == 403
+    assert client.delete(f"/users/{owner['user']['id']}", headers=owner["headers"]).status_code == 200
+
+    assert [product["name"] for product in client.get("/products/").json()["items"]] == ["Syringes"]
+    assert client.get(f"/products/{gauze['id']}").status_code == 404
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from db import pending
+from db.write_queue import WriteQueue, run_write_async
+from models import Company
+
+
+@pytest.fixture
+def write_queue(file_engine):
+    # A generous max_wait, so jobs submitted together always share a batch
+    queue = WriteQueue(file_engine, max_batch=16, max_wait=0.2)
+    queue.start()
+    yield queue
+    queue.stop()
+
+
+def add_company(name):
+    def write(session):
+        session.add(Company(name=name))
+        return name
+    return write
+
+
+def company_names(engine):
+    with Session(engine) as session:
+        return sorted(session.exec(select(Company.name)).all())
+
+
+def test_a_failing_job_does_not_roll_back_its_batch(write_queue, file_engine):
+    def failing(session):
+        session.add(Company(name="Lost"))
+        session.flush()
+        raise ValueError("rejected")
+
+    futures = [write_queue.submit(job) for job in (add_company("A"), failing, add_company("C"))]
+
+    assert futures[0].result(timeout=5) == "A"
+    with pytest.raises(ValueError, match="rejected"):
+        futures[1].result(timeout=5)
+    assert futures[2].result(timeout=5) == "C"
+    assert write_queue.batches == 1
+    assert company_names(file_engine) == ["A", "C"]
+
+
+def test_a_failing_flush_only_fails_its_own_job(write_queue, file_engine):
+    futures = [write_queue.submit(add_company(name)) for name in ("Same", "Same", "Other")]
+
+    assert futures[0].result(timeout=5) == "Same"
+    with pytest.raises(IntegrityError):
+        futures[1].result(timeout=5)
+    assert futures[2].result(timeout=5) == "Other"
+    assert company_names(file_engine) == ["Other", "Same"]
+
+
+def test_after_commit_items_of_a_failed_job_are_dropped(write_queue, monkeypatch):
+    delivered = []
+    monkeypatch.setitem(pending._handlers, "test_write_queue", delivered.extend)
+
+    def job(name, fail=False):
+        def write(session):
+            pending.add(session, "test_write_queue", name)
+            if fail:
+                raise ValueError(name)
+        return write
+
+    futures = [write_queue.submit(job("kept")), write_queue.submit(job("dropped", fail=True))]
+    for future in futures:
+        future.exception(timeout=5)
+
+    assert delivered == ["kept"]
+
+
+def test_submit_after_stop_is_refused(write_queue):
+    write_queue.stop()
+
+    with pytest.raises(RuntimeError):
+        write_queue.submit(add_company("Late"))
+
+
+def test_inline_fallback_runs_off_the_event_loop(session):
+    # WRITE_QUEUE_ENABLED is off in the tests, so this takes the inline path
+    ran_on = []
+
+    def write(session):
+        ran_on.append(threading.get_ident())
+        return "done"
+
+    async def call():
+        return await run_write_async(session, write), threading.get_ident()
+
+    result, loop_thread = asyncio.run(call())
+
+    assert result == "done"
+    assert ran_on and ran_on[0] != loop_thread